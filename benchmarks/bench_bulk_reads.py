@@ -0,0 +1,64 @@
+"""
+Compares reading the Properties of many Things one by one with reading them in
+bulk through query cursors, using a stubbed transport that adds a fixed
+latency to each round trip.
+
+Run with: python -m benchmarks.bench_bulk_reads
+"""
+import json
+import threading
+import time
+from unittest import mock
+
+from iots.api import API
+from .common import make_response
+
+THINGS = 5000
+LATENCY = 0.002
+CURSOR_URL = "https://bench.swx.mock/spaces/s/query/cursor"
+
+
+class StubServer:
+    """
+    Answers Property reads and bulk queries, counting the round trips.
+    """
+
+    def __init__(self):
+        self.round_trips = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, method, url, params=None, headers=None, data=None, timeout=None, verify=None):
+        time.sleep(LATENCY)
+        with self.lock:
+            self.round_trips += 1
+
+        if url == CURSOR_URL:
+            ids = json.loads(data)['bindVars']['ids']
+            result = [{"uid": thing_id, "properties": {"temperature": 21.7}} for thing_id in ids]
+            return make_response(201, {"result": result, "hasMore": False, "error": False})
+        return make_response(200, {"temperature": 21.7})
+
+
+def run(name: str, server: StubServer, func):
+    start = time.perf_counter()
+    count = sum(1 for _ in func())
+    elapsed = time.perf_counter() - start
+    print(f"{name:<50} {count:6} things {server.round_trips:6} round trips {elapsed:8.2f} s")
+
+
+def main():
+    space = API(host="bench.swx.mock").set_token("token").spaces("s")
+    thing_ids = [f"thing{i:05}" for i in range(THINGS)]
+
+    server = StubServer()
+    with mock.patch('iots.api.requests.request', side_effect=server):
+        run("Properties2.get() per Thing", server,
+            lambda: (space.things(thing_id).properties().get() for thing_id in thing_ids))
+
+    server = StubServer()
+    with mock.patch('iots.api.requests.request', side_effect=server):
+        run("bulk_properties(thing_ids)", server, lambda: space.bulk_properties(thing_ids))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+Measures the cold-start latency of an API client with OAuth2 credentials: the
+time to create the client, and the time until the first request completes,
+for each token fetch mode. The token server and the API are stubbed with a
+fixed latency.
+
+Run with: python -m benchmarks.bench_cold_start
+"""
+import time
+from unittest import mock
+
+from iots.api import API
+from .common import make_response
+
+TOKEN_LATENCY = 0.2
+""" Simulated latency of the token server, in seconds. """
+
+STARTUP_WORK = 0.15
+""" Simulated work done by the application between creating the client and making the first request. """
+
+
+def stub_request(method, url, **kwargs):
+    if url.endswith('/oauth2/token'):
+        time.sleep(TOKEN_LATENCY)
+        return make_response(200, {'access_token': "token", 'expires_in': 3600})
+    return make_response(200, {"foo": "bar"})
+
+
+def cold_start(token_fetch: str, repeat: int = 5):
+    construct, first_request = [], []
+    for _ in range(repeat):
+        with mock.patch('iots.api.requests.request', side_effect=stub_request):
+            start = time.perf_counter()
+            api = API(host="bench.swx.mock", token_fetch=token_fetch).set_credentials(
+                "client-id", "client-secret", ["thing"])
+            construct.append(time.perf_counter() - start)
+
+            time.sleep(STARTUP_WORK)
+            api.make_request("GET", "/info")
+            first_request.append(time.perf_counter() - start)
+
+    print(f"{token_fetch:<12} construct: {min(construct) * 1e3:8.2f} ms   "
+          f"first request done at: {min(first_request) * 1e3:8.2f} ms")
+
+
+def main():
+    print(f"Token server latency: {TOKEN_LATENCY * 1e3:.0f} ms, "
+          f"startup work: {STARTUP_WORK * 1e3:.0f} ms")
+    for token_fetch in ("eager", "lazy", "background"):
+        cold_start(token_fetch)
+
+
+if __name__ == '__main__':
+    main()
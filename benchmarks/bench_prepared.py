@@ -0,0 +1,32 @@
+"""
+Measures the per-call overhead of updating a Property and creating an Event,
+with the regular operations and with prepared operations, using a stubbed
+transport.
+
+Run with: python -m benchmarks.bench_prepared
+"""
+from unittest import mock
+
+from iots.api import API
+from .common import bench, make_response
+
+
+def main():
+    thing = API(host="bench.swx.mock").set_token("token").spaces("s").things("t")
+    prop = thing.properties("temperature")
+    event = thing.events("highCPU")
+    update_temperature = prop.prepare_update()
+    create_event = event.prepare_create()
+
+    with mock.patch('iots.api.requests.request', return_value=make_response(200, {"temperature": 21.7})):
+        bench("Properties1.update(value)", lambda: prop.update(21.7), number=5000)
+        bench("prepared Properties1.update(value)", lambda: update_temperature(21.7), number=5000)
+
+    event_resp = make_response(201, {"highCPU": {"data": 75, "timestamp": "2020-04-02 15:22:37+0000"}})
+    with mock.patch('iots.api.requests.request', return_value=event_resp):
+        bench("Events2.create(req)", lambda: event.create({"highCPU": {"data": 75}}), number=5000)
+        bench("prepared Events2.create(req)", lambda: create_event({"highCPU": {"data": 75}}), number=5000)
+
+
+if __name__ == '__main__':
+    main()
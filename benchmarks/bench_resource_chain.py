@@ -0,0 +1,28 @@
+"""
+Measures the overhead of building a resource call chain and its URL path, and
+of a full `Properties1.get()` call with a stubbed transport.
+
+Run with: python -m benchmarks.bench_resource_chain
+"""
+from unittest import mock
+
+from iots.api import API
+from .common import bench, make_response
+
+
+def main():
+    api = API(host="bench.swx.mock").set_token("token")
+
+    bench("api.spaces(s).things(t).properties(p)",
+          lambda: api.spaces("s").things("t").properties("temperature"))
+    bench("... ._build_path()",
+          lambda: api.spaces("s").things("t").properties("temperature")._build_path())
+
+    resp = make_response(200, {"temperature": 21.7})
+    with mock.patch('iots.api.requests.request', return_value=resp):
+        bench("... .get() (stubbed transport)",
+              lambda: api.spaces("s").things("t").properties("temperature").get(), number=5000)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Measures the per-call overhead of the response dispatch for small responses.
+
+Run with: python -m benchmarks.bench_response_dispatch
+"""
+from unittest import mock
+
+from iots.api import API
+from iots.internal.content_type import content_types_match
+from iots.internal.response import compile_responses
+from iots.models import models
+from .common import bench, make_response
+
+EXPECTED_RESPONSES = [
+    (200, "application/json", models.Property),
+    (400, "application/json", models.ErrorResponse),
+    (401, "application/json", models.ErrorResponse),
+    (403, "application/json", models.ErrorResponse),
+    (404, "application/json", models.ErrorResponse),
+    (500, "application/json", models.ErrorResponse),
+]
+
+
+def linear_dispatch(status_code, content_type, expected_responses):
+    """ Dispatch as done before the response tables were compiled. """
+    expected_responses = sorted(expected_responses, key=lambda x: x[0] == 0)
+    expected_status_codes = set([r[0] for r in expected_responses])
+    if status_code not in expected_status_codes and 0 not in expected_status_codes:
+        return None
+    for code, ct, resp_class in expected_responses:
+        if not ct:
+            return resp_class
+        if code in [status_code, 0] and content_types_match(content_type, ct):
+            return resp_class
+    return None
+
+
+def table_dispatch(status_code, content_type, expected_responses):
+    table = compile_responses(expected_responses)
+    if not table.accepts_status(status_code):
+        return None
+    return table.lookup(status_code, content_type)
+
+
+def main():
+    for status_code in (200, 500):
+        bench(f"linear dispatch ({status_code})",
+              lambda: linear_dispatch(status_code, "application/json", EXPECTED_RESPONSES))
+        bench(f"compiled table dispatch ({status_code})",
+              lambda: table_dispatch(status_code, "application/json", EXPECTED_RESPONSES))
+
+    resp = make_response(200, {"temperature": 21.7})
+    prop = API(host="bench.swx.mock").set_token("token").spaces("s").things("t").properties("temperature")
+    with mock.patch('iots.api.requests.request', return_value=resp):
+        bench("Properties1.get() (stubbed transport)", prop.get, number=5000)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""
+Measures the evaluation of the runtime expressions used for pagination, with
+evaluate() and with the compiled functions.
+
+Run with: python -m benchmarks.bench_runtime_expr
+"""
+from requests import PreparedRequest
+
+from iots.internal.runtime_expr import compile_expression, compile_setter, evaluate, prepare_request
+from .common import bench, make_response
+
+HAS_MORE = '$response.body#/paging/next_cursor'
+MODIFIER = '$request.query.next_cursor'
+TEMPLATE = '/spaces/{$request.path.space}/things?next_cursor={$response.body#/paging/next_cursor}'
+
+
+def main():
+    req = PreparedRequest()
+    req.prepare(method="GET", url="https://bench.swx.mock/spaces/s/things", params={"limit": 100})
+    resp = make_response(200, {"data": [], "paging": {"next_cursor": "abc"}}, request=req)
+    # Decode the body once, as the response handling does
+    resp.json()
+    path_values = {"space": "s"}
+    query_types = {"limit": int, "next_cursor": str}
+
+    bench("evaluate(has_more)", lambda: evaluate(resp, HAS_MORE, path_values, query_types))
+    has_more = compile_expression(HAS_MORE)
+    bench("compiled has_more", lambda: has_more(resp, path_values, query_types, None))
+
+    bench("evaluate(template)", lambda: evaluate(resp, TEMPLATE, path_values, query_types))
+    template = compile_expression(TEMPLATE)
+    bench("compiled template", lambda: template(resp, path_values, query_types, None))
+
+    bench("prepare_request(modifier)", lambda: prepare_request(req, MODIFIER, "abc"), number=5000)
+    set_cursor = compile_setter(MODIFIER)
+    bench("compiled modifier", lambda: set_cursor(req, "abc"), number=5000)
+
+
+if __name__ == '__main__':
+    main()
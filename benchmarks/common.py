@@ -0,0 +1,28 @@
+import json
+import timeit
+from typing import Callable
+
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+
+
+def make_response(status_code: int, body=None, request=None) -> Response:
+    """
+    Returns a :class:`requests.Response` with a JSON body, as returned by the
+    transport of the API client.
+    """
+    resp = Response()
+    resp.status_code = status_code
+    resp.request = request
+    resp.headers = CaseInsensitiveDict({'Content-Type': 'application/json'})
+    resp._content = json.dumps(body).encode('utf-8') if body is not None else b''
+    return resp
+
+
+def bench(name: str, func: Callable, number: int = 20000, repeat: int = 5) -> float:
+    """
+    Runs the given function and prints the best time per call in microseconds.
+    """
+    best = min(timeit.repeat(func, number=number, repeat=repeat)) / number
+    print(f"{name:<50} {best * 1e6:10.2f} µs/call")
+    return best
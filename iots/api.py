@@ -1,16 +1,23 @@
 import json
+import threading
+import weakref
 from typing import Union, List
 
 import requests
 from pydantic import BaseModel
 
 from .apis.spaces import _SpacesMethods
+from .body import JSONArrayStream, RawBody
+from .internal.url import DEFAULT_MAX_URL_LENGTH
+from .models.basemodel import ResponseRetention
 from .models.exceptions import APIException
 from .security import (
     AccessToken,
     OAuth2ClientCredentials,
     SecurityStrategyWithTokenExchange,
+    TokenFetch,
 )
+from .token_store import TokenStore
 
 
 class API(_SpacesMethods):
@@ -20,13 +27,32 @@ class API(_SpacesMethods):
 
     def __init__(self, host: str = "https://api.swx.altairone.com",
                  security_strategy: Union[AccessToken, OAuth2ClientCredentials] = None,
-                 verify: bool = True):
+                 verify: bool = True,
+                 response_retention: Union[ResponseRetention, str] = ResponseRetention.FULL,
+                 token_fetch: Union[TokenFetch, str] = TokenFetch.EAGER,
+                 session: requests.Session = None,
+                 max_url_length: int = DEFAULT_MAX_URL_LENGTH):
         """
         Creates a new API instance.
 
         :param host: (optional) Host name of the Altair IoT Studio API.
         :param security_strategy: (optional) The security strategy for the API client.
         :param verify: (optional) Whether to verify the server's TLS certificate.
+        :param response_retention: (optional) How much of the HTTP response is
+            kept in the returned models (`full`, `headers` or `none`). See
+            :class:`iots.models.basemodel.ResponseRetention`.
+        :param token_fetch: (optional) When the access token is retrieved if
+            the security strategy requires token exchange: when the strategy is
+            set (`eager`), by the first authenticated request (`lazy`), or in a
+            background thread started when the strategy is set (`background`).
+            See :class:`iots.security.TokenFetch`.
+        :param session: (optional) The :class:`requests.Session` used to make
+            the requests to the API and to the token server, to reuse their
+            connections. If not given, the client creates its own session,
+            which is closed when the context manager exits.
+        :param max_url_length: (optional) Maximum length of the request URLs.
+            List filters (e.g. `thingID[]`) that make them longer are split
+            into several requests, made concurrently.
         """
         if not host.startswith("http://") and not host.startswith("https://"):
             host = "https://" + host
@@ -35,6 +61,12 @@ class API(_SpacesMethods):
         self._verify = verify
         self.headers = {}
         self._raise_errors = True
+        self.response_retention = ResponseRetention(response_retention)
+        self.token_fetch = TokenFetch(token_fetch)
+        self._own_session = session is None
+        self._session = requests.Session() if session is None else session
+        self.max_url_length = max_url_length
+        self._buffers = weakref.WeakSet()
 
         self._security_strategy = security_strategy
         if self._security_strategy:
@@ -43,8 +75,9 @@ class API(_SpacesMethods):
     def with_security(self, security_strategy: Union[AccessToken, OAuth2ClientCredentials]):
         """
         Sets the security strategy for the API client. If the provided security
-        strategy requires token exchange and retrieval, the method will retrieve
-        the access token automatically.
+        strategy requires token exchange and retrieval, the access token will
+        be retrieved automatically, as configured by the `token_fetch` argument
+        of the API client.
 
         :param security_strategy: The security strategy to be set for the API client.
         :type security_strategy: Union[AccessToken, OAuth2ClientCredentials]
@@ -55,7 +88,13 @@ class API(_SpacesMethods):
         if isinstance(self._security_strategy, SecurityStrategyWithTokenExchange):
             self._security_strategy.set_token_url_host(self.host)
             self._security_strategy.set_verify_tls_certificate(self._verify)
-            self._security_strategy.get_token()
+            self._security_strategy.set_session(self._session)
+
+            if self.token_fetch == TokenFetch.EAGER:
+                self._security_strategy.get_token()
+            elif self.token_fetch == TokenFetch.BACKGROUND:
+                threading.Thread(target=_prefetch_token, args=(self._security_strategy,),
+                                 name='iots-token-prefetch', daemon=True).start()
 
         return self
 
@@ -72,7 +111,10 @@ class API(_SpacesMethods):
                         scopes: List[str],
                         token_url: str = '/oauth2/token',
                         revoke_token_url: str = '/oauth2/revoke',
-                        refresh_threshold: int = 10):
+                        refresh_threshold: int = 10,
+                        background_refresh: bool = False,
+                        token_store: TokenStore = None,
+                        token_timeout: float = 10):
         """
         Configure an OAuth2 security strategy using the Client Credentials flow.
 
@@ -82,12 +124,20 @@ class API(_SpacesMethods):
         :param token_url: The URL for token exchange.
         :param revoke_token_url: The URL for revoking access tokens (optional).
         :param refresh_threshold: The number of seconds before token expiration to trigger token refresh.
+        :param background_refresh: Whether to renew the access token in a background thread before
+            it expires, instead of during a request.
+        :param token_store: The store used to share the access token with other clients (e.g. a
+            :class:`~iots.token_store.FileTokenStore` to share it between processes).
+        :param token_timeout: How many seconds to wait for the token server.
         :return: The modified API client.
         """
         return self.with_security(OAuth2ClientCredentials(client_id, client_secret,
                                                           scopes, token_url,
                                                           revoke_token_url,
-                                                          refresh_threshold))
+                                                          refresh_threshold,
+                                                          background_refresh=background_refresh,
+                                                          token_store=token_store,
+                                                          timeout=token_timeout))
 
     def revoke_token(self):
         """ Revokes the access token. """
@@ -104,8 +154,11 @@ class API(_SpacesMethods):
             `POST`, `PUT`, `PATCH`, or `DELETE`).
         :param url: Request URL. It can be a relative path or a full URL (the
             host used must be the same as the host in this :class:`API` instance).
-        :param body: (optional) Dictionary, list of tuples, bytes, or file-like
-            object to send in the body of the request.
+        :param body: (optional) Dictionary, list of tuples, bytes, file-like
+            object, iterator of bytes, :class:`~iots.body.RawBody` or
+            :class:`~iots.body.JSONArrayStream` to send in the body of the
+            request. File-like objects, iterators and streams are sent while
+            they are read, without loading them in memory.
         :param params: (optional) Dictionary, list of tuples or bytes to send
             in the query string for the :class:`Request`.
         :param headers: (optional) Dictionary of HTTP headers to send.
@@ -130,6 +183,10 @@ class API(_SpacesMethods):
         elif isinstance(body, BaseModel):
             headers['Content-Type'] = 'application/json'
             body = body.json(by_alias=True)
+        elif isinstance(body, (RawBody, JSONArrayStream)):
+            if not any(k.lower() == 'content-type' for k in headers):
+                headers['Content-Type'] = body.content_type
+            body = body.data if isinstance(body, RawBody) else iter(body)
 
         if url.lower().startswith('http://') or url.lower().startswith('https://'):
             url = url
@@ -147,13 +204,49 @@ class API(_SpacesMethods):
         if verify is None:
             verify = self._verify
 
-        return requests.request(req.method, req.url, params=req.params,
-                                headers=req.headers, data=req.data,
-                                timeout=timeout, verify=verify)
+        return self._send(req.method, req.url, req.params, req.headers,
+                          req.data, timeout, verify)
+
+    def _send(self, method: str, url: str, params, headers: dict, data,
+              timeout: float, verify) -> requests.Response:
+        """
+        Sends an already built request with the session of the API client.
+        """
+        return self._session.request(method, url, params=params, headers=headers, data=data,
+                                     timeout=timeout, verify=verify)
+
+    def _register_buffer(self, buffer):
+        """
+        Registers a write-behind buffer, to be closed when the context manager
+        exits.
+        """
+        self._buffers.add(buffer)
 
     def __enter__(self):
         return self
 
     def __exit__(self, *exc):
+        # Send the values pending in the write-behind buffers while the
+        # credentials are still valid
+        for buffer in list(self._buffers):
+            buffer.close()
+
         if self._security_strategy:
             self._security_strategy.clean()
+
+        if self._own_session:
+            self._session.close()
+
+
+def _prefetch_token(security_strategy: SecurityStrategyWithTokenExchange):
+    """
+    Retrieves the access token of a security strategy in the background. If it
+    fails, the error is kept in the `prefetch_error` attribute of the strategy,
+    and the token will be retrieved by the next authenticated request.
+    """
+    try:
+        security_strategy.ensure_token()
+    except Exception as e:
+        security_strategy.prefetch_error = e
+    else:
+        security_strategy.prefetch_error = None
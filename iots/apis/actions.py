@@ -8,6 +8,7 @@ from ..models.extensions.pagination import PaginationDescription
 
 @dataclass
 class Actions1(APIResource):
+    __slots__ = ('action_name', 'action_id')
     action_name: str
     action_id: str
 
@@ -74,6 +75,7 @@ class Actions1(APIResource):
 
 @dataclass
 class Actions2(APIResource):
+    __slots__ = ('action_name',)
     action_name: str
 
     def create(self, req: Union[models.ActionCreateRequest, dict], **kwargs) -> Union[models.ActionResponse, models.ErrorResponse]:
@@ -142,6 +144,7 @@ class Actions2(APIResource):
 
 @dataclass
 class Actions3(APIResource):
+    __slots__ = ()
 
     def get(self, **kwargs) -> Union[models.ActionListResponse, models.ErrorResponse]:
         """
@@ -187,6 +190,8 @@ class _ActionsMethods:
     This class declares and implements the `actions()` method.
     """
 
+    __slots__ = ()
+
     @overload
     def actions(self, action_name: str, action_id: str) -> Actions1:
         ...
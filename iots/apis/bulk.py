@@ -0,0 +1,355 @@
+import time
+from dataclasses import dataclass
+from enum import Enum
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple, Union
+
+from ..body import RawBody
+from ..internal.concurrency import concurrent_chain, map_unordered
+from ..internal.content_type import to_json
+from ..internal.response import check_response
+from ..internal.retry import error_status_code, is_retryable
+from ..models import models, things_patch
+from ..models.exceptions import ResponseError
+
+# The Things are stored in the `things` collection of AnythingDB, keyed by
+# their UID, with their Property values in the `properties` attribute. The
+# values are left out of the Things, whose `properties` are descriptions.
+_THINGS_QUERY = ("FOR t IN things FILTER t._key IN @ids "
+                 "RETURN MERGE(UNSET(t, '_key', '_id', '_rev', 'properties'), {uid: t._key})")
+_THINGS_FIELDS_QUERY = ("FOR t IN things FILTER t._key IN @ids "
+                        "RETURN MERGE(UNSET(KEEP(t, @fields), 'properties'), {uid: t._key})")
+_PROPERTIES_QUERY = ("FOR t IN things FILTER t._key IN @ids "
+                     "RETURN {uid: t._key, properties: t.properties}")
+_PROPERTIES_NAMES_QUERY = ("FOR t IN things FILTER t._key IN @ids "
+                           "RETURN {uid: t._key, properties: KEEP(t.properties, @names)}")
+
+
+class OnConflict(str, Enum):
+    """
+    What a bulk creation does with the items that already exist.
+    """
+
+    ERROR = 'error'
+    """ The item fails with the conflict error. """
+
+    SKIP = 'skip'
+    """ The item is skipped, and the existing resource is left unchanged. """
+
+    UPDATE = 'update'
+    """ The existing resource is replaced with the item. """
+
+
+class BulkStatus(str, Enum):
+    """
+    Outcome of an item of a bulk operation.
+    """
+
+    CREATED = 'created'
+    UPDATED = 'updated'
+    SKIPPED = 'skipped'
+    FAILED = 'failed'
+
+
+@dataclass
+class BulkItemResult:
+    """
+    Result of an item of a bulk operation.
+    """
+    __slots__ = ('index', 'request', 'status', 'result', 'error', 'attempts')
+
+    index: int
+    """ Position of the item in the input iterable. """
+    request: Any
+    """ The request payload of the item. """
+    status: BulkStatus
+    result: Any
+    """ The model returned by the API, if the item didn't fail. """
+    error: Optional[Union[models.ErrorResponse, Exception]]
+    """ The error response (or the exception) of the last attempt, if it failed. """
+    attempts: int
+    """ Number of requests made for the item. """
+
+    @property
+    def ok(self) -> bool:
+        return self.status != BulkStatus.FAILED
+
+
+class BulkProgress:
+    """
+    Progress of a bulk operation, updated as its items complete.
+    """
+
+    __slots__ = ('completed', 'failed', 'retries', 'started')
+
+    def __init__(self):
+        self.completed = 0
+        """ Number of items completed, including the failed ones. """
+        self.failed = 0
+        """ Number of items that failed. """
+        self.retries = 0
+        """ Number of requests retried. """
+        self.started = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        """ Seconds since the operation started. """
+        return time.monotonic() - self.started
+
+    @property
+    def throughput(self) -> float:
+        """ Items completed per second. """
+        elapsed = self.elapsed
+        return self.completed / elapsed if elapsed > 0 else 0.0
+
+    def __repr__(self):
+        return (f"BulkProgress(completed={self.completed}, failed={self.failed}, "
+                f"retries={self.retries}, throughput={self.throughput:.1f}/s)")
+
+    def _add(self, result: BulkItemResult):
+        self.completed += 1
+        self.retries += result.attempts - 1
+        if not result.ok:
+            self.failed += 1
+
+
+class _BulkMethods:
+    """
+    This class implements the bulk read methods of a Space, which read many
+    Things with a few query cursors instead of one request per Thing.
+    """
+
+    __slots__ = ()
+
+    def bulk_things(self, thing_ids: Iterable[str], fields: List[str] = None,
+                    chunk_size: int = 1000, max_workers: int = 4) -> Iterator[models.Thing]:
+        """
+        Returns the Things with the given IDs, using query cursors.
+
+        The IDs are split into chunks of `chunk_size` IDs, and each chunk is
+        read with a parameterised query whose results are streamed through a
+        cursor. Up to `max_workers` chunks are read at the same time. Things
+        that don't exist are skipped, and the order of the results is not
+        guaranteed to be the order of the IDs.
+
+        :param thing_ids: The IDs of the Things. It can be a generator.
+        :param fields: (optional) The attributes of the Things to return (the
+            `uid` is always returned). By default, all the attributes. The
+            Property values are read with :meth:`bulk_properties`.
+        :param chunk_size: (optional) Maximum number of IDs per query.
+        :param max_workers: (optional) Maximum number of queries run at the
+            same time.
+        :return: An iterator of the Things, without their Property values.
+        :rtype: Iterator[models.Thing]
+        """
+        if fields:
+            query, bind_vars = _THINGS_FIELDS_QUERY, {'fields': list(fields)}
+        else:
+            query, bind_vars = _THINGS_QUERY, {}
+
+        for doc in self._bulk_query(query, bind_vars, thing_ids, chunk_size, max_workers):
+            yield models.Thing.parse_obj(doc)
+
+    def bulk_properties(self, thing_ids: Iterable[str], names: List[str] = None,
+                        chunk_size: int = 1000,
+                        max_workers: int = 4) -> Iterator[Tuple[str, models.Properties]]:
+        """
+        Returns the Property values of the Things with the given IDs, using
+        query cursors.
+
+        See :meth:`bulk_things` for how the Things are read.
+
+        .. code-block:: python
+
+            for thing_id, properties in space.bulk_properties(thing_ids, names=["temperature"]):
+                print(thing_id, properties["temperature"])
+
+        :param thing_ids: The IDs of the Things. It can be a generator.
+        :param names: (optional) The names of the Properties to return. By
+            default, all the Properties.
+        :param chunk_size: (optional) Maximum number of IDs per query.
+        :param max_workers: (optional) Maximum number of queries run at the
+            same time.
+        :return: An iterator of tuples with the ID of each Thing and its
+            Property values, as returned by `things(thing_id).properties().get()`.
+        :rtype: Iterator[Tuple[str, models.Properties]]
+        """
+        if names is not None:
+            query, bind_vars = _PROPERTIES_NAMES_QUERY, {'names': list(names)}
+        else:
+            query, bind_vars = _PROPERTIES_QUERY, {}
+
+        for doc in self._bulk_query(query, bind_vars, thing_ids, chunk_size, max_workers):
+            yield doc['uid'], models.Properties.parse_obj(doc['properties'] or {})
+
+    def _bulk_query(self, query: str, bind_vars: dict, thing_ids: Iterable[str],
+                    chunk_size: int, max_workers: int) -> Iterator:
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be greater than 0")
+
+        cursor = self.query().cursor()
+        streams = (cursor.stream(query, {**bind_vars, 'ids': ids}, batch_size=chunk_size)
+                   for ids in _chunks(thing_ids, chunk_size))
+        return concurrent_chain(streams, max_workers=max_workers, buffer_size=chunk_size)
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[list]:
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _run_bulk(call: Callable[[Any], Tuple[BulkStatus, Any]], items: Iterable,
+              max_concurrency: int, max_retries: int, retry_backoff: float,
+              progress: Callable[[BulkProgress], None] = None) -> Iterator[BulkItemResult]:
+    """
+    Runs `call` with every item in a thread pool, and yields the result of
+    each item as it completes. Items that fail with a retryable error are
+    retried with exponential backoff; other errors fail only their item.
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be greater than 0")
+
+    def run(indexed_item) -> BulkItemResult:
+        index, item = indexed_item
+        delay = retry_backoff
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                status, result = call(item)
+                return BulkItemResult(index, item, status, result, None, attempt)
+            except Exception as e:
+                if attempt > max_retries or not is_retryable(e):
+                    return BulkItemResult(index, item, BulkStatus.FAILED, None, _item_error(e), attempt)
+            time.sleep(delay)
+            delay *= 2
+
+    stats = BulkProgress()
+    for result in map_unordered(run, enumerate(items), max_workers=max_concurrency):
+        stats._add(result)
+        if progress is not None:
+            progress(stats)
+        yield result
+
+
+def _patch_many(things, items: Iterable, max_items: int, max_bytes: int, max_concurrency: int,
+                max_retries: int, retry_backoff: float, **kwargs) -> things_patch.ThingsPatchMultiStatus:
+    """
+    Implements :meth:`~iots.apis.things.Things2.patch_many`.
+    """
+    if max_items < 1:
+        raise ValueError("max_items must be greater than 0")
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be greater than 0")
+
+    # Each item is serialised once, to measure it and to send it in every try
+    serialized = [data if isinstance(data, str) else bytes(data).decode('utf-8')
+                  for data in map(to_json, items)]
+    results: List[Optional[models.Results]] = [None] * len(serialized)
+
+    def send(chunk: List[int]) -> Tuple[List[int], List[models.Results]]:
+        body = RawBody('[' + ','.join(serialized[i] for i in chunk) + ']', 'application/json-patch+json')
+        try:
+            resp = check_response(things.patch(body, **kwargs), "Things not patched")
+        except Exception as e:
+            return chunk, [_error_result(e)] * len(chunk)
+        return chunk, _chunk_results(resp, len(chunk))
+
+    pending = list(range(len(serialized)))
+    delay = retry_backoff
+    for attempt in range(max_retries + 1):
+        retry = []
+        chunks = _patch_chunks(pending, serialized, max_items, max_bytes)
+        for chunk, chunk_results in map_unordered(send, chunks, max_workers=max_concurrency):
+            for index, result in zip(chunk, chunk_results):
+                results[index] = result
+                if _retryable_result(result):
+                    retry.append(index)
+
+        if not retry or attempt == max_retries:
+            break
+        time.sleep(delay)
+        delay *= 2
+        pending = sorted(retry)
+
+    return things_patch.ThingsPatchMultiStatus(
+        has_errors=[i for i, result in enumerate(results) if _failed_result(result)],
+        results=results,
+    )
+
+
+def _patch_chunks(indexes: List[int], serialized: List[str], max_items: int,
+                  max_bytes: int) -> Iterator[List[int]]:
+    """
+    Splits the items with the given indexes into chunks of up to `max_items`
+    items and `max_bytes` bytes, once encoded as a JSON array. Items larger
+    than `max_bytes` are sent alone.
+    """
+    chunk, size = [], 1
+    for index in indexes:
+        item_size = len(serialized[index].encode('utf-8')) + 1
+        if chunk and (len(chunk) == max_items or size + item_size > max_bytes):
+            yield chunk
+            chunk, size = [], 1
+        chunk.append(index)
+        size += item_size
+    if chunk:
+        yield chunk
+
+
+def _chunk_results(resp: things_patch.ThingsPatchMultiStatus, count: int) -> List[models.Results]:
+    """
+    Returns the result of each item of a multi-status response.
+    """
+    results = list(resp.results or [])[:count]
+    errors = set(resp.has_errors or [])
+    # Items without a result are only known to have failed or not
+    results.extend(models.Results(status=None if i in errors else 200)
+                   for i in range(len(results), count))
+    return results
+
+
+def _error_result(error: Exception) -> models.Results:
+    """
+    Returns the result of the items of a chunk that failed as a whole.
+    """
+    status = error_status_code(error) if isinstance(error, ResponseError) else None
+    error_response = _item_error(error)
+    if isinstance(error_response, models.ErrorResponse):
+        response = error_response.dict(exclude_none=True)
+    else:
+        response = {'error': {'message': str(error)}}
+    return models.Results(response=response, status=status)
+
+
+def _failed_result(result: models.Results) -> bool:
+    return result.status is None or result.status >= 400
+
+
+def _retryable_result(result: models.Results) -> bool:
+    # Items without a status failed with an unknown error (e.g. a timeout)
+    return result.status is None or result.status == 429 or result.status >= 500
+
+
+def _thing_uid(thing) -> Optional[str]:
+    """
+    Returns the `uid` of a Thing given as a dict or as a model with that
+    field (:class:`~iots.models.models.ThingCreate` has none).
+    """
+    if isinstance(thing, dict):
+        return thing.get('uid')
+    if 'uid' in getattr(type(thing), '__fields__', {}):
+        return thing.uid
+    return None
+
+
+def _item_error(error: Exception) -> Union[models.ErrorResponse, Exception]:
+    if isinstance(error, ResponseError):
+        error_response = getattr(error, 'error', None)
+        if isinstance(error_response, models.ErrorResponse):
+            return error_response
+    return error
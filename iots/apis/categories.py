@@ -9,6 +9,7 @@ from .things import _ThingsMethods
 
 @dataclass
 class Categories1(APIResource, _ThingsMethods):
+    __slots__ = ('category_name',)
     category_name: str
 
     def get(self, **kwargs) -> Union[models.Category, models.ErrorResponse]:
@@ -80,6 +81,7 @@ class Categories1(APIResource, _ThingsMethods):
 
 @dataclass
 class Categories2(APIResource):
+    __slots__ = ()
 
     def create(self, req: models.CategoryCreate, **kwargs) -> Union[models.Category, models.ErrorResponse]:
         """
@@ -149,6 +151,8 @@ class _CategoriesMethods:
     This class declares and implements the `categories()` method.
     """
 
+    __slots__ = ()
+
     @overload
     def categories(self, category_name: str) -> Categories1:
         ...
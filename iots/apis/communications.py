@@ -7,6 +7,7 @@ from .email import _EmailMethods
 
 @dataclass
 class Communications1(APIResource, _EmailMethods):
+    __slots__ = ()
 
     def _build_partial_path(self):
         return "/communications"
@@ -17,6 +18,8 @@ class _CommunicationsMethods:
     This class declares and implements the `communications()` method.
     """
 
+    __slots__ = ()
+
     @overload
     def communications(self) -> Communications1:
         ...
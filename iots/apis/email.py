@@ -7,6 +7,7 @@ from ..models import models, primitives
 
 @dataclass
 class Email1(APIResource):
+    __slots__ = ()
 
     def send(self, req: Union[models.Email, dict], **kwargs) -> primitives.NoResponse:
         """
@@ -42,6 +43,8 @@ class _EmailMethods:
     This class declares and implements the `email()` method.
     """
 
+    __slots__ = ()
+
     @overload
     def email(self) -> Email1:
         ...
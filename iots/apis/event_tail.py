@@ -0,0 +1,233 @@
+import heapq
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+
+from ..internal.concurrency import DEFAULT_MAX_WORKERS, map_unordered, new_executor
+from ..internal.response import check_response
+from ..models import models
+from ..models.exceptions import ResponseError
+
+MAX_STORED_EVENTS = 100
+""" Maximum number of Event resources stored by the API for each Event. """
+
+
+class EventTail:
+    """
+    Polls the Events of many Things and yields the new ones, as pairs with the
+    ID of the Thing and the :class:`~iots.models.models.EventResponse`.
+
+    Each Thing has a cursor: the ID of the last Event yielded. Event IDs are
+    ULIDs, so the Events created after the cursor are the ones with greater
+    IDs. A Thing without a cursor starts with the Events created after its
+    first poll.
+
+    The Things are polled on a shared thread pool, with up to `max_workers`
+    requests at the same time, so many Things don't need many threads. Each
+    Thing is polled every `poll_interval` seconds while it has new Events,
+    and the interval doubles, up to `max_poll_interval`, every time a poll
+    finds none (or fails).
+
+    The iteration doesn't end until the tail is closed. :attr:`cursors` can
+    be saved to resume the tail later.
+    """
+
+    def __init__(self, sources: Dict[str, object], cursors: Dict[str, Optional[str]] = None,
+                 poll_interval: float = 1.0, max_poll_interval: float = 30.0,
+                 max_workers: int = DEFAULT_MAX_WORKERS):
+        """
+        Creates a new tail. Use :meth:`iots.apis.events.Events3.tail` or
+        :meth:`_EventTailMethods.tail_events` instead.
+
+        :param sources: The `events()` resource of each Thing, by Thing ID.
+        :param cursors: (optional) The cursor of each Thing, by Thing ID.
+        :param poll_interval: (optional) Minimum number of seconds between the
+            polls of each Thing.
+        :param max_poll_interval: (optional) Maximum number of seconds between
+            the polls of each Thing.
+        :param max_workers: (optional) Maximum number of polls made at the
+            same time.
+        """
+        self.sources = sources
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.max_workers = max_workers
+
+        self.cursors: Dict[str, Optional[str]] = {thing_id: (cursors or {}).get(thing_id)
+                                                  for thing_id in sources}
+        """ ID of the last Event yielded for each Thing. """
+        self.errors: Dict[str, Exception] = {}
+        """ Error of the last poll of each Thing, if it failed. """
+
+        self._intervals = {thing_id: poll_interval for thing_id in sources}
+        self._stop = threading.Event()
+        # Every polling round runs on the same threads
+        self._executor = new_executor(max_workers)
+
+    def __iter__(self) -> Iterator[Tuple[str, models.EventResponse]]:
+        try:
+            yield from self._tail()
+        except RuntimeError:
+            # The thread pool was shut down by close() during a round
+            if not self._stop.is_set():
+                raise
+        finally:
+            self._executor.shutdown(wait=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """
+        Stops the tail and its threads. It can be called from another thread.
+        """
+        self._stop.set()
+        self._executor.shutdown(wait=False)
+
+    def _tail(self) -> Iterator[Tuple[str, models.EventResponse]]:
+        now = time.monotonic()
+        schedule = [(now, thing_id) for thing_id in self.sources]
+        heapq.heapify(schedule)
+
+        while schedule and not self._stop.is_set():
+            wait = schedule[0][0] - time.monotonic()
+            if wait > 0:
+                self._stop.wait(wait)
+                continue
+
+            due = []
+            now = time.monotonic()
+            while schedule and schedule[0][0] <= now:
+                due.append(heapq.heappop(schedule)[1])
+
+            for thing_id, events in map_unordered(self._poll, due, max_workers=self.max_workers,
+                                                  executor=self._executor):
+                heapq.heappush(schedule, (time.monotonic() + self._next_interval(thing_id, events),
+                                          thing_id))
+                if events is None:
+                    continue
+
+                if self.cursors[thing_id] is None:
+                    # First poll without a cursor: only later Events are new
+                    self.cursors[thing_id] = _event_id(events[-1]) if events else ''
+                    continue
+
+                for event in events:
+                    self.cursors[thing_id] = _event_id(event)
+                    yield thing_id, event
+                    if self._stop.is_set():
+                        return
+
+    def _poll(self, thing_id: str) -> Tuple[str, Optional[List[models.EventResponse]]]:
+        """
+        Returns the Events of a Thing created after its cursor, sorted by ID,
+        or None if the poll failed.
+        """
+        try:
+            resp = self.sources[thing_id].get(params={'limit': MAX_STORED_EVENTS})
+            events = list(check_response(resp, "Events not listed"))
+        except (ResponseError, requests.RequestException) as e:
+            self.errors[thing_id] = e
+            return thing_id, None
+
+        self.errors.pop(thing_id, None)
+        cursor = self.cursors[thing_id] or ''
+        return thing_id, sorted((event for event in events if _event_id(event) > cursor), key=_event_id)
+
+    def _next_interval(self, thing_id: str, events: Optional[list]) -> float:
+        if events:
+            interval = self.poll_interval
+        else:
+            interval = min(self._intervals[thing_id] * 2, self.max_poll_interval)
+        self._intervals[thing_id] = interval
+        return interval
+
+
+class ThingEventTail(EventTail):
+    """
+    Polls the Events of a Thing and yields the new ones. See
+    :class:`EventTail`.
+    """
+
+    def __init__(self, events, cursor: str = None, poll_interval: float = 1.0,
+                 max_poll_interval: float = 30.0):
+        """
+        Creates a new tail. Use :meth:`iots.apis.events.Events3.tail` instead.
+
+        :param events: The `events()` resource of the Thing.
+        :param cursor: (optional) ID of the last Event seen.
+        :param poll_interval: (optional) Minimum number of seconds between
+            polls.
+        :param max_poll_interval: (optional) Maximum number of seconds between
+            polls.
+        """
+        super().__init__({'': events}, {'': cursor}, poll_interval, max_poll_interval, max_workers=1)
+
+    @property
+    def cursor(self) -> Optional[str]:
+        """ ID of the last Event yielded. """
+        return self.cursors['']
+
+    def __iter__(self) -> Iterator[models.EventResponse]:
+        for _, event in super().__iter__():
+            yield event
+
+
+class _EventTailMethods:
+    """
+    This class implements the methods of a Space that tail the Events of many
+    Things.
+    """
+
+    __slots__ = ()
+
+    def tail_events(self, thing_ids: Iterable[str], event_name: str = None,
+                    cursors: Dict[str, str] = None, poll_interval: float = 1.0,
+                    max_poll_interval: float = 30.0,
+                    max_workers: int = DEFAULT_MAX_WORKERS) -> EventTail:
+        """
+        Returns a tail that yields the new Events of many Things, polling them
+        on a shared thread pool.
+
+        .. code-block:: python
+
+            with space.tail_events(thing_ids, cursors=saved_cursors) as tail:
+                for thing_id, event in tail:
+                    print(thing_id, event)
+                    saved_cursors = tail.cursors
+
+        :param thing_ids: The IDs of the Things.
+        :param event_name: (optional) The name of the Event. By default, all
+            the Events of the Things.
+        :param cursors: (optional) ID of the last Event seen of each Thing, to
+            resume a previous tail. Things without a cursor start with the
+            Events created from now on.
+        :param poll_interval: (optional) Minimum number of seconds between the
+            polls of each Thing.
+        :param max_poll_interval: (optional) Maximum number of seconds between
+            the polls of each Thing.
+        :param max_workers: (optional) Maximum number of polls made at the
+            same time.
+        :return: The tail.
+        :rtype: EventTail
+        """
+        if event_name is None:
+            sources = {thing_id: self.things(thing_id).events() for thing_id in thing_ids}
+        else:
+            sources = {thing_id: self.things(thing_id).events(event_name) for thing_id in thing_ids}
+        return EventTail(sources, cursors, poll_interval, max_poll_interval, max_workers)
+
+
+def _event_id(event: models.EventResponse) -> str:
+    """
+    Returns the ID of an Event resource, taken from its `href`.
+    """
+    for value in event.__root__.values():
+        if value.href:
+            return value.href.rsplit('/', 1)[-1]
+    return ''
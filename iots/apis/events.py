@@ -1,13 +1,16 @@
 from dataclasses import dataclass
 from typing import Union, overload
 
+from ..internal.prepared import PreparedOperation
 from ..internal.resource import APIResource
 from ..models import models, primitives
 from ..models.extensions.pagination import PaginationDescription
+from .event_tail import ThingEventTail
 
 
 @dataclass
 class Events1(APIResource):
+    __slots__ = ('event_name', 'event_id')
     event_name: str
     event_id: str
 
@@ -50,6 +53,7 @@ class Events1(APIResource):
 
 @dataclass
 class Events2(APIResource):
+    __slots__ = ('event_name',)
     event_name: str
 
     def create(self, req: Union[models.EventCreateRequest, dict], **kwargs) -> Union[models.EventResponse, models.ErrorResponse]:
@@ -80,6 +84,29 @@ class Events2(APIResource):
             (500, "application/json", models.ErrorResponse),
         ])
 
+    def prepare_create(self, **kwargs) -> PreparedOperation:
+        """
+        Prepares the operation to create new Event resources for the given
+        Thing's Event, to be called repeatedly with different payloads. The
+        returned operation takes the same payload and returns the same response
+        as :meth:`create`.
+
+        :return: The prepared operation.
+        :rtype: PreparedOperation
+        """
+        req_content_types = [
+            ("application/json", models.EventCreateRequest),
+        ]
+
+        return PreparedOperation(self, "POST", req_content_types, [
+            (201, "application/json", models.EventResponse),
+            (400, "application/json", models.ErrorResponse),
+            (401, "application/json", models.ErrorResponse),
+            (403, "application/json", models.ErrorResponse),
+            (404, "application/json", models.ErrorResponse),
+            (500, "application/json", models.ErrorResponse),
+        ], **kwargs)
+
     def get(self, **kwargs) -> Union[models.EventListResponse, models.ErrorResponse]:
         """
         Returns the list of Event resources of the given Thing's Event.
@@ -115,12 +142,42 @@ class Events2(APIResource):
             (500, "application/json", models.ErrorResponse),
         ], pagination_info=pagination_info, param_types=param_types)
 
+    def tail(self, since_cursor: str = None, poll_interval: float = 1.0,
+             max_poll_interval: float = 30.0) -> ThingEventTail:
+        """
+        Returns a tail that polls the Event resources of the given Thing's
+        Event and yields only the new ones, oldest first.
+
+        The polling interval starts at `poll_interval` seconds and doubles, up
+        to `max_poll_interval`, while no new Events are found. The iteration
+        doesn't end until the tail is closed.
+
+        .. code-block:: python
+
+            with space.things(thing_id).events("highCPU").tail(since_cursor=last_seen) as tail:
+                for event in tail:
+                    print(event)
+                    last_seen = tail.cursor
+
+        :param since_cursor: (optional) ID of the last Event seen (its `href`
+            ends with it). By default, only the Events created from now on
+            are yielded.
+        :param poll_interval: (optional) Minimum number of seconds between
+            polls.
+        :param max_poll_interval: (optional) Maximum number of seconds between
+            polls.
+        :return: The tail.
+        :rtype: ThingEventTail
+        """
+        return ThingEventTail(self, since_cursor, poll_interval, max_poll_interval)
+
     def _build_partial_path(self):
         return f"/events/{self.event_name}"
 
 
 @dataclass
 class Events3(APIResource):
+    __slots__ = ()
 
     def get(self, **kwargs) -> Union[models.EventListResponse, models.ErrorResponse]:
         """
@@ -157,6 +214,35 @@ class Events3(APIResource):
             (500, "application/json", models.ErrorResponse),
         ], pagination_info=pagination_info, param_types=param_types)
 
+    def tail(self, since_cursor: str = None, poll_interval: float = 1.0,
+             max_poll_interval: float = 30.0) -> ThingEventTail:
+        """
+        Returns a tail that polls the Event resources of the given Thing and
+        yields only the new ones, oldest first.
+
+        The polling interval starts at `poll_interval` seconds and doubles, up
+        to `max_poll_interval`, while no new Events are found. The iteration
+        doesn't end until the tail is closed.
+
+        .. code-block:: python
+
+            with space.things(thing_id).events().tail(since_cursor=last_seen) as tail:
+                for event in tail:
+                    print(event)
+                    last_seen = tail.cursor
+
+        :param since_cursor: (optional) ID of the last Event seen (its `href`
+            ends with it). By default, only the Events created from now on
+            are yielded.
+        :param poll_interval: (optional) Minimum number of seconds between
+            polls.
+        :param max_poll_interval: (optional) Maximum number of seconds between
+            polls.
+        :return: The tail.
+        :rtype: ThingEventTail
+        """
+        return ThingEventTail(self, since_cursor, poll_interval, max_poll_interval)
+
     def _build_partial_path(self):
         return "/events"
 
@@ -166,6 +252,8 @@ class _EventsMethods:
     This class declares and implements the `events()` method.
     """
 
+    __slots__ = ()
+
     @overload
     def events(self, event_name: str, event_id: str) -> Events1:
         ...
@@ -0,0 +1,242 @@
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+import requests
+
+from ..internal.concurrency import DEFAULT_MAX_WORKERS, map_unordered, new_executor
+from ..internal.response import check_response
+from ..models import models
+from ..models.exceptions import ResponseError
+from .bulk import BulkStatus, _run_bulk
+
+DEFAULT_PENDING_STATUSES = ('pending', 'received', 'running')
+""" Statuses of the Actions that haven't finished yet. """
+
+
+class FleetActionSummary:
+    """
+    Aggregated status of an Action dispatched to many Things.
+
+    The same summary is yielded by :meth:`_FleetMethods.dispatch_action` every
+    time it changes, updated in place.
+    """
+
+    __slots__ = ('action_name', 'pending_statuses', 'actions', 'errors', 'dispatching', 'timed_out',
+                 'polls', 'started')
+
+    def __init__(self, action_name: str, pending_statuses: Tuple[str, ...] = DEFAULT_PENDING_STATUSES):
+        self.action_name = action_name
+        self.pending_statuses = pending_statuses
+        self.actions: Dict[str, models.ActionValue] = {}
+        """ Last known value of the Action resource created in each Thing. """
+        self.errors: Dict[str, Union[models.ErrorResponse, Exception]] = {}
+        """ Things where the Action couldn't be created, with the error. """
+        self.dispatching = True
+        """ Whether Actions are still being created. """
+        self.timed_out = False
+        """ Whether the polling stopped before all the Actions finished. """
+        self.polls = 0
+        """ Number of polling rounds. """
+        self.started = time.monotonic()
+
+    @property
+    def statuses(self) -> Dict[str, int]:
+        """ Number of Actions with each status. """
+        return dict(Counter(action.status for action in self.actions.values()))
+
+    @property
+    def dispatched(self) -> int:
+        """ Number of Things where the Action was created. """
+        return len(self.actions)
+
+    @property
+    def pending(self) -> int:
+        """ Number of Actions that haven't finished yet. """
+        return sum(1 for _ in self._pending_actions())
+
+    @property
+    def done(self) -> bool:
+        """ Whether all the Actions were created and have finished. """
+        return not self.dispatching and self.pending == 0
+
+    @property
+    def elapsed(self) -> float:
+        """ Seconds since the dispatch started. """
+        return time.monotonic() - self.started
+
+    def __repr__(self):
+        return (f"FleetActionSummary({self.action_name!r}, dispatched={self.dispatched}, "
+                f"errors={len(self.errors)}, statuses={self.statuses})")
+
+    def _pending_actions(self) -> Iterator[Tuple[str, models.ActionValue]]:
+        return ((thing_id, action) for thing_id, action in self.actions.items()
+                if action.status in self.pending_statuses)
+
+
+class _FleetMethods:
+    """
+    This class implements the methods of a Space that send an Action to a
+    fleet of Things.
+    """
+
+    __slots__ = ()
+
+    def dispatch_action(self, action_name: str, input: Any = None, thing_ids: Iterable[str] = None,
+                        category: str = None, filters: Dict[str, Any] = None,
+                        max_concurrency: int = DEFAULT_MAX_WORKERS, max_retries: int = 0,
+                        retry_backoff: float = 0.5, poll_interval: float = 1.0,
+                        max_poll_interval: float = 30.0, timeout: float = None,
+                        pending_statuses: Iterable[str] = DEFAULT_PENDING_STATUSES
+                        ) -> Iterator[FleetActionSummary]:
+        """
+        Creates an Action in many Things and follows its status until all the
+        Actions have finished, yielding an aggregated summary as it changes.
+
+        The Things are given by their IDs, by a Category or by the query
+        parameters of `things().get()`, and they are read lazily. The Actions
+        are created with up to `max_concurrency` requests at the same time.
+        Then, the Actions that are still pending are polled by reading each
+        of them by its ID (`things(thing_id).actions(action_name, action_id).get()`).
+        The polling interval starts at `poll_interval` seconds and doubles, up to
+        `max_poll_interval`, while no Action changes its status.
+
+        .. code-block:: python
+
+            for summary in space.dispatch_action("updateFirmware", {"version": "2.0.1"},
+                                                 category="Sensors", timeout=3600):
+                print(summary.statuses, f"{len(summary.errors)} errors")
+
+        :param action_name: The name of the Action.
+        :param input: (optional) The input of the Action.
+        :param thing_ids: (optional) The IDs of the Things.
+        :param category: (optional) The name of a Category, to create the
+            Action in all its Things.
+        :param filters: (optional) Query parameters of `things().get()`, to
+            create the Action in the Things that match them.
+        :param max_concurrency: (optional) Maximum number of requests made at
+            the same time.
+        :param max_retries: (optional) Number of times the creation of an
+            Action is retried after a connection error, a 429 or a 5xx
+            response. Creating an Action isn't idempotent, so it's not
+            retried by default.
+        :param retry_backoff: (optional) Seconds to wait before the first
+            retry. The wait is doubled after every retry.
+        :param poll_interval: (optional) Minimum number of seconds between
+            polling rounds.
+        :param max_poll_interval: (optional) Maximum number of seconds between
+            polling rounds.
+        :param timeout: (optional) Maximum number of seconds to wait for the
+            Actions to finish. By default, it waits until all of them finish.
+        :param pending_statuses: (optional) Statuses of the Actions that
+            haven't finished yet.
+        :return: An iterator of the summary, yielded after some Actions are
+            created or change their status.
+        :rtype: Iterator[FleetActionSummary]
+        """
+        if sum(target is not None for target in (thing_ids, category, filters)) != 1:
+            raise ValueError("One of thing_ids, category or filters must be given")
+
+        return self._dispatch_action(action_name, input, self._fleet_things(thing_ids, category, filters),
+                                     max_concurrency, max_retries, retry_backoff, poll_interval,
+                                     max_poll_interval, timeout, tuple(pending_statuses))
+
+    def _fleet_things(self, thing_ids: Optional[Iterable[str]], category: Optional[str],
+                      filters: Optional[Dict[str, Any]]) -> Iterator[str]:
+        if thing_ids is not None:
+            yield from thing_ids
+            return
+
+        # The Things are listed when the first Action is created
+        if category is not None:
+            things = self.categories(category).things().get()
+        else:
+            things = self.things().get(params=filters)
+        for thing in check_response(things, "Things not listed"):
+            yield thing.uid
+
+    def _dispatch_action(self, action_name: str, input: Any, thing_ids: Iterable[str],
+                         max_concurrency: int, max_retries: int, retry_backoff: float,
+                         poll_interval: float, max_poll_interval: float, timeout: Optional[float],
+                         pending_statuses: Tuple[str, ...]) -> Iterator[FleetActionSummary]:
+        summary = FleetActionSummary(action_name, pending_statuses)
+        req = {action_name: {'input': input} if input is not None else {}}
+
+        def create(thing_id: str) -> Tuple[BulkStatus, models.ActionValue]:
+            resp = self.things(thing_id).actions(action_name).create(req)
+            return BulkStatus.CREATED, check_response(resp, "Action not created")[action_name]
+
+        last_yield = time.monotonic()
+        for result in _run_bulk(create, thing_ids, max_concurrency, max_retries, retry_backoff):
+            if result.ok:
+                summary.actions[result.request] = result.result
+            else:
+                summary.errors[result.request] = result.error
+            if time.monotonic() - last_yield >= poll_interval:
+                last_yield = time.monotonic()
+                yield summary
+
+        summary.dispatching = False
+        yield summary
+
+        deadline = summary.started + timeout if timeout is not None else None
+        # Every polling round runs on the same threads
+        executor = new_executor(max_concurrency)
+        try:
+            yield from self._poll_actions(summary, action_name, executor, max_concurrency, poll_interval,
+                                          max_poll_interval, deadline)
+        finally:
+            executor.shutdown(wait=False)
+
+    def _poll_actions(self, summary: FleetActionSummary, action_name: str,
+                      executor: ThreadPoolExecutor, max_concurrency: int,
+                      poll_interval: float, max_poll_interval: float, deadline: Optional[float]
+                      ) -> Iterator[FleetActionSummary]:
+        interval = poll_interval
+        while True:
+            pending = list(summary._pending_actions())
+            if not pending:
+                return
+
+            wait = interval
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    summary.timed_out = True
+                    yield summary
+                    return
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+            summary.polls += 1
+            changed = False
+            for thing_id, action in map_unordered(self._poll_action(action_name), pending,
+                                                  max_workers=max_concurrency, executor=executor):
+                if action is not None and action.status != summary.actions[thing_id].status:
+                    summary.actions[thing_id] = action
+                    changed = True
+
+            # Poll less often while the Actions don't progress
+            interval = poll_interval if changed else min(interval * 2, max_poll_interval)
+            if changed:
+                yield summary
+
+    def _poll_action(self, action_name: str):
+        def poll(pending_action: Tuple[str, models.ActionValue]) -> Tuple[str, Optional[models.ActionValue]]:
+            thing_id, action = pending_action
+            if not action.href:
+                return thing_id, None
+            # Only the dispatched Action is read, instead of the Action history of the Thing
+            action_id = action.href.rstrip('/').rsplit('/', 1)[-1]
+            try:
+                resp = self.things(thing_id).actions(action_name, action_id).get()
+                value = check_response(resp, "Action not read")
+                if action_name in value:
+                    return thing_id, value[action_name]
+            except (ResponseError, requests.RequestException):
+                # The Action is polled again in the next round
+                pass
+            return thing_id, None
+
+        return poll
@@ -2,12 +2,15 @@ import json
 from dataclasses import dataclass
 from typing import Union, overload
 
+from ..body import RawBody
+from ..internal.prepared import PreparedOperation
 from ..internal.resource import APIResource
 from ..models import models
 
 
 @dataclass
 class Properties1(APIResource):
+    __slots__ = ('property',)
     property: str
 
     def update(self, value, **kwargs) -> Union[models.Properties, models.ErrorResponse]:
@@ -23,7 +26,8 @@ class Properties1(APIResource):
         :return: The API response to the request.
         :rtype: Union[models.Properties, models.ErrorResponse]
         """
-        req = "{\"" + str(self._path_value('property')) + "\": " + json.dumps(value) + "}"
+        # The body is built here, so it doesn't need to be validated again
+        req = RawBody(_property_body_prefix(self._path_value('property')) + json.dumps(value) + "}")
 
         req_content_types = [
             ("application/json", models.Property),
@@ -39,6 +43,31 @@ class Properties1(APIResource):
             (500, "application/json", models.ErrorResponse),
         ])
 
+    def prepare_update(self, **kwargs) -> PreparedOperation:
+        """
+        Prepares the operation to update the value of a Thing Property, to be
+        called repeatedly with different values. The returned operation takes
+        the new value of the Property, and returns the same response as
+        :meth:`update`.
+
+        :return: The prepared operation.
+        :rtype: PreparedOperation
+        """
+        prefix = _property_body_prefix(self._path_value('property'))
+
+        req_content_types = [
+            ("application/json", models.Property),
+        ]
+
+        return PreparedOperation(self, "PUT", req_content_types, [
+            (200, "application/json", models.Properties),
+            (400, "application/json", models.ErrorResponse),
+            (401, "application/json", models.ErrorResponse),
+            (403, "application/json", models.ErrorResponse),
+            (404, "application/json", models.ErrorResponse),
+            (500, "application/json", models.ErrorResponse),
+        ], serializer=lambda value: prefix + json.dumps(value) + "}", **kwargs)
+
     def get(self, **kwargs) -> Union[models.Property, models.ErrorResponse]:
         """
         Returns the value of a Thing Property.
@@ -60,8 +89,17 @@ class Properties1(APIResource):
         return f"/properties/{self.property}"
 
 
+def _property_body_prefix(name) -> str:
+    """
+    Returns the start of the JSON body that updates a Property, up to its
+    value, with the name escaped.
+    """
+    return "{" + json.dumps(str(name)) + ": "
+
+
 @dataclass
 class Properties2(APIResource):
+    __slots__ = ()
 
     def update(self, req: Union[models.Properties, dict], **kwargs) -> Union[models.Properties, models.ErrorResponse]:
         """
@@ -91,6 +129,29 @@ class Properties2(APIResource):
             (500, "application/json", models.ErrorResponse),
         ])
 
+    def prepare_update(self, **kwargs) -> PreparedOperation:
+        """
+        Prepares the operation to update the values of one or more Properties
+        of a Thing, to be called repeatedly with different payloads. The
+        returned operation takes the same payload and returns the same response
+        as :meth:`update`.
+
+        :return: The prepared operation.
+        :rtype: PreparedOperation
+        """
+        req_content_types = [
+            ("application/json", models.Properties),
+        ]
+
+        return PreparedOperation(self, "PUT", req_content_types, [
+            (200, "application/json", models.Properties),
+            (400, "application/json", models.ErrorResponse),
+            (401, "application/json", models.ErrorResponse),
+            (403, "application/json", models.ErrorResponse),
+            (404, "application/json", models.ErrorResponse),
+            (500, "application/json", models.ErrorResponse),
+        ], **kwargs)
+
     def get(self, **kwargs) -> Union[models.Properties, models.ErrorResponse]:
         """
         Returns all the Property values of a Thing.
@@ -117,6 +178,8 @@ class _PropertiesMethods:
     This class declares and implements the `properties()` method.
     """
 
+    __slots__ = ()
+
     @overload
     def properties(self, property: str) -> Properties1:
         ...
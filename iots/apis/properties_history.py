@@ -0,0 +1,372 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List, Tuple, Union, overload
+
+from pydantic.datetime_parse import parse_datetime
+
+from ..history_buffer import PropertyHistoryBuffer
+from ..internal.concurrency import DEFAULT_MAX_WORKERS, concurrent_chain
+from ..internal.resource import APIResource
+from ..models import models, primitives
+from ..models.exceptions import ResponseError
+from ..models.extensions.pagination import PaginationDescription
+from ..models.timestamps import format_timestamp, parse_timestamp
+
+
+@dataclass
+class PropertiesHistory1(APIResource):
+    __slots__ = ('property',)
+    property: str
+
+    def create(self, req: Union[models.CreatePropertyHistoryValuesRequest, models.PropertyHistoryValue,
+                                models.PropertyHistoryValues, dict, list],
+               **kwargs) -> Union[models.PropertyHistoryValues, models.ErrorResponse]:
+        """
+        Adds one or more historical values for the given Thing Property.
+
+        :param req: Request payload.
+        :type req: Union[models.CreatePropertyHistoryValuesRequest, models.PropertyHistoryValue, models.PropertyHistoryValues, dict, list]
+        :return: The API response to the request.
+        :rtype: Union[models.PropertyHistoryValues, models.ErrorResponse]
+        """
+        req_content_types = [
+            ("application/json", models.CreatePropertyHistoryValuesRequest),
+        ]
+
+        resp = self._make_request("POST", req, req_content_types=req_content_types, **kwargs)
+        return self._handle_response(resp, [
+            (201, "application/json", models.PropertyHistoryValues),
+            (400, "application/json", models.ErrorResponse),
+            (401, "application/json", models.ErrorResponse),
+            (403, "application/json", models.ErrorResponse),
+            (404, "application/json", models.ErrorResponse),
+            (409, "application/json", models.ErrorResponse),
+            (500, "application/json", models.ErrorResponse),
+        ])
+
+    def get(self, **kwargs) -> Union[models.PropertyHistoryValueList, models.ErrorResponse]:
+        """
+        Returns the list of historical values of the given Thing Property.
+
+        > 🚧 **Limitations:** A maximum of 1000 values will be returned
+        > per page (50 by default).
+
+        Query parameters:
+         - `at` _(str)_: Date and time, or date and time range (using the `|` separator), of the values.
+         - `next_cursor` _(str)_: Cursor used to get the next page of results.
+         - `previous_cursor` _(str)_: Cursor used to get the previous page of results.
+         - `limit` _(int)_: The numbers of items to return.
+
+        :return: The API response to the request.
+        :rtype: Union[models.PropertyHistoryValueList, models.ErrorResponse]
+        """
+        pagination_info = PaginationDescription.parse_obj({'reuse_previous_request': True, 'method': '', 'url': '', 'modifiers': [{'op': 'set', 'param': '$request.query.next_cursor', 'value': '$response.body#/paging/next_cursor'}], 'result': 'data', 'has_more': '$response.body#/paging/next_cursor'})
+
+        param_types = {
+            'query': {
+                'at': str,
+                'next_cursor': str,
+                'previous_cursor': str,
+                'limit': int,
+            },
+        }
+
+        resp = self._make_request("GET", **kwargs)
+        return self._handle_response(resp, [
+            (200, "application/json", models.PropertyHistoryValueList),
+            (400, "application/json", models.ErrorResponse),
+            (401, "application/json", models.ErrorResponse),
+            (403, "application/json", models.ErrorResponse),
+            (404, "application/json", models.ErrorResponse),
+            (500, "application/json", models.ErrorResponse),
+        ], pagination_info=pagination_info, param_types=param_types)
+
+    def delete(self, **kwargs) -> primitives.NoResponse:
+        """
+        Deletes historical values of a Thing Property.
+
+        > 📘 **Information:** To prevent accidental deletions, the operation
+        > will fail if no filters are provided.
+
+        Query parameters:
+         - `at` _(str)_: Date and time, or date and time range (using the `|` separator), of the values.
+
+        :return: The API response to the request.
+        :rtype: primitives.NoResponse
+        """
+        resp = self._make_request("DELETE", **kwargs)
+        return self._handle_response(resp, [
+            (204, "", primitives.NoResponse),
+            (400, "application/json", models.ErrorResponse),
+            (401, "application/json", models.ErrorResponse),
+            (403, "application/json", models.ErrorResponse),
+            (404, "application/json", models.ErrorResponse),
+            (500, "application/json", models.ErrorResponse),
+        ])
+
+    def download(self, start: Union[datetime, str], end: Union[datetime, str], shards: int = 8,
+                 max_workers: int = DEFAULT_MAX_WORKERS, limit: int = 1000,
+                 **kwargs) -> Iterator[models.PropertyHistoryValue]:
+        """
+        Returns the historical values of the given Thing Property in a time
+        range, downloading them concurrently.
+
+        See :meth:`PropertiesHistory2.download`.
+
+        :param start: Start date and time of the range.
+        :param end: End date and time of the range.
+        :param shards: (optional) Number of time ranges the range is split into.
+        :param max_workers: (optional) Maximum number of time ranges downloaded
+            at the same time.
+        :param limit: (optional) Number of values requested per page.
+        :return: An iterator of the values, from the most recent to the oldest.
+        :rtype: Iterator[models.PropertyHistoryValue]
+        """
+        return _download(self, start, end, shards, max_workers, limit, kwargs)
+
+    def buffer(self, **kwargs) -> PropertyHistoryBuffer:
+        """
+        Returns a write-behind buffer that creates the values added to it in
+        batches. The arguments are passed to :class:`~iots.history_buffer.PropertyHistoryBuffer`.
+
+        :return: The buffer.
+        :rtype: PropertyHistoryBuffer
+        """
+        return PropertyHistoryBuffer(self, **kwargs)
+
+    def _build_partial_path(self):
+        return f"/properties-history/{self.property}"
+
+
+@dataclass
+class PropertiesHistory2(APIResource):
+    __slots__ = ()
+
+    def create(self, req: Union[models.CreatePropertyHistoryValuesRequest, models.PropertyHistoryValue,
+                                models.PropertyHistoryValues, dict, list],
+               **kwargs) -> Union[models.PropertyHistoryValues, models.ErrorResponse]:
+        """
+        Adds historical values for one or more Properties of a Thing.
+
+        :param req: Request payload.
+        :type req: Union[models.CreatePropertyHistoryValuesRequest, models.PropertyHistoryValue, models.PropertyHistoryValues, dict, list]
+        :return: The API response to the request.
+        :rtype: Union[models.PropertyHistoryValues, models.ErrorResponse]
+        """
+        req_content_types = [
+            ("application/json", models.CreatePropertyHistoryValuesRequest),
+        ]
+
+        resp = self._make_request("POST", req, req_content_types=req_content_types, **kwargs)
+        return self._handle_response(resp, [
+            (201, "application/json", models.PropertyHistoryValues),
+            (400, "application/json", models.ErrorResponse),
+            (401, "application/json", models.ErrorResponse),
+            (403, "application/json", models.ErrorResponse),
+            (404, "application/json", models.ErrorResponse),
+            (409, "application/json", models.ErrorResponse),
+            (500, "application/json", models.ErrorResponse),
+        ])
+
+    def get(self, **kwargs) -> Union[models.PropertyHistoryValueList, models.ErrorResponse]:
+        """
+        Returns the list of historical Properties values of a Thing.
+
+        > 🚧 **Limitations:** A maximum of 1000 values will be returned
+        > per page (50 by default).
+
+        Query parameters:
+         - `at` _(str)_: Date and time, or date and time range (using the `|` separator), of the values.
+         - `group` _(bool)_: Whether the values with the same timestamp are returned in a single item.
+         - `next_cursor` _(str)_: Cursor used to get the next page of results.
+         - `previous_cursor` _(str)_: Cursor used to get the previous page of results.
+         - `limit` _(int)_: The numbers of items to return.
+
+        :return: The API response to the request.
+        :rtype: Union[models.PropertyHistoryValueList, models.ErrorResponse]
+        """
+        pagination_info = PaginationDescription.parse_obj({'reuse_previous_request': True, 'method': '', 'url': '', 'modifiers': [{'op': 'set', 'param': '$request.query.next_cursor', 'value': '$response.body#/paging/next_cursor'}], 'result': 'data', 'has_more': '$response.body#/paging/next_cursor'})
+
+        param_types = {
+            'query': {
+                'at': str,
+                'group': bool,
+                'next_cursor': str,
+                'previous_cursor': str,
+                'limit': int,
+            },
+        }
+
+        resp = self._make_request("GET", **kwargs)
+        return self._handle_response(resp, [
+            (200, "application/json", models.PropertyHistoryValueList),
+            (400, "application/json", models.ErrorResponse),
+            (401, "application/json", models.ErrorResponse),
+            (403, "application/json", models.ErrorResponse),
+            (404, "application/json", models.ErrorResponse),
+            (500, "application/json", models.ErrorResponse),
+        ], pagination_info=pagination_info, param_types=param_types)
+
+    def delete(self, **kwargs) -> primitives.NoResponse:
+        """
+        Deletes historical Properties values of a Thing.
+
+        > 📘 **Information:** To prevent accidental deletions, the operation
+        > will fail if no filters are provided.
+
+        Query parameters:
+         - `at` _(str)_: Date and time, or date and time range (using the `|` separator), of the values.
+         - `property_name[]` _(List[str])_: Filter by multiple Property names.
+
+        :return: The API response to the request.
+        :rtype: primitives.NoResponse
+        """
+        resp = self._make_request("DELETE", **kwargs)
+        return self._handle_response(resp, [
+            (204, "", primitives.NoResponse),
+            (400, "application/json", models.ErrorResponse),
+            (401, "application/json", models.ErrorResponse),
+            (403, "application/json", models.ErrorResponse),
+            (404, "application/json", models.ErrorResponse),
+            (500, "application/json", models.ErrorResponse),
+        ])
+
+    def download(self, start: Union[datetime, str], end: Union[datetime, str], shards: int = 8,
+                 max_workers: int = DEFAULT_MAX_WORKERS, limit: int = 1000,
+                 **kwargs) -> Iterator[models.PropertyHistoryValue]:
+        """
+        Returns the historical Properties values of a Thing in a time range,
+        downloading them concurrently.
+
+        The range is split into `shards` time ranges of the same length, and
+        up to `max_workers` of them are paginated at the same time, each one
+        with its own cursor. The values are yielded as they are downloaded,
+        in the same order as the API returns them: from the most recent to the
+        oldest.
+
+        The remaining arguments (e.g. `params={'group': True}`) are used in
+        every request.
+
+        .. code-block:: python
+
+            history = api.spaces(s).things(t).properties_history()
+            for value in history.download("2024-01-01T00:00:00Z", "2024-02-01T00:00:00Z"):
+                ...
+
+        :param start: Start date and time of the range.
+        :param end: End date and time of the range.
+        :param shards: (optional) Number of time ranges the range is split into.
+        :param max_workers: (optional) Maximum number of time ranges downloaded
+            at the same time.
+        :param limit: (optional) Number of values requested per page.
+        :return: An iterator of the values, from the most recent to the oldest.
+        :rtype: Iterator[models.PropertyHistoryValue]
+        """
+        return _download(self, start, end, shards, max_workers, limit, kwargs)
+
+    def buffer(self, **kwargs) -> PropertyHistoryBuffer:
+        """
+        Returns a write-behind buffer that creates the values added to it in
+        batches. The arguments are passed to :class:`~iots.history_buffer.PropertyHistoryBuffer`.
+
+        :return: The buffer.
+        :rtype: PropertyHistoryBuffer
+        """
+        return PropertyHistoryBuffer(self, **kwargs)
+
+    def _build_partial_path(self):
+        return "/properties-history"
+
+
+class _PropertiesHistoryMethods:
+    """
+    This class declares and implements the `properties_history()` method.
+    """
+
+    __slots__ = ()
+
+    @overload
+    def properties_history(self, property: str) -> PropertiesHistory1:
+        ...
+
+    @overload
+    def properties_history(self) -> PropertiesHistory2:
+        ...
+
+    def properties_history(self, property: str = None):
+        if property is not None:
+            return PropertiesHistory1(property)._child_of(self)
+
+        if property is None:
+            return PropertiesHistory2()._child_of(self)
+
+        raise ValueError("Invalid parameters")
+
+
+def _download(resource: Union[PropertiesHistory1, PropertiesHistory2], start, end,
+              shards: int, max_workers: int, limit: int, kwargs: dict) -> Iterator[models.PropertyHistoryValue]:
+    ranges = _split_time_range(_to_datetime(start), _to_datetime(end), shards)
+    # The API returns the most recent values first
+    ranges.reverse()
+    return concurrent_chain((_range_values(resource, range_start, range_end, i == 0, limit, kwargs)
+                             for i, (range_start, range_end) in enumerate(ranges)),
+                            max_workers=max_workers, buffer_size=limit)
+
+
+def _range_values(resource, start: datetime, end: datetime, includes_end: bool,
+                  limit: int, kwargs: dict) -> Iterator[models.PropertyHistoryValue]:
+    """
+    Yields the values in the `[start, end)` time range, or `[start, end]` if
+    `includes_end` is set.
+    """
+    kwargs = dict(kwargs)
+    params = dict(kwargs.pop('params', None) or {})
+    params['at'] = f"{format_timestamp(start)}|{format_timestamp(end)}"
+    params.setdefault('limit', limit)
+
+    values = resource.get(params=params, **kwargs)
+    if not isinstance(values, models.PropertyHistoryValueList):
+        raise ResponseError(values, "Unexpected Properties history response")
+
+    # Values at the boundaries may be returned in both adjacent ranges
+    for value in values:
+        at = _to_utc(value.at)
+        if start <= at and (at < end or (includes_end and at == end)):
+            yield value
+
+
+def _split_time_range(start: datetime, end: datetime, shards: int) -> List[Tuple[datetime, datetime]]:
+    """
+    Splits a time range into (up to) the given number of consecutive time
+    ranges of the same length, with millisecond boundaries.
+
+    :param start: Start of the range.
+    :param end: End of the range.
+    :param shards: Number of ranges.
+    :return: The list of `(start, end)` tuples, sorted by time.
+    """
+    if shards < 1:
+        raise ValueError("shards must be greater than 0")
+    start, end = _to_utc(start), _to_utc(end)
+    if end < start:
+        raise ValueError("The end of the time range must not be before its start")
+
+    step = ((end - start) // shards // timedelta(milliseconds=1)) * timedelta(milliseconds=1)
+    if step <= timedelta(0):
+        return [(start, end)]
+
+    boundaries = [start + step * i for i in range(shards)] + [end]
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def _to_datetime(value: Union[datetime, str]) -> datetime:
+    value = parse_timestamp(value)
+    if not isinstance(value, datetime):
+        value = parse_datetime(value)
+    return _to_utc(value)
+
+
+def _to_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
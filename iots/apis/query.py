@@ -0,0 +1,321 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union, overload
+
+import requests
+
+from ..internal.resource import APIResource
+from ..models import models, primitives
+from ..models.exceptions import ResponseError
+
+
+@dataclass
+class Cursor1(APIResource):
+    __slots__ = ('cursor_id',)
+    cursor_id: str
+
+    def next(self, req: Union[models.ThenQueryRequest, dict] = None,
+             **kwargs) -> Union[models.PostAPICursorResponse, models.ErrorResponse]:
+        """
+        Returns the next batch of results of a query cursor.
+
+        Note that even if `hasMore` is true, the next call might still return
+        no documents. If `hasMore` is false, the cursor is exhausted.
+
+        :param req: (optional) Request payload, with an operation to apply on
+            the returned data.
+        :type req: Union[models.ThenQueryRequest, dict]
+        :return: The API response to the request.
+        :rtype: Union[models.PostAPICursorResponse, models.ErrorResponse]
+        """
+        req_content_types = [
+            ("application/json", models.ThenQueryRequest),
+        ]
+
+        resp = self._make_request("POST", req if req is not None else {},
+                                  req_content_types=req_content_types, **kwargs)
+        return self._handle_response(resp, [
+            (200, "application/json", models.PostAPICursorResponse),
+            (400, "application/json", models.ErrorResponse),
+            (401, "application/json", models.ErrorResponse),
+            (403, "application/json", models.ErrorResponse),
+            (404, "application/json", models.ErrorResponse),
+            (500, "application/json", models.ErrorResponse),
+        ])
+
+    def delete(self, **kwargs) -> primitives.NoResponse:
+        """
+        Deletes a query cursor before it's exhausted, to free its results on
+        the server (as in the ArangoDB cursor API). Cursors are also removed
+        by the server when their `ttl` expires.
+
+        Servers that don't support deleting cursors respond with a 405 error.
+
+        :return: The API response to the request.
+        :rtype: primitives.NoResponse
+        """
+        resp = self._make_request("DELETE", **kwargs)
+        return self._handle_response(resp, [
+            (202, "", primitives.NoResponse),
+            (401, "application/json", models.ErrorResponse),
+            (403, "application/json", models.ErrorResponse),
+            (404, "application/json", models.ErrorResponse),
+            (405, "application/json", models.ErrorResponse),
+            (500, "application/json", models.ErrorResponse),
+        ])
+
+    def _build_partial_path(self):
+        return f"/cursor/{self.cursor_id}"
+
+
+@dataclass
+class Cursor2(APIResource):
+    __slots__ = ()
+
+    def create(self, req: Union[models.PostAPICursor, dict],
+               **kwargs) -> Union[models.PostAPICursorResponse, models.ErrorResponse]:
+        """
+        Creates a query cursor that runs a read-only AQL query on AnythingDB,
+        and returns its first batch of results.
+
+        :param req: Request payload.
+        :type req: Union[models.PostAPICursor, dict]
+        :return: The API response to the request.
+        :rtype: Union[models.PostAPICursorResponse, models.ErrorResponse]
+        """
+        req_content_types = [
+            ("application/json", models.PostAPICursor),
+        ]
+
+        resp = self._make_request("POST", req, req_content_types=req_content_types, **kwargs)
+        return self._handle_response(resp, [
+            (201, "application/json", models.PostAPICursorResponse),
+            (400, "application/json", models.ErrorResponse),
+            (401, "application/json", models.ErrorResponse),
+            (403, "application/json", models.ErrorResponse),
+            (404, "application/json", models.ErrorResponse),
+            (500, "application/json", models.ErrorResponse),
+        ])
+
+    def stream(self, query: str, bind_vars: Dict[str, Any] = None, batch_size: int = 1000,
+               ttl: int = None, prefetch: bool = True, **options) -> 'CursorStream':
+        """
+        Runs a read-only AQL query and returns a stream of its result
+        documents, fetching the batches of the cursor as they are needed.
+
+        .. code-block:: python
+
+            query = "FOR t IN things FILTER t.category == @category RETURN t._key"
+            with space.query().cursor().stream(query, {"category": "sensors"}) as results:
+                for thing_id in results:
+                    ...
+
+        :param query: The AQL query.
+        :param bind_vars: (optional) Values of the bind parameters of the query.
+        :param batch_size: (optional) Maximum number of documents per batch.
+        :param ttl: (optional) Seconds the server keeps the cursor alive
+            between batches.
+        :param prefetch: (optional) Whether to fetch the next batch in the
+            background while the current one is consumed.
+        :param options: (optional) Other attributes of the
+            :class:`~iots.models.models.PostAPICursor` request (e.g. `count`).
+        :return: The stream of result documents.
+        :rtype: CursorStream
+        """
+        req = {'query': query, **options}
+        if bind_vars is not None:
+            req['bindVars'] = bind_vars
+        if batch_size is not None:
+            req['batchSize'] = batch_size
+        if ttl is not None:
+            req['ttl'] = ttl
+        return CursorStream(self, req, prefetch=prefetch)
+
+    def _build_partial_path(self):
+        return "/cursor"
+
+
+class CursorStream:
+    """
+    Stream of the result documents of a query cursor.
+
+    The cursor is created when the stream is first iterated, and its batches
+    are requested while the documents are consumed: by default, the next batch
+    is fetched in the background while the current one is being yielded.
+
+    If the stream is closed (explicitly or by the context manager) before the
+    cursor is exhausted, or the iteration fails, the cursor is deleted so that
+    the server frees its results. Use the stream as a context manager when the
+    iteration may stop early.
+    """
+
+    def __init__(self, cursor: Cursor2, req: dict, prefetch: bool = True):
+        """
+        Creates a new stream. Use :meth:`Cursor2.stream` instead.
+
+        :param cursor: The :class:`Cursor2` resource used to create the cursor.
+        :param req: The :class:`~iots.models.models.PostAPICursor` request.
+        :param prefetch: (optional) Whether to fetch the next batch in the
+            background.
+        """
+        self.request = req
+        self.prefetch = prefetch
+
+        self.id: Optional[str] = None
+        """ ID of the cursor on the server, if it has more than one batch. """
+        self.count: Optional[int] = None
+        """ Total number of result documents, if `count` was requested. """
+        self.extra: Optional[dict] = None
+        """ Extra information about the query returned with the first batch. """
+        self.batches = 0
+        """ Number of batches fetched. """
+
+        self._cursor = cursor
+        self._has_more = False
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._next_batch: Optional[Future] = None
+        self._iterator: Optional[Iterator] = None
+        self._closed = False
+
+    def __iter__(self):
+        if self._iterator is None:
+            self._iterator = self._documents()
+        return self._iterator
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """
+        Stops the stream, deleting the cursor if it's not exhausted.
+        """
+        if self._iterator is not None:
+            self._iterator.close()
+        self._release()
+
+    def _release(self):
+        if self._closed:
+            return
+        self._closed = True
+
+        if self._next_batch is not None:
+            # Wait for the batch being fetched, so the cursor isn't used after
+            # being deleted, and isn't deleted if that batch was the last one
+            future, self._next_batch = self._next_batch, None
+            try:
+                _, self._has_more = self._received(future.result())
+            except Exception:
+                pass
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+        if self._has_more and self.id:
+            self._has_more = False
+            try:
+                self._cursor._parent.cursor(self.id).delete()
+            except (ResponseError, requests.RequestException):
+                # The server removes the cursor when its ttl expires
+                pass
+
+    def _documents(self) -> Iterator:
+        try:
+            batch, self._has_more = self._received(self._first_batch())
+            while True:
+                if self._has_more and self.prefetch:
+                    self._next_batch = self._submit_next_batch()
+
+                yield from batch
+
+                if not self._has_more:
+                    return
+                # `_has_more` is only updated in this thread: the prefetching
+                # thread returns it with the batch
+                if self._next_batch is not None:
+                    future, self._next_batch = self._next_batch, None
+                    batch, self._has_more = self._received(future.result())
+                else:
+                    batch, self._has_more = self._received(self._fetch_next_batch())
+        finally:
+            # Exhausted, or stopped early by an error or the consumer
+            self._release()
+
+    def _first_batch(self) -> Tuple[List, bool]:
+        resp = self._cursor.create(self.request)
+        if not isinstance(resp, models.PostAPICursorResponse):
+            raise ResponseError(resp, "Unexpected query cursor response")
+
+        self.id = resp.id
+        self.count = resp.count
+        self.extra = resp.extra
+        return self._read_batch(resp)
+
+    def _fetch_next_batch(self) -> Tuple[List, bool]:
+        resp = self._cursor._parent.cursor(self.id).next()
+        if not isinstance(resp, models.PostAPICursorResponse):
+            raise ResponseError(resp, "Unexpected query cursor response")
+        return self._read_batch(resp)
+
+    def _submit_next_batch(self) -> Future:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='iots-query-cursor')
+        return self._executor.submit(self._fetch_next_batch)
+
+    @staticmethod
+    def _read_batch(resp: models.PostAPICursorResponse) -> Tuple[List, bool]:
+        return resp.result or [], bool(resp.hasMore)
+
+    def _received(self, batch: Tuple[List, bool]) -> Tuple[List, bool]:
+        self.batches += 1
+        return batch
+
+
+class _CursorMethods:
+    """
+    This class declares and implements the `cursor()` method.
+    """
+
+    __slots__ = ()
+
+    @overload
+    def cursor(self, cursor_id: str) -> Cursor1:
+        ...
+
+    @overload
+    def cursor(self) -> Cursor2:
+        ...
+
+    def cursor(self, cursor_id: str = None):
+        if cursor_id is not None:
+            return Cursor1(cursor_id)._child_of(self)
+
+        if cursor_id is None:
+            return Cursor2()._child_of(self)
+
+        raise ValueError("Invalid parameters")
+
+
+@dataclass
+class Query1(APIResource, _CursorMethods):
+    __slots__ = ()
+
+    def _build_partial_path(self):
+        return "/query"
+
+
+class _QueryMethods:
+    """
+    This class declares and implements the `query()` method.
+    """
+
+    __slots__ = ()
+
+    @overload
+    def query(self) -> Query1:
+        ...
+
+    def query(self):
+        return Query1()._child_of(self)
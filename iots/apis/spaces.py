@@ -2,13 +2,19 @@ from dataclasses import dataclass
 from typing import overload
 
 from ..internal.resource import APIResource
+from .bulk import _BulkMethods
 from .categories import _CategoriesMethods
 from .communications import _CommunicationsMethods
+from .event_tail import _EventTailMethods
+from .fleet import _FleetMethods
+from .query import _QueryMethods
 from .things import _ThingsMethods
 
 
 @dataclass
-class Spaces1(APIResource, _CategoriesMethods, _ThingsMethods, _CommunicationsMethods):
+class Spaces1(APIResource, _CategoriesMethods, _ThingsMethods, _CommunicationsMethods, _QueryMethods,
+              _BulkMethods, _FleetMethods, _EventTailMethods):
+    __slots__ = ('space',)
     space: str
 
     def _build_partial_path(self):
@@ -20,6 +26,8 @@ class _SpacesMethods:
     This class declares and implements the `spaces()` method.
     """
 
+    __slots__ = ()
+
     @overload
     def spaces(self, space: str) -> Spaces1:
         ...
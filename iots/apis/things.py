@@ -1,16 +1,24 @@
 from dataclasses import dataclass
-from typing import Union, overload
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple, Union, overload
 
+from ..internal.concurrency import DEFAULT_MAX_WORKERS
+from ..internal.fan_out import fan_out, merge_thing_lists, merge_things_deleted, split_list_filters
 from ..internal.resource import APIResource
-from ..models import models, primitives
+from ..internal.response import check_response
+from ..internal.retry import error_status_code
+from ..models import models, primitives, things_patch
+from ..models.exceptions import ResponseError
 from ..models.extensions.pagination import PaginationDescription
 from .actions import _ActionsMethods
+from .bulk import BulkItemResult, BulkProgress, BulkStatus, OnConflict, _patch_many, _run_bulk, _thing_uid
 from .events import _EventsMethods
 from .properties import _PropertiesMethods
+from .properties_history import _PropertiesHistoryMethods
 
 
 @dataclass
-class Things1(APIResource, _ActionsMethods, _EventsMethods, _PropertiesMethods):
+class Things1(APIResource, _ActionsMethods, _EventsMethods, _PropertiesMethods, _PropertiesHistoryMethods):
+    __slots__ = ('thing_id',)
     thing_id: str
 
     def get(self, **kwargs) -> Union[models.Thing, models.ErrorResponse]:
@@ -100,6 +108,7 @@ class Things1(APIResource, _ActionsMethods, _EventsMethods, _PropertiesMethods):
 
 @dataclass
 class Things2(APIResource):
+    __slots__ = ()
 
     def create(self, req: models.ThingCreate, **kwargs) -> Union[models.Thing, models.ErrorResponse]:
         """
@@ -122,25 +131,89 @@ class Things2(APIResource):
             (401, "application/json", models.ErrorResponse),
             (403, "application/json", models.ErrorResponse),
             (404, "application/json", models.ErrorResponse),
+            (409, "application/json", models.ErrorResponse),
             (500, "application/json", models.ErrorResponse),
         ])
 
-    def patch(self, req: Union[models.ThingsPatch, list], **kwargs) -> Union[models.ThingsPatchMultiStatus, models.ErrorResponse]:
+    def create_many(self, things: Iterable[Union[models.ThingCreate, dict]],
+                    max_concurrency: int = DEFAULT_MAX_WORKERS,
+                    on_conflict: Union[OnConflict, str] = OnConflict.ERROR,
+                    max_retries: int = 3, retry_backoff: float = 0.5,
+                    progress: Callable[[BulkProgress], None] = None,
+                    key: Callable[[Any], Optional[str]] = None,
+                    **kwargs) -> Iterator[BulkItemResult]:
+        """
+        Creates many Things, making up to `max_concurrency` requests at the
+        same time, and returns the result of each one as it completes.
+
+        The Things are read lazily, so `things` can be a generator of any
+        length. A Thing that can't be created doesn't stop the others: its
+        result has the `failed` status and the error response. Things that
+        fail with a connection error, a 429 or a 5xx response are retried up
+        to `max_retries` times with exponential backoff.
+
+        .. code-block:: python
+
+            results = space.things().create_many(read_devices(), max_concurrency=16,
+                                                 on_conflict="skip", progress=print)
+            failed = [result for result in results if not result.ok]
+
+        :param things: The Things to create.
+        :param max_concurrency: (optional) Maximum number of requests made at
+            the same time.
+        :param on_conflict: (optional) What to do when a Thing with the same
+            `uid` already exists (a 409 response): fail, skip it or update it.
+        :param max_retries: (optional) Number of times a failed Thing is
+            retried.
+        :param retry_backoff: (optional) Seconds to wait before the first
+            retry. The wait is doubled after every retry.
+        :param progress: (optional) Function called with the progress of the
+            operation (completed and failed Things, throughput...) every time
+            a Thing completes.
+        :param key: (optional) Function that returns the `uid` of a Thing,
+            used to update it when `on_conflict` is `update`. By default, the
+            `uid` of dicts and of models that have that field. A Thing without
+            `uid` fails with a `ValueError` before it's sent.
+        :return: An iterator of the results, in completion order. Their
+            `index` is the position of the Thing in `things`.
+        :rtype: Iterator[BulkItemResult]
+        """
+        on_conflict = OnConflict(on_conflict)
+        key = key or _thing_uid
+
+        def create(thing) -> Tuple[BulkStatus, models.Thing]:
+            uid = key(thing) if on_conflict == OnConflict.UPDATE else None
+            if on_conflict == OnConflict.UPDATE and not uid:
+                raise ValueError("The Things must have a uid to be updated on conflict (see the key argument)")
+            try:
+                return BulkStatus.CREATED, check_response(self.create(thing, **kwargs), "Thing not created")
+            except ResponseError as e:
+                if on_conflict == OnConflict.ERROR or error_status_code(e) != 409:
+                    raise
+                if on_conflict == OnConflict.SKIP:
+                    return BulkStatus.SKIPPED, None
+
+                updated = self._parent.things(uid).update(thing, **kwargs)
+                return BulkStatus.UPDATED, check_response(updated, "Thing not updated")
+
+        return _run_bulk(create, things, max_concurrency, max_retries, retry_backoff, progress)
+
+    def patch(self, req: Union[things_patch.ThingsPatch, list], **kwargs) -> Union[things_patch.ThingsPatchMultiStatus, models.ErrorResponse]:
         """
         Partially updates Things with the given IDs.
 
         :param req: Request payload.
-        :type req: Union[models.ThingsPatch, list]
+        :type req: Union[things_patch.ThingsPatch, list]
         :return: The API response to the request.
-        :rtype: Union[models.ThingsPatchMultiStatus, models.ErrorResponse]
+        :rtype: Union[things_patch.ThingsPatchMultiStatus, models.ErrorResponse]
         """
         req_content_types = [
-            ("application/json-patch+json", models.ThingsPatch),
+            ("application/json-patch+json", things_patch.ThingsPatch),
         ]
 
         resp = self._make_request("PATCH", req, req_content_types=req_content_types, **kwargs)
         return self._handle_response(resp, [
-            (207, "application/json", models.ThingsPatchMultiStatus),
+            (207, "application/json", things_patch.ThingsPatchMultiStatus),
             (400, "application/json", models.ErrorResponse),
             (401, "application/json", models.ErrorResponse),
             (403, "application/json", models.ErrorResponse),
@@ -148,6 +221,45 @@ class Things2(APIResource):
             (500, "application/json", models.ErrorResponse),
         ])
 
+    def patch_many(self, items: Union[things_patch.ThingsPatch, Iterable[Union[things_patch.ThingsPatchItem, dict]]],
+                   max_items: int = 100, max_bytes: int = 256 * 1024,
+                   max_concurrency: int = DEFAULT_MAX_WORKERS, max_retries: int = 3,
+                   retry_backoff: float = 0.5, **kwargs) -> things_patch.ThingsPatchMultiStatus:
+        """
+        Partially updates many Things, splitting the items into chunks that
+        are sent concurrently with :meth:`patch`.
+
+        Each chunk has up to `max_items` items and `max_bytes` bytes (an item
+        larger than that is sent alone). The multi-status response of every
+        chunk is parsed, and only the items that failed with a 429 or 5xx
+        status, or whose chunk failed with a connection error, are sent again,
+        up to `max_retries` times with exponential backoff.
+
+        .. code-block:: python
+
+            report = space.things().patch_many(
+                {"id": thing_id, "patch": [{"op": "replace", "path": "/title", "value": title}]}
+                for thing_id, title in new_titles.items())
+            for i in report.has_errors:
+                print(report.results[i].status, report.results[i].response)
+
+        :param items: The Things to patch, with their ID and JSON Patch.
+        :param max_items: (optional) Maximum number of items per request.
+        :param max_bytes: (optional) Maximum size of the request bodies, in
+            bytes.
+        :param max_concurrency: (optional) Maximum number of requests made at
+            the same time.
+        :param max_retries: (optional) Number of times the failed items are
+            sent again.
+        :param retry_backoff: (optional) Seconds to wait before the first
+            retry. The wait is doubled after every retry.
+        :return: The merged report, with the result of every item (in the
+            order of `items`) and the indexes of the items that failed.
+        :rtype: things_patch.ThingsPatchMultiStatus
+        """
+        return _patch_many(self, items, max_items, max_bytes, max_concurrency,
+                           max_retries, retry_backoff, **kwargs)
+
     def get(self, **kwargs) -> Union[models.ThingList, models.ErrorResponse]:
         """
         Returns the list of Things.
@@ -220,6 +332,13 @@ class Things2(APIResource):
          - `previous_cursor` _(str)_: Cursor used to get the previous page of results.
          - `limit` _(int)_: The numbers of items to return.
 
+        If the `thingID[]` and `category[]` filters make the URL longer than
+        the `max_url_length` of the API client, they are split into several
+        requests, made concurrently, and their results are merged: every
+        Thing is returned once, and the pages still have up to `limit`
+        Things, but the Things of each request come after the previous
+        request's. Sorted listings (with `sort`) aren't split.
+
         :return: The API response to the request.
         :rtype: Union[models.ThingList, models.ErrorResponse]
         """
@@ -244,6 +363,11 @@ class Things2(APIResource):
             },
         }
 
+        params_chunks = split_list_filters(self, kwargs)
+        if params_chunks is not None:
+            return merge_thing_lists(fan_out(self.get, kwargs, params_chunks),
+                                      kwargs['params'].get('limit'))
+
         resp = self._make_request("GET", **kwargs)
         return self._handle_response(resp, [
             (200, "application/json", models.ThingList),
@@ -305,9 +429,18 @@ class Things2(APIResource):
                  * If the Property type is an object, it will check whether an
                    attribute with the given name is present in it.
 
+        If the `thingID[]` and `category[]` filters make the URL longer than
+        the `max_url_length` of the API client, they are split into several
+        requests, made concurrently, and the IDs of the deleted Things are
+        merged, without duplicates.
+
         :return: The API response to the request.
         :rtype: Union[models.ThingsDeleted, models.ErrorResponse]
         """
+        params_chunks = split_list_filters(self, kwargs)
+        if params_chunks is not None:
+            return merge_things_deleted(fan_out(self.delete, kwargs, params_chunks))
+
         resp = self._make_request("DELETE", **kwargs)
         return self._handle_response(resp, [
             (200, "application/json", models.ThingsDeleted),
@@ -327,6 +460,8 @@ class _ThingsMethods:
     This class declares and implements the `things()` method.
     """
 
+    __slots__ = ()
+
     @overload
     def things(self, thing_id: str) -> Things1:
         ...
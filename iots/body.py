@@ -0,0 +1,128 @@
+import json
+from typing import Iterable, Iterator, Union
+
+from pydantic import BaseModel
+
+from .models.basemodel import APIBaseModel
+
+
+class RawBody:
+    """
+    A pre-serialised request body, sent as is.
+
+    The API client validates and converts the request payloads to the
+    Content-Type of each operation. When the payload is already serialised
+    (e.g. JSON bytes received from another system), wrapping it in a `RawBody`
+    skips that work: the data is neither parsed nor copied, and it's sent
+    with the given Content-Type.
+
+    .. code-block:: python
+
+        api.spaces(s).things(t).properties().update(RawBody(b'{"temperature": 21.7}'))
+
+    The data can also be a file-like object or an iterable of bytes chunks,
+    which are streamed to the server without loading them in memory.
+
+    The data is trusted: it's up to the caller to make sure that it's valid
+    for the given Content-Type.
+    """
+
+    __slots__ = ('data', 'content_type')
+
+    def __init__(self, data: Union[bytes, bytearray, memoryview, str],
+                 content_type: str = 'application/json'):
+        """
+        Creates a new pre-serialised body.
+
+        :param data: The serialised body. Memory views are sent without
+            copying their content, and file-like objects and iterables of bytes
+            are streamed.
+        :param content_type: (optional) The Content-Type of the body. It's only
+            used if the request doesn't set a Content-Type header.
+        """
+        if isinstance(data, memoryview):
+            # Make the length of the view its size in bytes
+            data = data.cast('B') if data.format != 'B' or data.ndim != 1 else data
+        elif not isinstance(data, (bytes, bytearray, str)) and not is_stream(data):
+            raise TypeError(f'Raw body must be bytes-like, a string or a stream, not "{type(data).__name__}"')
+
+        self.data = data
+        self.content_type = content_type
+
+    def __repr__(self):
+        if is_stream(self.data):
+            return f"RawBody({self.content_type}, stream)"
+        return f"RawBody({self.content_type}, {len(self.data)} bytes)"
+
+
+class JSONArrayStream:
+    """
+    A request body that encodes the items of an iterable as a JSON array while
+    it's being sent.
+
+    Items are serialised one by one and sent in chunks of about `chunk_size`
+    bytes (using chunked transfer encoding), so large payloads (e.g. thousands
+    of Things or Property values) are never fully loaded in memory, neither as
+    objects nor as a string, when the items come from a generator.
+
+    .. code-block:: python
+
+        things = ({"title": f"Sensor {i}"} for i in range(100000))
+        api.spaces(s).things().create(JSONArrayStream(things))
+
+    When the iterable is an iterator (e.g. a generator), the body can only be
+    sent once.
+    """
+
+    __slots__ = ('items', 'chunk_size', 'content_type')
+
+    def __init__(self, items: Iterable, chunk_size: int = 64 * 1024,
+                 content_type: str = 'application/json'):
+        """
+        Creates a new JSON array stream.
+
+        :param items: The items of the array. They can be JSON serializable
+            values or API models.
+        :param chunk_size: (optional) Approximate size in bytes of the chunks
+            sent.
+        :param content_type: (optional) The Content-Type of the body. It's only
+            used if the request doesn't set a Content-Type header and the
+            operation doesn't define a compatible one.
+        """
+        self.items = items
+        self.chunk_size = chunk_size
+        self.content_type = content_type
+
+    def __iter__(self) -> Iterator[bytes]:
+        """ Yields the encoded JSON array in chunks. """
+        buffer = bytearray(b'[')
+        separator = b''
+        for item in self.items:
+            buffer += separator
+            buffer += _encode_json_item(item)
+            separator = b','
+            if len(buffer) >= self.chunk_size:
+                yield bytes(buffer)
+                buffer.clear()
+
+        buffer += b']'
+        yield bytes(buffer)
+
+    def __repr__(self):
+        return f"JSONArrayStream({self.content_type})"
+
+
+def is_stream(obj) -> bool:
+    """
+    Returns whether the given object is a file-like object or an iterator (e.g.
+    a generator), whose content is read while the request is being sent.
+    """
+    if isinstance(obj, (str, bytes, bytearray, memoryview, dict, list, BaseModel)):
+        return False
+    return isinstance(obj, Iterator) or callable(getattr(type(obj), 'read', None))
+
+
+def _encode_json_item(item) -> bytes:
+    if isinstance(item, APIBaseModel):
+        return item.json().encode('utf-8')
+    return json.dumps(item).encode('utf-8')
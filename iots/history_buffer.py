@@ -0,0 +1,260 @@
+import json
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Deque, List, Tuple, Union
+
+from .body import RawBody
+from .internal.retry import is_retryable
+from .models.exceptions import APIException, ResponseError
+from .models.models import PropertyHistoryValue, PropertyHistoryValues
+from .models.timestamps import format_timestamp
+
+
+class PropertyHistoryBuffer:
+    """
+    Write-behind buffer that accumulates Properties history values of a Thing
+    and creates them in batches, instead of making one request per value.
+
+    Values are added with :meth:`add` and sent in a background thread, with
+    one request per batch, when any of these conditions is met:
+
+     - `max_samples` values are pending.
+     - The pending values take `max_bytes` bytes.
+     - The oldest pending value was added `flush_interval` seconds ago.
+
+    If `max_pending` values are waiting to be sent, :meth:`add` blocks until
+    there is room for more. Batches that fail with a connection error, a 429
+    or a 5xx response are retried up to `max_retries` times with exponential
+    backoff. Batches that still fail are passed to the `on_error` callback, or
+    kept in :attr:`failed` if no callback is set.
+
+    Buffers are created with the `buffer()` method of the Properties history
+    resources, and the pending values are sent when the buffer is closed or
+    when the :class:`~iots.api.API` context manager exits:
+
+    .. code-block:: python
+
+        with API(...) as api:
+            history = api.spaces(s).things(t).properties_history().buffer()
+            for sample in read_sensor():
+                history.add({"temperature": sample.value}, at=sample.timestamp)
+    """
+
+    def __init__(self, history, max_samples: int = 500, max_bytes: int = 512 * 1024,
+                 flush_interval: float = 5.0, max_pending: int = 10000,
+                 max_retries: int = 3, retry_backoff: float = 0.5,
+                 on_error: Callable[[PropertyHistoryValues, Exception], None] = None):
+        """
+        Creates a new buffer.
+
+        :param history: The :class:`~iots.apis.properties_history.PropertiesHistory1`
+            or :class:`~iots.apis.properties_history.PropertiesHistory2`
+            resource where the values are created.
+        :param max_samples: (optional) Maximum number of values per request.
+        :param max_bytes: (optional) Maximum size of the request bodies, in
+            bytes. Larger values are sent alone.
+        :param flush_interval: (optional) Maximum number of seconds a value
+            waits before it's sent.
+        :param max_pending: (optional) Maximum number of values waiting to be
+            sent.
+        :param max_retries: (optional) Number of times a failed batch is
+            retried.
+        :param retry_backoff: (optional) Seconds to wait before the first
+            retry. The wait is doubled after every retry.
+        :param on_error: (optional) Function called with the values of a batch
+            and the error, when a batch can't be sent.
+        """
+        if max_samples < 1:
+            raise ValueError("max_samples must be greater than 0")
+        if max_pending < max_samples:
+            raise ValueError("max_pending must not be less than max_samples")
+
+        self.history = history
+        self.max_samples = max_samples
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.on_error = on_error
+
+        self.sent = 0
+        """ Number of values sent successfully. """
+        self.failed: List[Tuple[PropertyHistoryValues, Exception]] = []
+        """ Batches that couldn't be sent, if there is no `on_error` callback. """
+
+        # Pending samples, with the time they were added
+        self._pending: Deque[Tuple[str, float]] = deque()
+        self._pending_bytes = 0
+        self._sending = False
+        self._flush_requests = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = None
+
+        history._api()._register_buffer(self)
+
+    def add(self, properties: Union[dict, PropertyHistoryValue], at: datetime = None,
+            timeout: float = None):
+        """
+        Adds a value to the buffer.
+
+        :param properties: Dictionary with the values of the Properties, or a
+            :class:`~iots.models.models.PropertyHistoryValue`.
+        :param at: (optional) Date and time the values were recorded. By
+            default, the current time. It's ignored if a
+            :class:`~iots.models.models.PropertyHistoryValue` is given.
+        :param timeout: (optional) Maximum number of seconds to wait if the
+            buffer is full. By default, it waits until there is room.
+        :raises queue.Full: If the buffer is still full after `timeout` seconds.
+        :raises APIException: If the buffer is closed.
+        """
+        if isinstance(properties, PropertyHistoryValue):
+            sample = properties.json()
+        else:
+            sample = json.dumps({'at': format_timestamp(at or datetime.now(timezone.utc)),
+                                 'properties': properties})
+
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._closed or len(self._pending) < self.max_pending, timeout):
+                raise queue.Full("The Properties history buffer is full")
+            if self._closed:
+                raise APIException("The Properties history buffer is closed")
+
+            self._pending.append((sample, time.monotonic()))
+            # The samples are ASCII-only JSON, so their length is their size
+            self._pending_bytes += len(sample) + 1
+            if len(self._pending) == 1:
+                # Wake up the sender to wait for the flush interval
+                self._cond.notify_all()
+            elif len(self._pending) >= self.max_samples or self._pending_bytes >= self.max_bytes:
+                self._cond.notify_all()
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='iots-history-buffer', daemon=True)
+                self._thread.start()
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Sends the pending values and waits until they have been sent.
+
+        :param timeout: (optional) Maximum number of seconds to wait.
+        :return: Whether all the pending values have been sent (or failed).
+        """
+        with self._cond:
+            if self._thread is None:
+                return True
+
+            self._flush_requests += 1
+            self._cond.notify_all()
+            try:
+                return self._cond.wait_for(lambda: not self._pending and not self._sending, timeout)
+            finally:
+                self._flush_requests -= 1
+
+    def close(self, timeout: float = None):
+        """
+        Sends the pending values and stops the buffer. No more values can be
+        added after closing it.
+
+        :param timeout: (optional) Maximum number of seconds to wait for the
+            pending values to be sent.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+
+        if thread is not None:
+            thread.join(timeout)
+
+    def __len__(self):
+        """ Returns the number of values waiting to be sent. """
+        return len(self._pending)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._batch_ready():
+                    if self._closed and not self._pending:
+                        return
+                    self._cond.wait(self._time_to_flush())
+
+                batch = self._take_batch()
+                self._sending = True
+                # There is room for more values
+                self._cond.notify_all()
+
+            try:
+                self._send(batch)
+            finally:
+                with self._cond:
+                    self._sending = False
+                    self._cond.notify_all()
+
+    def _batch_ready(self) -> bool:
+        if not self._pending:
+            return False
+        return (self._closed or self._flush_requests > 0
+                or len(self._pending) >= self.max_samples
+                or self._pending_bytes >= self.max_bytes
+                or self._time_to_flush() <= 0)
+
+    def _time_to_flush(self):
+        if not self._pending:
+            return None
+        # The oldest sample still pending, which may be newer than the ones
+        # sent in the last batch
+        return self._pending[0][1] + self.flush_interval - time.monotonic()
+
+    def _take_batch(self) -> List[str]:
+        """
+        Removes and returns the next batch of pending values. The lock must be
+        held.
+        """
+        batch, size = [], 1
+        while self._pending and len(batch) < self.max_samples:
+            sample_size = len(self._pending[0][0]) + 1
+            if batch and size + sample_size > self.max_bytes:
+                break
+            batch.append(self._pending.popleft()[0])
+            size += sample_size
+
+        self._pending_bytes -= size - 1
+        return batch
+
+    def _send(self, batch: List[str]):
+        body = RawBody('[' + ','.join(batch) + ']')
+        delay = self.retry_backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                ret = self.history.create(body)
+                if not isinstance(ret, PropertyHistoryValues):
+                    raise ResponseError(ret, "Unexpected Properties history response")
+                self.sent += len(batch)
+                return
+            except Exception as e:
+                error = e
+                if attempt == self.max_retries or not is_retryable(e):
+                    break
+            time.sleep(delay)
+            delay *= 2
+
+        values = PropertyHistoryValues.parse_raw(body.data)
+        if self.on_error is not None:
+            try:
+                self.on_error(values, error)
+                return
+            except Exception as e:
+                error = e
+        self.failed.append((values, error))
+
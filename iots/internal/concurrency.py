@@ -0,0 +1,201 @@
+import queue
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Iterator, Optional
+
+DEFAULT_MAX_WORKERS = 8
+""" Default maximum number of concurrent requests made by fan-out helpers. """
+
+_THREAD_NAME_PREFIX = 'iots-fan-out'
+_PUT_TIMEOUT = 0.1
+
+
+class _End:
+    pass
+
+
+_END = _End()
+
+
+class _Failure:
+    def __init__(self, exception: BaseException):
+        self.exception = exception
+
+
+def concurrent_chain(iterables: Iterable[Iterable], max_workers: int = DEFAULT_MAX_WORKERS,
+                     buffer_size: int = 1000) -> Iterator:
+    """
+    Chains the given iterables, consuming them concurrently in a thread pool.
+
+    The items are yielded in the same order as :func:`itertools.chain` would
+    yield them, but up to `max_workers` iterables are consumed at the same
+    time, each one in its own thread. Up to `buffer_size` items are read ahead
+    from every iterable, and the iterables themselves are taken lazily, so the
+    memory used is bounded even for a generator of iterables or a consumer
+    slower than the iterables.
+
+    If an iterable raises an exception, it's raised when the consumer reaches
+    that point of the chain. Closing the returned generator stops the
+    iterables that are still being consumed.
+
+    :param iterables: The iterables to chain.
+    :param max_workers: (optional) Maximum number of iterables consumed at the
+        same time.
+    :param buffer_size: (optional) Maximum number of items read ahead from
+        each iterable.
+    """
+    iterables = iter(iterables)
+    stop = threading.Event()
+    running = deque()
+    executor = None
+
+    def start_next() -> bool:
+        nonlocal executor
+        iterable = next(iterables, _END)
+        if iterable is _END:
+            return False
+        if executor is None:
+            executor = new_executor(max_workers)
+        items = queue.Queue(buffer_size)
+        # Iterables are started in order, so the one being yielded is always
+        # running or finished, even when the later ones are blocked on their
+        # full buffers.
+        executor.submit(_drain, iterable, items, stop)
+        running.append(items)
+        return True
+
+    try:
+        while len(running) < max_workers and start_next():
+            pass
+
+        while running:
+            items = running.popleft()
+            start_next()
+            while True:
+                item = items.get()
+                if item is _END:
+                    break
+                if isinstance(item, _Failure):
+                    raise item.exception
+                yield item
+    finally:
+        stop.set()
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+def map_unordered(func: Callable, iterable: Iterable, max_workers: int = DEFAULT_MAX_WORKERS,
+                  max_pending: int = None, executor: ThreadPoolExecutor = None) -> Iterator:
+    """
+    Calls a function with each item of an iterable in a thread pool, yielding
+    the results as the calls complete.
+
+    The items are taken lazily from the iterable, in the thread of the
+    consumer, and at most `max_pending` calls are running or waiting to be
+    yielded at any time, so a generator of any length is processed with
+    bounded memory.
+
+    If a call raises an exception, it's raised when its result would be
+    yielded. Closing the returned generator cancels the calls that haven't
+    started yet.
+
+    :param func: The function to call.
+    :param iterable: The items to call the function with.
+    :param max_workers: (optional) Maximum number of calls running at the
+        same time.
+    :param max_pending: (optional) Maximum number of calls submitted and not
+        yielded yet. By default, twice `max_workers`.
+    :param executor: (optional) The thread pool used to make the calls, to
+        share it between several calls to this function. It's not shut down
+        at the end. By default, a new pool of `max_workers` threads.
+    """
+    if max_pending is None:
+        max_pending = 2 * max_workers
+    items = iter(iterable)
+    pending = set()
+    exhausted = False
+    own_executor = executor is None
+    if own_executor:
+        executor = new_executor(max_workers)
+
+    try:
+        while True:
+            while not exhausted and len(pending) < max_pending:
+                item = next(items, _END)
+                if item is _END:
+                    exhausted = True
+                else:
+                    pending.add(executor.submit(func, item))
+
+            if not pending:
+                return
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+        if own_executor:
+            executor.shutdown(wait=False)
+
+
+def new_executor(max_workers: int = DEFAULT_MAX_WORKERS) -> ThreadPoolExecutor:
+    """
+    Returns a thread pool for the fan-out helpers, e.g. to share it between
+    several calls to :func:`map_unordered`.
+
+    :param max_workers: (optional) Maximum number of threads.
+    """
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=_THREAD_NAME_PREFIX)
+
+
+def _drain(iterable: Iterable, items: queue.Queue, stop: threading.Event):
+    """
+    Puts the items of an iterable in a queue, followed by `_END` or the
+    `_Failure` that stopped it. If the consumer stops first, the iterable is
+    closed, so it can release its resources (e.g. delete a query cursor)
+    without waiting for the garbage collector.
+    """
+    iterator = None
+    finished = False
+    try:
+        if stop.is_set():
+            return
+        iterator = iter(iterable)
+        for item in iterator:
+            if not _put(items, item, stop):
+                return
+        finished = True
+    except Exception as e:
+        _put(items, _Failure(e), stop)
+        return
+    finally:
+        if not finished:
+            _close(iterable, iterator)
+
+    _put(items, _END, stop)
+
+
+def _close(iterable: Iterable, iterator: Optional[Iterator]):
+    """
+    Closes an iterable, or the iterator it returned, if it can be closed.
+    """
+    close = getattr(iterable, 'close', None) or getattr(iterator, 'close', None)
+    if close is not None:
+        close()
+
+
+def _put(items: queue.Queue, item, stop: threading.Event) -> bool:
+    """
+    Puts an item in a queue, waiting while it's full. Returns False if the
+    consumer stopped before the item could be put.
+    """
+    while not stop.is_set():
+        try:
+            items.put(item, timeout=_PUT_TIMEOUT)
+            return True
+        except queue.Full:
+            pass
+    return False
@@ -1,4 +1,6 @@
 import json
+from functools import lru_cache
+from typing import Union
 from urllib.parse import parse_qsl
 
 import xmltodict
@@ -9,6 +11,9 @@ from ..models.basemodel import APIBaseModel
 class ContentType:
     """
     Represents a Content-Type.
+
+    Use :func:`get_content_type` to get interned instances that are shared
+    by all the requests and responses using the same Content-Type.
     """
 
     def __init__(self, content_type: str):
@@ -21,8 +26,20 @@ class ContentType:
         self.parameters = components['parameters']
 
     def __eq__(self, other):
+        if not isinstance(other, ContentType):
+            return NotImplemented
         return content_types_match(self.content_type, other.content_type)
 
+    # `*/*` is equal to every Content-Type, so no hash is consistent with it
+    __hash__ = None
+
+    def is_compatible(self, other: 'ContentType') -> bool:
+        """
+        Returns whether this Content-Type uses the same underlying format as
+        another one (see :func:`content_types_compatible`).
+        """
+        return content_types_compatible(self.content_type, other.content_type)
+
     def __str__(self):
         return self.content_type
 
@@ -30,6 +47,19 @@ class ContentType:
         return f"ContentType({self.content_type})"
 
 
+CACHE_SIZE = 256
+""" Maximum number of Content-Types and Content-Type pairs cached. """
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def get_content_type(content_type: str) -> ContentType:
+    """
+    Returns an interned :class:`ContentType` instance for the given
+    Content-Type. Instances must not be modified.
+    """
+    return ContentType(content_type)
+
+
 def parse_content_type(content_type):
     """
     Parses a Content-Type into its components.
@@ -37,6 +67,19 @@ def parse_content_type(content_type):
     :param content_type: The Content-Type to parse.
     :return:  A dictionary with the components of the Content-Type.
     """
+    media_type, main_type, subtype, suffix, parameters = _parse_content_type(content_type)
+
+    return {
+        "media_type": media_type,  # Full media type (e.g., application/json-patch+json)
+        "type": main_type,  # Main type (e.g., application)
+        "subtype": subtype,  # Subtype (e.g., json-patch)
+        "suffix": suffix,  # Suffix (e.g., json), or None if not present
+        "parameters": dict(parameters)  # Parameters (e.g., {'charset': 'utf-8'})
+    }
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _parse_content_type(content_type: str) -> tuple:
     # Split the main type from the parameters
     media_type, *params = content_type.split(';')
     media_type = media_type.strip()
@@ -47,58 +90,68 @@ def parse_content_type(content_type):
     # Split the type and subtype
     main_type, _, subtype = base_type.partition('/')
 
-    # Parse parameters into a dictionary
-    parameters = {
-        key.strip(): value.strip()
+    # Parse parameters
+    parameters = tuple(
+        (key.strip(), value.strip())
         for key, value in parse_qsl(';'.join(params).replace(';', '&'))
-    }
+    )
+
+    return media_type, main_type, subtype, suffix if suffix else None, parameters
 
-    return {
-        "media_type": media_type,  # Full media type (e.g., application/json-patch+json)
-        "type": main_type,  # Main type (e.g., application)
-        "subtype": subtype,  # Subtype (e.g., json-patch)
-        "suffix": suffix if suffix else None,  # Suffix (e.g., json), or None if not present
-        "parameters": parameters  # Parameters (e.g., {'charset': 'utf-8'})
-    }
 
+@lru_cache(maxsize=CACHE_SIZE)
+def _media_type(content_type: str) -> str:
+    return content_type.lower().split(';')[0]
 
+
+@lru_cache(maxsize=CACHE_SIZE)
 def content_types_compatible(type1: str, type2: str):
     """
     Checks if two Content-Types are compatible (i.e., if they use the same
     underlying format).
     """
-    parsed_type1 = parse_content_type(type1)
-    parsed_type2 = parse_content_type(type2)
+    ct1, ct2 = get_content_type(type1), get_content_type(type2)
 
-    if parsed_type1["type"] != parsed_type2["type"]:
+    if ct1.type != ct2.type:
         return False
 
-    if '*' in [parsed_type1["subtype"], parsed_type2["subtype"]]:
+    if '*' in [ct1.subtype, ct2.subtype]:
         return True
 
-    suffix1 = parsed_type1["suffix"] or parsed_type1["subtype"]
-    suffix2 = parsed_type2["suffix"] or parsed_type2["subtype"]
-    return suffix1 == suffix2
+    return (ct1.suffix or ct1.subtype) == (ct2.suffix or ct2.subtype)
 
 
+@lru_cache(maxsize=CACHE_SIZE)
 def content_types_match(type1: str, type2: str) -> bool:
     """
     Returns whether the given Content-Types match.
     """
-    t1, t2 = type1.lower().split(';')[0], type2.lower().split(';')[0]
+    t1, t2 = _media_type(type1), _media_type(type2)
     if '*/*' in [t1, t2]:
         return True
     return t1 == t2
 
 
-def to_json(obj) -> str:
+MAX_VALIDATED_BODY_SIZE = 1 << 20
+"""
+Maximum size (in bytes or characters) of the pre-serialised request bodies
+that are parsed to validate them. Larger bodies are sent without validation,
+as parsing them costs more than the request itself.
+"""
+
+
+def to_json(obj) -> Union[str, bytes]:
     """
     Returns the JSON representation of the given object.
     Raises an exception if the object cannot be serialized to a valid JSON.
+
+    Strings and bytes are returned as is, after checking that they are a
+    valid JSON (unless they are larger than :data:`MAX_VALIDATED_BODY_SIZE`).
     """
-    if isinstance(obj, (str, bytes)):
-        json.loads(obj)
-        return str(obj)
+    if isinstance(obj, (str, bytes, bytearray)):
+        if len(obj) <= MAX_VALIDATED_BODY_SIZE:
+            json.loads(obj)
+        return obj
     elif isinstance(obj, (dict, list)):
         return json.dumps(obj)
     elif isinstance(obj, APIBaseModel):
@@ -107,14 +160,18 @@ def to_json(obj) -> str:
         raise ValueError(f'Value type "{type(obj).__name__}" cannot be converted to JSON')
 
 
-def to_xml(obj) -> str:
+def to_xml(obj) -> Union[str, bytes]:
     """
     Returns the XML representation of the given object.
     Raises an exception if the object cannot be serialized to a valid XML.
+
+    Strings and bytes are returned as is, after checking that they are a
+    valid XML (unless they are larger than :data:`MAX_VALIDATED_BODY_SIZE`).
     """
-    if isinstance(obj, (str, bytes)):
-        xmltodict.parse(obj)
-        return str(obj)
+    if isinstance(obj, (str, bytes, bytearray)):
+        if len(obj) <= MAX_VALIDATED_BODY_SIZE:
+            xmltodict.parse(bytes(obj) if isinstance(obj, bytearray) else obj)
+        return obj
     elif isinstance(obj, dict):
         obj_dict = obj
     elif isinstance(obj, APIBaseModel):
@@ -126,8 +183,29 @@ def to_xml(obj) -> str:
     return xmltodict.unparse(obj_dict)
 
 
+def to_text(obj) -> Union[str, bytes]:
+    """
+    Returns the plain text representation of the given object. Strings and
+    bytes are returned as is.
+    """
+    if isinstance(obj, (str, bytes, bytearray)):
+        return obj
+    return str(obj)
+
+
 SUPPORTED_REQUEST_CONTENT_TYPES = {
     'application/json': to_json,
     'application/xml': to_xml,
-    'text/plain': str,
+    'text/plain': to_text,
 }
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def request_converters(content_type: str) -> tuple:
+    """
+    Returns the functions from :data:`SUPPORTED_REQUEST_CONTENT_TYPES` that
+    can convert a request payload to the given Content-Type.
+    """
+    requested = get_content_type(content_type)
+    return tuple(conv_func for ct, conv_func in SUPPORTED_REQUEST_CONTENT_TYPES.items()
+                 if requested.is_compatible(get_content_type(ct)))
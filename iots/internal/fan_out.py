@@ -0,0 +1,110 @@
+from collections import deque
+from typing import Callable, List, Optional, Union
+
+from ..models import models
+from .concurrency import DEFAULT_MAX_WORKERS, map_unordered
+from .url import split_list_params
+
+LIST_FILTERS = ('thingID[]', 'category[]')
+""" Query parameters of the Things operations that are split if the URL is too long. """
+
+DEFAULT_PAGE_LIMIT = 50
+""" Number of Things per page returned by the API when no `limit` is given. """
+
+
+def split_list_filters(things, kwargs: dict) -> Optional[List[dict]]:
+    """
+    Returns the query parameters of each request needed to keep the URLs of a
+    Things operation within the maximum length of the API client, or None if
+    a single request is enough.
+
+    Sorted listings aren't split, since their merged results wouldn't be
+    sorted.
+    """
+    params = kwargs.get('params')
+    if not params or params.get('sort'):
+        return None
+
+    api = things._api()
+    return split_list_params(api.host + things._build_path(), params, LIST_FILTERS, api.max_url_length)
+
+
+def fan_out(operation: Callable, kwargs: dict, params_chunks: List[dict]) -> list:
+    """
+    Calls an operation with each set of query parameters concurrently, and
+    returns the responses in the same order.
+    """
+    def call(indexed_params):
+        index, params = indexed_params
+        return index, operation(**{**kwargs, 'params': params})
+
+    responses = dict(map_unordered(call, enumerate(params_chunks), max_workers=DEFAULT_MAX_WORKERS))
+    return [responses[i] for i in range(len(params_chunks))]
+
+
+def merge_thing_lists(pages: List[Union[models.ThingList, models.ErrorResponse]], limit: Optional[int]
+                       ) -> Union[models.ThingList, models.ErrorResponse]:
+    """
+    Merges the first pages of several Things queries into one paginated list,
+    which fetches the remaining pages of each query when it's iterated.
+
+    The Things are yielded once, even if several queries return them (e.g.
+    a Thing in two of the categories of a split `category[]` filter), and
+    every page has up to `limit` Things. The Things of each query keep their
+    order, but the queries are consumed one after another.
+    """
+    for page in pages:
+        if isinstance(page, models.ErrorResponse):
+            return page
+
+    limit = limit or DEFAULT_PAGE_LIMIT
+    pending = [page._pagination.iter_func for page in pages if page._pagination.iter_func]
+    buffer = deque()
+    seen = set()
+
+    def add(things: Optional[list]):
+        for thing in things or []:
+            if thing.uid is None or thing.uid not in seen:
+                seen.add(thing.uid)
+                buffer.append(thing)
+
+    def next_page() -> models.ThingList:
+        while len(buffer) < limit and pending:
+            page = pending[0]()
+            if page._pagination.iter_func:
+                pending[0] = page._pagination.iter_func
+            else:
+                pending.pop(0)
+            add(page.data)
+
+        data = [buffer.popleft() for _ in range(min(limit, len(buffer)))]
+        return _thing_list_page(data, next_page if buffer or pending else None)
+
+    for page in pages:
+        add(page.data)
+    merged = next_page()
+    merged._set_http_response(pages[0].http_response())
+    return merged
+
+
+def _thing_list_page(data: list, iter_func: Optional[Callable]) -> models.ThingList:
+    page = models.ThingList(data=data)
+    page._enable_pagination('data')
+    page._pagination.iter_func = iter_func
+    return page
+
+
+def merge_things_deleted(results: List[Union[models.ThingsDeleted, models.ErrorResponse]]
+                          ) -> Union[models.ThingsDeleted, models.ErrorResponse]:
+    """
+    Merges the IDs of the Things deleted by several requests, without
+    duplicates.
+    """
+    for result in results:
+        if isinstance(result, models.ErrorResponse):
+            return result
+
+    thing_ids = dict.fromkeys(thing_id for result in results for thing_id in result)
+    merged = models.ThingsDeleted.parse_obj(list(thing_ids))
+    merged._set_http_response(results[0].http_response())
+    return merged
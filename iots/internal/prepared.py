@@ -0,0 +1,114 @@
+from typing import Callable, Union
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from ..models.exceptions import APIException
+from .content_type import content_types_match, request_converters
+from .response import ResponseTable, compile_responses
+
+
+class PreparedOperation:
+    """
+    An API operation prepared to be called repeatedly with different payloads.
+
+    The request URL, the headers (including the Content-Type), the body
+    serializer and the expected responses are resolved once, when the
+    operation is prepared, so each call only serializes the payload, applies
+    the security strategy of the API client and sends the request.
+
+    Prepared operations are created with the `prepare_*()` methods of the
+    resources, e.g. :meth:`iots.apis.properties.Properties1.prepare_update`:
+
+    .. code-block:: python
+
+        update_temperature = api.spaces(s).things(t).properties("temperature").prepare_update()
+        for value in values:
+            update_temperature(value)
+
+    Changes made to the headers of the API client after the operation is
+    prepared are not applied to it.
+    """
+
+    def __init__(self, resource, method: str, req_content_types: list,
+                 expected_responses: Union[list, ResponseTable],
+                 serializer: Callable = None, params: dict = None,
+                 headers: dict = None, timeout: float = 3, auth: bool = True,
+                 verify: bool = None):
+        """
+        Prepares an operation of the given resource.
+
+        :param resource: The :class:`~iots.internal.resource.APIResource` of
+            the operation.
+        :param method: HTTP request method.
+        :param req_content_types: List of tuples with the supported
+            Content-Types of the request and the classes of the payload models.
+        :param expected_responses: The expected responses of the operation.
+        :param serializer: (optional) Function that returns the request body
+            for a payload. By default, the converter of the request
+            Content-Type is used.
+        :param params: (optional) Dictionary with the query parameters.
+        :param headers: (optional) Dictionary of HTTP headers to send.
+        :param timeout: (optional) How many seconds to wait for the server to
+            send data before giving up.
+        :param auth: (optional) Whether the authentication token will be sent
+            in the requests.
+        :param verify: (optional) If set as a boolean, it will override the API
+            verify value.
+        """
+        api = resource._api()
+
+        headers = CaseInsensitiveDict(headers)
+        content_type = _select_content_type(req_content_types, headers.get('content-type'))
+        if 'content-type' not in headers:
+            headers['Content-Type'] = content_type
+        headers = dict(headers)
+        headers.update(api.headers)
+
+        self.method = method
+        self.url = api.host + resource._build_path()
+        self.headers = headers
+        self.params = dict(params or {})
+        self.timeout = timeout
+        self.auth = auth
+        self.verify = api._verify if verify is None else verify
+
+        self._api = api
+        self._resource = resource
+        self._serialize = serializer or request_converters(content_type)[0]
+        self._responses = compile_responses(expected_responses)
+
+    def __call__(self, payload):
+        """
+        Sends the request with the given payload and returns the API response.
+
+        :param payload: The request payload.
+        """
+        body = self._serialize(payload)
+        headers = self.headers.copy()
+
+        if self.auth:
+            security_strategy = self._api._security_strategy
+            if not security_strategy:
+                raise APIException("No security strategy has been set")
+            req = requests.Request(self.method, self.url, headers=headers)
+            security_strategy.apply(req)
+            headers = req.headers
+
+        resp = self._api._send(self.method, self.url, self.params, headers, body,
+                               self.timeout, self.verify)
+        return self._resource._handle_response(resp, self._responses)
+
+    def __repr__(self):
+        return f"PreparedOperation({self.method} {self.url})"
+
+
+def _select_content_type(req_content_types: list, content_type: str = None) -> str:
+    """
+    Returns the request Content-Type used by a prepared operation: the given
+    one if it's supported, or the first supported Content-Type otherwise.
+    """
+    for supported, _ in req_content_types:
+        if content_type is None or content_types_match(supported, content_type):
+            return supported
+    raise ValueError(f"Unsupported request content type ({content_type})")
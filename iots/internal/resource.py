@@ -1,119 +1,149 @@
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, field
+from dataclasses import fields, is_dataclass
 from pyexpat import ExpatError
-from typing import Tuple, Union
+from typing import Iterator, Tuple, Union
 
 import requests
 from requests import HTTPError, PreparedRequest, Response
 from requests.structures import CaseInsensitiveDict
 
+from ..body import JSONArrayStream, RawBody, is_stream
 from ..models.basemodel import APIBaseModel
 from ..models.exceptions import ExceptionList, ResponseError
 from ..models.extensions.pagination import PaginationDescription
-from .content_type import (
-    SUPPORTED_REQUEST_CONTENT_TYPES,
-    content_types_compatible,
-    content_types_match,
-)
+from .content_type import content_types_compatible, content_types_match, request_converters
+from .response import ResponseTable, compile_responses, decoded_body_cache
 from .runtime_expr import evaluate, prepare_request
 
 
+_API = None
+
+
 def _is_api(obj):
-    from ..api import API
-    return isinstance(obj, API)
+    global _API
+    if _API is None:
+        from ..api import API
+        _API = API
+    return isinstance(obj, _API)
 
 
-@dataclass
 class APIResource(ABC):
     """
     Abstract class to represent a part of an API call.
     This must be inherited by any class implementing an API operation.
-    """
 
-    _stack: list = field(default_factory=list, init=False)
-    """
-    A list used to store the objects generated during a call chain.
-    This allows to access all the information needed to make an API request,
-    such as building the request URL.
-
-    Items in the stack can be:
-    - One (and only one) `API` instance. This must be the first item in the
-      stack.
-    - A number of `APIResource` building the request.
+    Resources are created in call chains (e.g. `api.spaces(s).things(t)`), and
+    each resource keeps a reference to the object it was created from (its
+    parent), so the chain is shared instead of copied at each step. The first
+    object in the chain must be an `API` instance, and the rest are
+    `APIResource` instances building the request.
+
+    Subclasses are dataclasses whose fields are the path parameters of the
+    resource. They should declare them in `__slots__`, so that resources are
+    lightweight.
     """
 
+    __slots__ = ('_parent', '_root', '_path')
+
+    _field_names_cache = {}
+
     @abstractmethod
     def _build_partial_path(self):
         pass
 
     def _with_stack(self, stack: list):
-        self._stack = stack
-        return self
+        """
+        Sets the parent of this instance to the last object of the given stack,
+        which must be an `API` instance followed by `APIResource` instances.
+        """
+        return self._child_of(stack[-1] if stack else None)
 
     def _child_of(self, obj):
         """
-        Sets the stack of this instance to a copy of the given `APIResource`
-        stack with the object itself added.
-        This method is used when a new `APIResource` instance is created from
-        another one.
+        Sets the given `API` or `APIResource` instance as the parent of this
+        instance. This method is used when a new `APIResource` instance is
+        created from another one.
         """
-        if _is_api(obj):
-            self._stack = [obj]
-        else:
-            self._stack = obj._stack.copy()
-            self._stack.append(obj)
+        self._parent = obj
+        self._root = obj._root if isinstance(obj, APIResource) else obj
+        self._path = None
         return self
 
-    def _build_url(self) -> str:
+    @property
+    def _stack(self) -> list:
         """
-        Builds and returns the URL using all the stack information.
-        The first item in the stack must be an `API` instance, and the rest
-        must be `APIResource` instances.
+        The list of objects in the call chain of this instance: the `API`
+        instance, followed by the `APIResource` instances building the
+        request. Kept for backwards compatibility.
         """
-        if len(self._stack) == 0 or not _is_api(self._stack[0]):
-            raise RuntimeError("API instance is missing in the stack")
+        stack = []
+        obj = getattr(self, '_parent', None)
+        while isinstance(obj, APIResource):
+            stack.append(obj)
+            obj = getattr(obj, '_parent', None)
+        if obj is not None:
+            stack.append(obj)
+        stack.reverse()
+        return stack
 
-        return self._stack[0].host.rstrip("/") + self._build_path()
+    def _build_url(self) -> str:
+        """
+        Builds and returns the URL using all the information in the chain.
+        """
+        return self._api().host.rstrip("/") + self._build_path()
 
     def _build_path(self) -> str:
         """
-        Builds the URL path using all the `APIResource` instances in the stack.
+        Builds the URL path using all the `APIResource` instances in the chain.
+        The path is computed once per instance.
         """
-        path = ""
-        for obj in self._stack:
-            if isinstance(obj, APIResource):
-                path = path + obj._build_partial_path()
-
-        return path + self._build_partial_path()
+        path = getattr(self, '_path', None)
+        if path is None:
+            parent = getattr(self, '_parent', None)
+            path = parent._build_path() if isinstance(parent, APIResource) else ""
+            path = self._path = path + self._build_partial_path()
+        return path
+
+    @classmethod
+    def _field_names(cls) -> tuple:
+        """
+        Returns the names of the path parameters of this resource class.
+        """
+        try:
+            return APIResource._field_names_cache[cls]
+        except KeyError:
+            names = tuple(f.name for f in fields(cls)) if is_dataclass(cls) else ()
+            APIResource._field_names_cache[cls] = names
+            return names
 
     def _path_value(self, path_param_name: str):
         """
         Returns the value of the given path parameter.
         """
-        if hasattr(self, path_param_name):
-            return getattr(self, path_param_name)
-
-        for r in self._stack[1:]:
-            if hasattr(r, path_param_name):
-                return getattr(r, path_param_name)
+        obj = self
+        while isinstance(obj, APIResource):
+            if path_param_name in obj._field_names():
+                return getattr(obj, path_param_name)
+            obj = getattr(obj, '_parent', None)
 
         return None
 
     def _path_values(self) -> dict:
         """
         Returns a dictionary with the values of all the path parameters of the
-        current stack.
+        current chain.
         """
-        values = {k: v for k, v in self.__dict__.items() if k != '_stack'}
-        for r in self._stack[1:]:
-            values.update({k: v for k, v in r.__dict__.items() if k != '_stack'})
+        values = {}
+        for r in self._stack[1:] + [self]:
+            values.update({k: getattr(r, k) for k in r._field_names()})
 
         return values
 
     def _api(self):
-        if len(self._stack) == 0 or not _is_api(self._stack[0]):
+        api = getattr(self, '_root', None)
+        if api is None or not _is_api(api):
             raise RuntimeError("API instance is missing in the stack")
-        return self._stack[0]
+        return api
 
     def _make_request(self, method="GET", body=None, req_content_types: list = None, **kwargs) -> Response:
         api = self._api()
@@ -123,75 +153,57 @@ class APIResource(ABC):
 
         return api.make_request(method, self._build_path(), body=body, **kwargs)
 
-    def _handle_response(self, response: requests.Response, expected_responses: list,
+    def _handle_response(self, response: requests.Response,
+                         expected_responses: Union[list, ResponseTable],
                          param_types: dict = None,
                          pagination_info: PaginationDescription = None):
-        default_status_code = 0
+        responses = compile_responses(expected_responses)
 
-        # Send default expected response to the end of the list
-        expected_responses = sorted(expected_responses, key=lambda x: x[0] == 0)
-
-        expected_status_codes = set([r[0] for r in expected_responses])
-        if (response.status_code not in expected_status_codes
-                and default_status_code not in expected_status_codes):
+        if not responses.accepts_status(response.status_code):
             raise ResponseError(response, f"Unexpected response status code ({response.status_code})")
 
         resp_content_type = response.headers.get('content-type')
-        for r in expected_responses:
-            code, content_type, resp_class = r
+        match = responses.lookup(response.status_code, resp_content_type)
+        if match is None:
+            raise ResponseError(response, f"Unexpected response content type ({resp_content_type})")
 
-            if not content_type:
+        resp_class, decode = match
+        with decoded_body_cache(response):
+            if decode is None:
                 ret = resp_class()
+            else:
+                ret = resp_class.parse_obj(decode(response))
 
-                ret._set_http_response(response)
+            ret._set_http_response(response, self._api().response_retention)
+            if response.ok:
+                # Error responses have no pagination data
                 self._handle_pagination(ret, response, pagination_info,
-                                        self._path_values(), param_types,
-                                        expected_responses)
-
-                return self._handle_error(ret)
+                                        param_types, responses)
 
-            if (code in [response.status_code, default_status_code]
-                    and content_types_match(resp_content_type, content_type)):
-                resp_payload = response.content
-                if resp_content_type.startswith('application/json'):
-                    resp_payload = response.json()
-                elif resp_content_type.startswith('application/xml'):
-                    import xmltodict
-                    resp_payload = xmltodict.parse(response.content)['root']
-                elif resp_content_type.startswith('text/plain'):
-                    resp_payload = resp_payload.decode('utf-8')
+        return self._handle_error(ret, response)
 
-                ret = resp_class.parse_obj(resp_payload)
-
-                ret._set_http_response(response)
-                self._handle_pagination(ret, response, pagination_info,
-                                        self._path_values(), param_types,
-                                        expected_responses)
-
-                return self._handle_error(ret)
-
-        raise ResponseError(response, f"Unexpected response content type ({resp_content_type})")
-
-    def _handle_error(self, ret):
-        api = self._stack[0]
+    def _handle_error(self, ret, response: Response):
+        api = self._api()
         if api._raise_errors:
             try:
-                ret.http_response().raise_for_status()
+                response.raise_for_status()
             except HTTPError as e:
-                raise ResponseError(ret, str(e))
+                raise ResponseError(ret, str(e), http_response=response)
 
         return ret
 
     def _handle_pagination(self, ret: APIBaseModel, resp: Response,
                            pagination_info: PaginationDescription,
-                           path_values: dict, params_info: dict,
-                           expected_responses: list):
+                           params_info: dict,
+                           expected_responses: ResponseTable):
         """
         Add metadata to the returned model object to allow handling pagination.
         """
         if pagination_info is None:
             return None
 
+        path_values = self._path_values()
+
         if params_info is None:
             params_info = {}
 
@@ -229,7 +241,45 @@ class APIResource(ABC):
         ret._pagination.iter_func = make_request
 
 
-def _validate_request_payload(body: Union[str, bytes, dict, APIBaseModel],
+def _raw_request_payload(body: RawBody, headers: dict) -> Tuple[Union[str, bytes, memoryview], dict]:
+    """
+    Returns the data of a pre-serialised body, without validating it, and the
+    headers with its Content-Type added if none is set.
+    """
+    headers = CaseInsensitiveDict(headers)
+    if 'content-type' not in headers:
+        headers['Content-Type'] = body.content_type
+    return body.data, dict(headers)
+
+
+def _stream_request_payload(body, req_content_types: list, headers: dict) -> tuple:
+    """
+    Returns the data of a streamed body, without validating it, and the
+    headers with the Content-Type of the operation added if none is set.
+
+    File-like objects are sent as is. Iterators of items are encoded as a JSON
+    array (see :class:`~iots.body.JSONArrayStream`) if the operation accepts
+    JSON, and sent as is otherwise.
+    """
+    headers = CaseInsensitiveDict(headers)
+    content_types = [content_type for content_type, _ in req_content_types or []]
+
+    is_file = callable(getattr(type(body), 'read', None))
+    if not isinstance(body, JSONArrayStream) and isinstance(body, Iterator) and not is_file:
+        if any(content_types_compatible(ct, 'application/json') for ct in content_types):
+            body = JSONArrayStream(body)
+
+    if isinstance(body, JSONArrayStream):
+        content_types = [ct for ct in content_types
+                         if content_types_compatible(ct, body.content_type)] or [body.content_type]
+        body = iter(body)
+
+    if 'content-type' not in headers and content_types:
+        headers['Content-Type'] = content_types[0]
+    return body, dict(headers)
+
+
+def _validate_request_payload(body: Union[str, bytes, dict, APIBaseModel, RawBody],
                               req_content_types: list, headers: dict) -> Tuple[str, dict]:
     """
     Tries to parse the request body into one of the supported pairs of
@@ -237,6 +287,8 @@ def _validate_request_payload(body: Union[str, bytes, dict, APIBaseModel],
     doesn't match any of the given expected types.
 
     If req_content_types is None or an empty list, this is a no-op.
+    Pre-serialised bodies (:class:`~iots.body.RawBody`) and streams are not
+    validated.
 
     :param body:              Payload of the request.
     :param req_content_types: List of tuples defining the supported types of the
@@ -249,6 +301,11 @@ def _validate_request_payload(body: Union[str, bytes, dict, APIBaseModel],
     :return:                  The body ready to be sent, and the headers with
                               the proper Content-Type added.
     """
+    if isinstance(body, RawBody):
+        return _raw_request_payload(body, headers)
+    if isinstance(body, JSONArrayStream) or is_stream(body):
+        return _stream_request_payload(body, req_content_types, headers)
+
     exceptions_raised = []
 
     if req_content_types:
@@ -256,7 +313,6 @@ def _validate_request_payload(body: Union[str, bytes, dict, APIBaseModel],
 
         # If Content-Type header is set, only that one is allowed
         headers = CaseInsensitiveDict(headers)
-        headers.items()
         expected_content_type = headers.get('content-type', None)
         if expected_content_type:
             content_type_defined = True
@@ -266,17 +322,16 @@ def _validate_request_payload(body: Union[str, bytes, dict, APIBaseModel],
         for content_type, request_class in req_content_types:
             # TODO: currently, request_class is not used, but it could be used
             #       to validate that the payload matches a given model
-            for ct, conv_func in SUPPORTED_REQUEST_CONTENT_TYPES.items():
-                if content_types_compatible(content_type, ct):
-                    try:
-                        body = conv_func(body)
-
-                        if not content_type_defined:
-                            # Set content type header
-                            headers['Content-Type'] = content_type
-                        return body, dict(headers)
-                    except (ValueError, ExpatError) as e:
-                        exceptions_raised.append(e)
+            for conv_func in request_converters(content_type):
+                try:
+                    body = conv_func(body)
+
+                    if not content_type_defined:
+                        # Set content type header
+                        headers['Content-Type'] = content_type
+                    return body, dict(headers)
+                except (ValueError, ExpatError) as e:
+                    exceptions_raised.append(e)
 
     if len(exceptions_raised) > 0:
         raise ExceptionList('Unexpected data format', exceptions_raised)
@@ -0,0 +1,169 @@
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Callable, Optional, Tuple, Union
+
+import xmltodict
+from requests import Response
+
+from ..models import models
+from ..models.exceptions import ResponseError
+from .content_type import ContentType, get_content_type
+
+DEFAULT_STATUS_CODE = 0
+""" Status code used in the expected responses to match any status code. """
+
+_DECODED_BODY_ATTR = '_iots_decoded_body'
+
+
+def response_json(response: Response):
+    """
+    Returns the decoded JSON body of a response. While the response is being
+    handled (see :func:`decoded_body_cache`), the body is decoded only once.
+    """
+    cache = response.__dict__.get(_DECODED_BODY_ATTR)
+    if cache is None:
+        return response.json()
+    try:
+        return cache['json']
+    except KeyError:
+        body = cache['json'] = response.json()
+        return body
+
+
+@contextmanager
+def decoded_body_cache(response: Response):
+    """
+    Context manager that keeps the decoded body of a response, so that
+    building the response model and evaluating the pagination expressions
+    decode it only once. The decoded body is released on exit, as the models
+    keep their own copy of the data.
+    """
+    if _DECODED_BODY_ATTR in response.__dict__:
+        # Already cached by an outer context
+        yield
+        return
+
+    response.__dict__[_DECODED_BODY_ATTR] = {}
+    try:
+        yield
+    finally:
+        del response.__dict__[_DECODED_BODY_ATTR]
+
+
+def _decode_json(response: Response):
+    return response_json(response)
+
+
+def _decode_xml(response: Response):
+    return xmltodict.parse(response.content)['root']
+
+
+def _decode_text(response: Response):
+    return response.content.decode('utf-8')
+
+
+def _decode_raw(response: Response):
+    return response.content
+
+
+def _decoder_for(content_type: ContentType) -> Callable[[Response], object]:
+    """
+    Returns the function used to decode a response body with the given
+    Content-Type.
+    """
+    media_type = content_type.media_type
+    if media_type.startswith('application/json'):
+        return _decode_json
+    elif media_type.startswith('application/xml'):
+        return _decode_xml
+    elif media_type.startswith('text/plain'):
+        return _decode_text
+    return _decode_raw
+
+
+class ResponseTable:
+    """
+    Precompiled lookup table with the expected responses of an API operation.
+
+    The expected responses are defined as a list of tuples with the status
+    code, the Content-Type and the class of the response model. A status code
+    of `0` matches any status code, and an empty Content-Type means that the
+    response has no body.
+
+    Responses are dispatched with a dictionary lookup keyed by status code and
+    Content-Type. The first time a pair is seen, it is resolved with the
+    expected responses and the result is cached.
+    """
+
+    max_cached_entries = 64
+    """ Maximum number of (status code, Content-Type) pairs cached. """
+
+    def __init__(self, expected_responses):
+        # Send default expected response to the end of the list
+        self.responses = tuple(sorted(expected_responses, key=lambda x: x[0] == DEFAULT_STATUS_CODE))
+        self._content_types = tuple(get_content_type(ct) if ct else None for _, ct, _ in self.responses)
+        self.status_codes = frozenset(r[0] for r in self.responses)
+        self._accepts_any_status = DEFAULT_STATUS_CODE in self.status_codes
+        self._dispatch = {}
+
+    def accepts_status(self, status_code: int) -> bool:
+        """
+        Returns whether the given status code is expected.
+        """
+        return self._accepts_any_status or status_code in self.status_codes
+
+    def lookup(self, status_code: int, content_type: Optional[str]) -> Optional[Tuple[type, Optional[Callable]]]:
+        """
+        Returns the response model class and the body decoder for the given
+        status code and Content-Type, or None if no expected response matches.
+        The decoder is None if the response has no body.
+        """
+        key = (status_code, content_type)
+        try:
+            return self._dispatch[key]
+        except KeyError:
+            pass
+
+        entry = self._resolve(status_code, content_type)
+        if len(self._dispatch) < self.max_cached_entries:
+            self._dispatch[key] = entry
+        return entry
+
+    def _resolve(self, status_code: int, content_type: Optional[str]):
+        received = get_content_type(content_type) if content_type is not None else None
+        for (code, _, resp_class), expected in zip(self.responses, self._content_types):
+            if expected is None:
+                return resp_class, None
+
+            if (received is not None
+                    and code in (status_code, DEFAULT_STATUS_CODE)
+                    and received == expected):
+                return resp_class, _decoder_for(received)
+
+        return None
+
+
+def compile_responses(expected_responses: Union[list, tuple, ResponseTable]) -> ResponseTable:
+    """
+    Returns the :class:`ResponseTable` for the given expected responses.
+    Tables are compiled once and reused for identical lists of expected
+    responses.
+    """
+    if isinstance(expected_responses, ResponseTable):
+        return expected_responses
+    return _compile_responses(tuple(expected_responses))
+
+
+@lru_cache(maxsize=256)
+def _compile_responses(expected_responses: tuple) -> ResponseTable:
+    return ResponseTable(expected_responses)
+
+
+def check_response(ret, msg: str):
+    """
+    Raises the error responses returned when the API client doesn't raise
+    them, so they are handled as the raised ones.
+    """
+    if isinstance(ret, models.ErrorResponse):
+        raise ResponseError(ret, msg)
+    return ret
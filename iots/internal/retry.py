@@ -0,0 +1,27 @@
+from typing import Optional
+
+import requests
+
+from ..models.exceptions import ResponseError
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Returns whether a request that failed with the given error can be retried:
+    connection errors, timeouts, 429 and 5xx responses.
+    """
+    if isinstance(error, requests.RequestException):
+        return True
+    if isinstance(error, ResponseError):
+        status_code = error_status_code(error)
+        return status_code is None or status_code == 429 or status_code >= 500
+    return False
+
+
+def error_status_code(error: ResponseError) -> Optional[int]:
+    """
+    Returns the HTTP status code of an error response, if the response is
+    available.
+    """
+    response = error.http_response()
+    return response.status_code if response is not None else None
@@ -1,11 +1,13 @@
 import json
 import re
-from functools import reduce
-from typing import Union
+from functools import lru_cache
+from typing import Callable, Union
 from urllib.parse import parse_qs, urlparse
 
 from requests import PreparedRequest, Request, Response
 
+from .response import response_json
+
 
 class RuntimeExpressionError(Exception):
     """ Invalid runtime expression. """
@@ -15,6 +17,12 @@ class RuntimeExpressionError(Exception):
         self.caused_by = caused_by
 
 
+CACHE_SIZE = 256
+""" Maximum number of compiled runtime expressions cached. """
+
+_TEMPLATE_RE = re.compile(r'{(\$[^}]+)}')
+
+
 def evaluate(resp: Union[dict, Response], expression: str, path_values: dict = None,
              query_param_types: dict = None, header_param_types: dict = None):
     """
@@ -41,92 +49,149 @@ def evaluate(resp: Union[dict, Response], expression: str, path_values: dict = N
     :return:            The result of the evaluated expression.
     """
     try:
-        expression = expression.strip()
+        return compile_expression(expression)(resp, path_values, query_param_types, header_param_types)
+    except RuntimeExpressionError as e:
+        raise e
+    except Exception as e:
+        raise RuntimeExpressionError(caused_by=e)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_expression(expression: str) -> Callable:
+    """
+    Compiles an expression accepted by :func:`evaluate` into a function that
+    evaluates it. The function takes the same arguments as :func:`evaluate`,
+    except the expression, and it raises the underlying exception if the
+    expression cannot be evaluated.
+
+    Compiled expressions are cached, so they are only parsed once.
+
+    :param expression: An OpenAPI runtime expression or a dot-separated expression.
+    :return: The function that evaluates the expression.
+    """
+    expression = expression.strip()
+
+    if '{' in expression:
+        return _compile_template(expression)
+
+    if expression.startswith('$'):
+        return _compile_runtime_expression(expression)
+
+    return _compile_body_getter(expression)
+
 
-        if '{' in expression:
-            def replace_group(match):
-                return str(_evaluate_runtime_expression(resp, match.group(1),
-                                                        path_values=path_values,
-                                                        query_param_types=query_param_types,
-                                                        header_param_types=header_param_types))
+def _compile_template(expression: str) -> Callable:
+    # Odd parts are the runtime expressions between braces
+    parts = _TEMPLATE_RE.split(expression)
+    getters = [(True, _compile_runtime_expression(part)) if i % 2 else (False, part)
+               for i, part in enumerate(parts)]
 
-            return re.sub(r'{(\$[^}]+)}', replace_group, expression)
+    def evaluate_template(resp, path_values=None, query_param_types=None, header_param_types=None):
+        return ''.join(str(part(resp, path_values, query_param_types, header_param_types))
+                       if is_expression else part
+                       for is_expression, part in getters)
 
-        if expression.startswith('$'):
-            return _evaluate_runtime_expression(resp, expression,
-                                                path_values=path_values,
-                                                query_param_types=query_param_types,
-                                                header_param_types=header_param_types)
+    return evaluate_template
 
+
+def _compile_body_getter(expression: str) -> Callable:
+    keys = expression.split('.')
+
+    def get_body_value(resp, path_values=None, query_param_types=None, header_param_types=None):
         if isinstance(resp, Response):
-            resp = resp.json()
+            resp = response_json(resp)
 
         if not isinstance(resp, dict):
             raise ValueError("Invalid dict response")
 
-        return _get_from_dict(resp, expression)
-    except RuntimeExpressionError as e:
-        raise e
-    except Exception as e:
-        raise RuntimeExpressionError(caused_by=e)
+        return _get_keys(resp, keys, expression)
 
+    return get_body_value
 
-def _evaluate_runtime_expression(resp: Response, expression: str,
-                                 path_values: dict = None,
-                                 query_param_types: dict = None,
-                                 header_param_types: dict = None):
-    """
-    Decodes the given runtime expression (according to
-    https://swagger.io/docs/specification/links/) and returns the evaluated value.
-    """
-    if header_param_types is not None:
-        header_param_types = {k.lower(): v for k, v in header_param_types.items()}
 
-    def to_string(obj):
-        return str(obj) if obj is not None else ''
+def _to_string(obj):
+    if obj is None:
+        return ''
+    if isinstance(obj, bytes):
+        return obj.decode('utf-8')
+    return str(obj)
+
 
-    def cast_value(name, value, type_dict):
-        if type_dict is not None and name in type_dict:
-            return type_dict[name](value)
+def _cast_value(name, value, type_dict):
+    if type_dict is not None and name in type_dict:
+        return type_dict[name](value)
+    return value
+
+
+def _cast_header_value(name, value, type_dict):
+    if type_dict is not None:
+        for k, v in type_dict.items():
+            if k.lower() == name:
+                return v(value)
+    return value
+
+
+def _get_query_string(resp: Response, name: str):
+    query_params = parse_qs(urlparse(resp.request.url).query)
+    value = query_params.get(name, [])
+    if len(value) == 0:
+        raise RuntimeExpressionError(f"Query parameter '{name}' not found")
+    elif len(value) == 1:
+        return value[0]
+    else:
         return value
 
-    def get_query_string(name):
-        parsed_url = urlparse(resp.request.url)
-        query_params = parse_qs(parsed_url.query)
-        value = query_params.get(name, [])
-        if len(value) == 0:
-            raise RuntimeExpressionError(f"Query parameter '{name}' not found")
-        elif len(value) == 1:
-            return value[0]
-        else:
-            return value
-
-    def get_path_value(name):
-        if path_values is not None and name in path_values:
-            return path_values[name]
-        raise RuntimeExpressionError(f"Path parameter '{name}' not found")
-
-    expression_funcs = {
-        '$url': lambda: resp.request.url,
-        '$method': lambda: resp.request.method,
-        '$request.query.*': lambda x: cast_value(x, get_query_string(x), query_param_types),
-        '$request.path.*': lambda x: get_path_value(x),
-        '$request.header.*': lambda x: cast_value(x, resp.request.headers.get(x), header_param_types),
-        '$request.body': lambda: to_string(resp.request.body),
-        '$request.body#/*': lambda x: _get_from_dict(json.loads(resp.request.body), x, '/'),
-        '$statusCode': lambda: resp.status_code,
-        '$response.header.*': lambda x: resp.headers.get(x),
-        '$response.body': lambda: resp.text,
-        '$response.body#/*': lambda x: _get_from_dict(resp.json(), x, '/'),
-    }
-
-    for expr, fn in expression_funcs.items():
+
+def _get_path_value(path_values: dict, name: str):
+    if path_values is not None and name in path_values:
+        return path_values[name]
+    raise RuntimeExpressionError(f"Path parameter '{name}' not found")
+
+
+# Getter factories of the runtime expressions, in the order in which they are
+# matched. Factories of expressions ending with `*` receive the rest of the
+# expression.
+_GETTER_FACTORIES = (
+    ('$url', lambda: lambda resp, p, q, h: resp.request.url),
+    ('$method', lambda: lambda resp, p, q, h: resp.request.method),
+    ('$request.query.*', lambda x: lambda resp, p, q, h: _cast_value(x, _get_query_string(resp, x), q)),
+    ('$request.path.*', lambda x: lambda resp, p, q, h: _get_path_value(p, x)),
+    ('$request.header.*', lambda x: lambda resp, p, q, h: _cast_header_value(x, resp.request.headers.get(x), h)),
+    ('$request.body', lambda: lambda resp, p, q, h: _to_string(resp.request.body)),
+    ('$request.body#/*', lambda x: _compile_pointer(x, lambda resp: json.loads(resp.request.body))),
+    ('$statusCode', lambda: lambda resp, p, q, h: resp.status_code),
+    ('$response.header.*', lambda x: lambda resp, p, q, h: resp.headers.get(x)),
+    ('$response.body', lambda: lambda resp, p, q, h: resp.text),
+    ('$response.body#/*', lambda x: _compile_pointer(x, response_json)),
+)
+
+
+def _compile_pointer(pointer: str, get_document: Callable) -> Callable:
+    keys = pointer.split('/')
+
+    def get_pointer_value(resp, path_values=None, query_param_types=None, header_param_types=None):
+        return _get_keys(get_document(resp), keys, pointer)
+
+    return get_pointer_value
+
+
+def _compile_runtime_expression(expression: str) -> Callable:
+    """
+    Compiles the given runtime expression (according to
+    https://swagger.io/docs/specification/links/) into a function that
+    returns its value.
+    """
+    return _match_expression(expression, _GETTER_FACTORIES)
+
+
+def _match_expression(expression: str, factories: tuple):
+    for expr, factory in factories:
         if expr.endswith('*'):
             expr_prefix = expr.rstrip('*')
             if expression.startswith(expr_prefix):
-                return fn(expression[len(expr_prefix):])
+                return factory(expression[len(expr_prefix):])
         if expr == expression:
-            return fn()
+            return factory()
 
     raise RuntimeExpressionError("invalid runtime expression")
 
@@ -147,28 +212,12 @@ def prepare_request(req: Union[PreparedRequest, Request], expression: str, value
     :param value:       The value to set in the request.
     """
     try:
-        expression = expression.strip()
-
         if isinstance(req, Request):
             req = req.prepare()
         elif not isinstance(req, PreparedRequest):
             raise ValueError(f"Unexpected type '{type(req)}'")
 
-        if expression.startswith('$'):
-            _set_expression_value(req, expression, value)
-            return req
-
-        if expression:
-            if req.body:
-                body = json.loads(req.body)
-            else:
-                body = {}
-
-            _set_in_dict(body, expression, value)
-        else:
-            body = value
-
-        req.prepare_body(None, None, json=body)
+        compile_setter(expression)(req, value)
         return req
 
     except RuntimeExpressionError as e:
@@ -177,50 +226,72 @@ def prepare_request(req: Union[PreparedRequest, Request], expression: str, value
         raise RuntimeExpressionError(caused_by=e)
 
 
-def _set_expression_value(req: PreparedRequest, expression: str, value):
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_setter(expression: str) -> Callable:
     """
-    Decodes the given runtime expression (according to
-    https://swagger.io/docs/specification/links/) and applies the given value
-    to the corresponding field.
+    Compiles an expression accepted by :func:`prepare_request` into a function
+    that takes a :class:`requests.PreparedRequest` and a value, and sets the
+    value in the request.
+
+    Compiled expressions are cached, so they are only parsed once.
+
+    :param expression: An OpenAPI runtime expression or a dot-separated expression.
+    :return: The function that sets the value.
     """
+    expression = expression.strip()
 
-    def set_query_param(name):
-        parsed_url = urlparse(req.url)
-        query_params = parse_qs(parsed_url.query)
-        query_params[name] = value
-        parsed_url = parsed_url._replace(query=None)
-        req.prepare_url(parsed_url.geturl(), query_params)
-
-    expression_funcs = {
-        '$url': lambda: req.prepare_url(value, None),
-        '$method': lambda: req.prepare_method(value),
-        '$request.query.*': lambda x: set_query_param(x),
-        '$request.header.*': lambda x: req.headers.__setitem__(x, value),
-        '$request.body': lambda: req.prepare_body(None, None, value),
-        '$request.body#/*': lambda x: req.prepare_body(None, None,
-                                                       _set_in_dict(json.loads(req.body or '{}'),
-                                                                    x, value, '/')),
-    }
-
-    for expr, fn in expression_funcs.items():
-        if expr.endswith('*'):
-            expr_prefix = expr.rstrip('*')
-            if expression.startswith(expr_prefix):
-                return fn(expression[len(expr_prefix):])
-        if expr == expression:
-            return fn()
+    if expression.startswith('$'):
+        return _match_expression(expression, _SETTER_FACTORIES)
 
-    raise RuntimeExpressionError("invalid runtime expression")
+    if expression:
+        def set_body_value(req: PreparedRequest, value):
+            body = json.loads(req.body) if req.body else {}
+            _set_in_dict(body, expression, value)
+            req.prepare_body(None, None, json=body)
+    else:
+        def set_body_value(req: PreparedRequest, value):
+            req.prepare_body(None, None, json=value)
+
+    return set_body_value
+
+
+def _set_query_param(req: PreparedRequest, name: str, value):
+    parsed_url = urlparse(req.url)
+    query_params = parse_qs(parsed_url.query)
+    query_params[name] = value
+    parsed_url = parsed_url._replace(query=None)
+    req.prepare_url(parsed_url.geturl(), query_params)
+
+
+# Setter factories of the runtime expressions that can be applied to a
+# request, in the order in which they are matched.
+_SETTER_FACTORIES = (
+    ('$url', lambda: lambda req, value: req.prepare_url(value, None)),
+    ('$method', lambda: lambda req, value: req.prepare_method(value)),
+    ('$request.query.*', lambda x: lambda req, value: _set_query_param(req, x, value)),
+    ('$request.header.*', lambda x: lambda req, value: req.headers.__setitem__(x, value)),
+    ('$request.body', lambda: lambda req, value: req.prepare_body(None, None, value)),
+    ('$request.body#/*', lambda x: lambda req, value: req.prepare_body(
+        None, None, _set_in_dict(json.loads(req.body or '{}'), x, value, '/'))),
+)
 
 
 def _get_from_dict(d: dict, key: str, separator='.'):
-    try:
-        def get_item(a, b):
-            if isinstance(a, list):
-                b = int(b)
-            return a[b]
+    return _get_keys(d, key.split(separator), key)
+
 
-        return reduce(get_item, key.split(separator), d)
+def _get_keys(d: dict, keys: list, key: str):
+    """
+    Returns the value addressed by the given keys in nested dictionaries and
+    lists. `key` is the original expression, used in the error messages.
+    """
+    try:
+        value = d
+        for k in keys:
+            if isinstance(value, list):
+                k = int(k)
+            value = value[k]
+        return value
     except KeyError:
         raise KeyError(f"Key '{key}' not found")
     except IndexError:
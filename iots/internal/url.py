@@ -0,0 +1,67 @@
+from typing import Iterable, List, Optional
+from urllib.parse import urlencode
+
+DEFAULT_MAX_URL_LENGTH = 4096
+""" Default maximum length of the request URLs, including the query string. """
+
+
+def url_length(url: str, params: dict) -> int:
+    """
+    Returns the length of a URL with the given query parameters, encoded as
+    `requests` does (list values are repeated parameters).
+    """
+    if not params:
+        return len(url)
+    return len(url) + 1 + len(urlencode(params, doseq=True))
+
+
+def split_list_params(url: str, params: Optional[dict], names: Iterable[str],
+                      max_length: int = DEFAULT_MAX_URL_LENGTH) -> Optional[List[dict]]:
+    """
+    Splits the list values of the given query parameters, so that every
+    request URL is at most `max_length` characters long.
+
+    The longest lists are split first, in chunks that fill the URL with the
+    rest of the parameters. A value that doesn't fit alone is sent alone.
+
+    :param url: The request URL, without query string.
+    :param params: The query parameters.
+    :param names: The names of the list parameters that can be split.
+    :param max_length: (optional) Maximum length of the URLs.
+    :return: The parameters of each request, or None if the URL isn't too
+        long (or can't be split).
+    """
+    if not params or url_length(url, params) <= max_length:
+        return None
+
+    names = [name for name in names if isinstance(params.get(name), (list, tuple))]
+    names.sort(key=lambda name: url_length('', {name: params[name]}), reverse=True)
+
+    chunks = [params]
+    for name in names:
+        if all(url_length(url, chunk) <= max_length for chunk in chunks):
+            break
+
+        split = []
+        for chunk in chunks:
+            rest = {k: v for k, v in chunk.items() if k != name}
+            # Each value adds "&name=value" (or "?name=value") to the URL
+            budget = max_length - url_length(url, rest)
+            split.extend({**rest, name: values} for values in _chunk_values(name, chunk[name], budget))
+        chunks = split
+
+    # A single value that doesn't fit can't be split
+    return chunks if len(chunks) > 1 else None
+
+
+def _chunk_values(name: str, values: list, budget: int) -> Iterable[list]:
+    chunk, size = [], 0
+    for value in values:
+        value_size = len(urlencode({name: value})) + 1
+        if chunk and size + value_size > budget:
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(value)
+        size += value_size
+    if chunk:
+        yield chunk
@@ -1 +1,6 @@
 from .models import *
+from .timestamps import add_timestamp_validator as _add_timestamp_validator
+
+_add_timestamp_validator(EventValue, 'timestamp')
+_add_timestamp_validator(ActionValue, 'timeRequested', 'timeCompleted')
+_add_timestamp_validator(PropertyHistoryValue, 'at')
@@ -1,3 +1,4 @@
+from enum import Enum
 from functools import reduce
 from typing import Optional, Union
 
@@ -128,6 +129,53 @@ class IterBaseModel(BaseModel):
             return self.__iter__()
 
 
+class ResponseRetention(str, Enum):
+    """
+    Defines how much of the HTTP response is kept in the models returned by
+    the API.
+    """
+
+    FULL = 'full'
+    """ The whole :class:`requests.Response` is kept (default). """
+
+    HEADERS = 'headers'
+    """
+    Only the status code, headers and URL are kept. The response content and
+    the request are dropped.
+    """
+
+    NONE = 'none'
+    """ The HTTP response is not kept. """
+
+
+def retain_response(response: Optional[requests.Response],
+                    retention: Union[ResponseRetention, str] = ResponseRetention.FULL
+                    ) -> Optional[requests.Response]:
+    """
+    Returns the part of the given response that must be kept according to the
+    retention policy.
+
+    :param response:  The HTTP response.
+    :param retention: The retention policy.
+    :return: The same response, a copy of it without the content and the
+             request, or None.
+    """
+    retention = ResponseRetention(retention)
+    if response is None or retention == ResponseRetention.FULL:
+        return response
+    if retention == ResponseRetention.NONE:
+        return None
+
+    stripped = requests.Response()
+    stripped.status_code = response.status_code
+    stripped.headers = response.headers
+    stripped.url = response.url
+    stripped.reason = response.reason
+    stripped.encoding = response.encoding
+    stripped.elapsed = response.elapsed
+    return stripped
+
+
 class HTTPResponseModel(BaseModel):
     """
     Extends :class:`pydantic.BaseModel` to allow embedding a requests.Response
@@ -135,12 +183,17 @@ class HTTPResponseModel(BaseModel):
     """
     _http_response: requests.Response = PrivateAttr(None)
 
-    def _set_http_response(self, response):
-        object.__setattr__(self, '_http_response', response)
+    def _set_http_response(self, response,
+                           retention: Union[ResponseRetention, str] = ResponseRetention.FULL):
+        object.__setattr__(self, '_http_response', retain_response(response, retention))
 
-    def http_response(self):
+    def http_response(self) -> Optional[requests.Response]:
         """
         Returns the HTTP response of this model instance.
+
+        Depending on the :class:`ResponseRetention` policy of the API, this
+        can be the full response, a response with only the status code,
+        headers and URL, or None.
         """
         return self._http_response
 
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import numbers
+from datetime import timezone
+from typing import Dict, Iterable, List, Union
+
+from .models import PropertyHistoryValue, PropertyHistoryValueList, PropertyHistoryValues
+from .timestamps import parse_timestamps_datetime64
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("numpy is required to use columnar Properties history values "
+                          "(install it with 'pip install iots[columnar]')")
+
+
+class PropertyHistoryColumns:
+    """
+    Columnar representation of a list of Properties history values.
+
+    Instead of one :class:`~iots.models.models.PropertyHistoryValue` per
+    sample, the timestamps are stored in a NumPy `datetime64[us]` array (in
+    UTC) and the values of each Property in a typed NumPy array with a
+    validity mask, as not every sample has a value for every Property.
+
+    Property arrays use the `bool`, `int64` or `float64` dtypes when all their
+    values have that type, and the `object` dtype otherwise.
+
+    This class requires `numpy` to be installed.
+    """
+
+    def __init__(self, at: 'np.ndarray', values: Dict[str, 'np.ndarray'] = None,
+                 valid: Dict[str, 'np.ndarray'] = None):
+        """
+        Creates a new instance from already built arrays.
+
+        :param at:     Array with the timestamps of the samples.
+        :param values: Dictionary with the array of values of each Property.
+        :param valid:  Dictionary with the validity mask of each Property.
+        """
+        _require_numpy()
+        self.at = np.asarray(at, dtype='datetime64[us]')
+        self.values = values or {}
+        self.valid = valid or {}
+
+        for name, column in self.values.items():
+            if len(column) != len(self.at) or len(self.valid[name]) != len(self.at):
+                raise ValueError(f"Property '{name}' has a different length than the timestamps")
+
+    @classmethod
+    def from_models(cls, values: Union[PropertyHistoryValues, PropertyHistoryValueList,
+                                       Iterable[PropertyHistoryValue]]) -> PropertyHistoryColumns:
+        """
+        Creates a new instance from Properties history models.
+
+        If a paginated :class:`~iots.models.models.PropertyHistoryValueList`
+        is given, all its pages will be fetched.
+
+        :param values: The Properties history values.
+        """
+        return cls._from_samples((v.at, v.properties.__root__ or {}) for v in values)
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict]) -> PropertyHistoryColumns:
+        """
+        Creates a new instance from decoded JSON Properties history values
+        (dictionaries with the `at` and `properties` attributes), without
+        creating a model instance per sample.
+
+        :param records: The Properties history values.
+        """
+        return cls._from_samples((r['at'], r['properties']) for r in records)
+
+    @classmethod
+    def _from_samples(cls, samples: Iterable[tuple]) -> PropertyHistoryColumns:
+        _require_numpy()
+        at = []
+        columns = {}
+        for i, (timestamp, properties) in enumerate(samples):
+            at.append(timestamp)
+            for name, value in properties.items():
+                column = columns.get(name)
+                if column is None:
+                    column = columns[name] = ([], [])
+                column[0].append(i)
+                column[1].append(value)
+
+        values, valid = {}, {}
+        for name, (indexes, column_values) in columns.items():
+            values[name], valid[name] = _typed_column(len(at), indexes, column_values)
+
+        return cls(parse_timestamps_datetime64(at), values, valid)
+
+    def to_models(self) -> PropertyHistoryValues:
+        """
+        Returns the values as a :class:`~iots.models.models.PropertyHistoryValues`
+        model.
+        """
+        return PropertyHistoryValues.parse_obj(self.to_records())
+
+    def to_records(self) -> List[dict]:
+        """
+        Returns the values as a list of dictionaries with the `at` and
+        `properties` attributes. Missing timestamps (`NaT`) are returned as
+        None.
+        """
+        records = [{'at': at.replace(tzinfo=timezone.utc) if at is not None else None, 'properties': {}}
+                   for at in self.at.tolist()]
+        for name, column in self.values.items():
+            for record, value, valid in zip(records, column.tolist(), self.valid[name].tolist()):
+                if valid:
+                    record['properties'][name] = value
+        return records
+
+    @property
+    def names(self) -> List[str]:
+        """ The names of the Properties. """
+        return list(self.values)
+
+    def column(self, name: str) -> 'np.ma.MaskedArray':
+        """
+        Returns the values of a Property as a masked array, where the samples
+        without a value for the Property are masked.
+
+        :param name: The Property name.
+        """
+        return np.ma.MaskedArray(self.values[name], mask=~self.valid[name])
+
+    def between(self, start=None, end=None) -> PropertyHistoryColumns:
+        """
+        Returns the samples recorded in the `[start, end)` time range.
+
+        :param start: (optional) Start of the range, as a datetime, an ISO 8601
+            string or a `numpy.datetime64`. If omitted, the range is open.
+        :param end:   (optional) End of the range (excluded). If omitted, the
+            range is open.
+        """
+        mask = np.ones(len(self.at), dtype=bool)
+        if start is not None:
+            mask &= self.at >= parse_timestamps_datetime64([start])[0]
+        if end is not None:
+            mask &= self.at < parse_timestamps_datetime64([end])[0]
+        return self[mask]
+
+    def sorted(self, descending: bool = False) -> PropertyHistoryColumns:
+        """
+        Returns the samples sorted by timestamp.
+
+        :param descending: (optional) Whether to sort the samples from the most
+            recent to the oldest one.
+        """
+        order = np.argsort(self.at, kind='stable')
+        if descending:
+            order = order[::-1]
+        return self[order]
+
+    def __len__(self):
+        return len(self.at)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.column(key)
+        if isinstance(key, numbers.Integral):
+            key = [key]
+
+        return PropertyHistoryColumns(self.at[key],
+                                      {name: column[key] for name, column in self.values.items()},
+                                      {name: valid[key] for name, valid in self.valid.items()})
+
+    def __repr__(self):
+        return f"PropertyHistoryColumns(samples={len(self)}, properties={self.names})"
+
+
+def _typed_column(length: int, indexes: list, values: list) -> tuple:
+    """
+    Returns the array of values and the validity mask of a Property.
+    """
+    if all(type(v) is bool for v in values):
+        dtype, fill = bool, False
+    elif all(type(v) is int for v in values) and all(-2 ** 63 <= v < 2 ** 63 for v in values):
+        dtype, fill = np.int64, 0
+    elif all(type(v) in (int, float) for v in values):
+        dtype, fill = np.float64, np.nan
+    else:
+        dtype, fill = object, None
+
+    column = np.full(length, fill, dtype=dtype)
+    valid = np.zeros(length, dtype=bool)
+    if dtype is object:
+        for i, v in zip(indexes, values):
+            column[i] = v
+    else:
+        column[indexes] = values
+    valid[indexes] = True
+    return column, valid
@@ -10,7 +10,7 @@ class APIException(Exception):
 class ResponseError(APIException):
     """ Client or server error response. """
 
-    def __init__(self, error, *attr):
+    def __init__(self, error, *attr, http_response: Response = None):
         super().__init__(*attr)
         if isinstance(error, Response):
             self._http_response = error
@@ -18,6 +18,9 @@ class ResponseError(APIException):
             self.error = error
             self._http_response = error.http_response()
 
+        if http_response is not None:
+            self._http_response = http_response
+
     def http_response(self) -> Response:
         return self._http_response
 
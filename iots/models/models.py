@@ -605,7 +605,7 @@ class PostAPICursor(APIBaseModel):
         None,
         description='Maximum number of result documents to be transferred from\nthe server to the client in one roundtrip. If this attribute is\nnot set, a server-controlled default value will be used. A *batchSize* value of\n*0* is disallowed.\n',
     )
-    bindVars: Optional[List[Dict[str, Any]]] = Field(
+    bindVars: Optional[Dict[str, Any]] = Field(
         None, description='Key/value pairs representing the bind parameters.\n'
     )
     cache: Optional[bool] = Field(
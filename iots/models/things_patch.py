@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from typing import List, Optional
+
+from pydantic import Field
+
+from .basemodel import APIBaseModel
+from .models import Results, ThingPatch
+
+
+class ThingsPatchItem(APIBaseModel):
+    """
+    Item of a request that patches multiple Things.
+
+    The generated :class:`~iots.models.models.ThingsPatchItem` expects a list
+    of JSON Patches instead of a single one.
+    """
+    id: Optional[str] = Field(None, description='ID of the Thing.')
+    patch: Optional[ThingPatch] = Field(
+        None, description='Patch to apply to the Thing.'
+    )
+
+
+class ThingsPatch(APIBaseModel):
+    __root__: List[ThingsPatchItem] = Field(
+        ..., description='A JSON Patch request to apply to multiple Things.'
+    )
+
+
+class ThingsPatchMultiStatus(APIBaseModel):
+    """
+    Multi-status response of a request that patches multiple Things.
+
+    The generated :class:`~iots.models.models.ThingsPatchMultiStatus` expects
+    a single result instead of one for each item.
+    """
+    has_errors: Optional[List[int]] = Field(
+        None, description='List of indexes of the items that have errors.'
+    )
+    results: Optional[List[Results]] = Field(
+        None, description='List of results for each item.'
+    )
@@ -0,0 +1,154 @@
+import re
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+from pydantic.class_validators import Validator
+from pydantic.datetime_parse import parse_datetime
+
+_TIMESTAMP_RE = re.compile(
+    r'(\d{4})-(\d{1,2})-(\d{1,2})[T ](\d{1,2}):(\d{1,2})'
+    r'(?::(\d{1,2})(?:\.(\d{1,6})\d{0,6})?)?'
+    r'(Z|[+-]\d{2}(?::?\d{2})?)?$'
+)
+
+_UTC_SUFFIXES = ('Z', '+0000', '+00:00')
+
+CACHE_SIZE = 8192
+""" Maximum number of parsed timestamps cached. """
+
+
+def parse_timestamp(value):
+    """
+    Parses an ISO 8601 timestamp into a datetime.
+
+    This is a fast path for the timestamp formats returned by the API (e.g.
+    `2022-08-22T13:10:00.123Z` or `2022-06-02 15:37:46+0000`) that returns
+    the same values as the pydantic datetime parser. Parsed strings are cached,
+    so repeated timestamps (e.g. grouped Properties history values) are only
+    parsed once. Any other value is returned as is, to be handled by pydantic.
+
+    :param value: The value to parse.
+    :return: The parsed datetime, or the given value.
+    """
+    if isinstance(value, str):
+        return _parse_timestamp_str(value)
+    return value
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _parse_timestamp_str(value: str):
+    match = _TIMESTAMP_RE.match(value)
+    if match is None:
+        return value
+
+    year, month, day, hour, minute, second, microsecond, tz = match.groups()
+    if microsecond:
+        microsecond = int(microsecond.ljust(6, '0'))
+
+    try:
+        return datetime(int(year), int(month), int(day), int(hour), int(minute),
+                        int(second or 0), microsecond or 0, _parse_timezone(tz))
+    except ValueError:
+        # Let pydantic raise its own validation error
+        return value
+
+
+@lru_cache(maxsize=64)
+def _parse_timezone(value):
+    if value is None:
+        return None
+    if value == 'Z':
+        return timezone.utc
+
+    offset_mins = int(value[-2:]) if len(value) > 3 else 0
+    offset = 60 * int(value[1:3]) + offset_mins
+    if value[0] == '-':
+        offset = -offset
+    return timezone(timedelta(minutes=offset))
+
+
+def timestamp_validator(value):
+    """
+    Pydantic pre-validator that parses timestamps with :func:`parse_timestamp`.
+    """
+    return parse_timestamp(value)
+
+
+def add_timestamp_validator(model, *fields: str):
+    """
+    Adds :func:`timestamp_validator` as a pre-validator of the given datetime
+    fields of a model, so that the generated models can use the fast path
+    without being edited.
+
+    :param model: The model class.
+    :param fields: The names of the fields.
+    """
+    for name in fields:
+        field = model.__fields__[name]
+        field.class_validators['_parse_timestamp'] = Validator(timestamp_validator, pre=True)
+        field.populate_validators()
+
+
+def format_timestamp(value: datetime) -> str:
+    """
+    Returns a datetime as an ISO 8601 string in UTC with milliseconds (e.g.
+    `2022-08-22T13:10:00.000Z`), as accepted by the API. Naive datetimes are
+    considered to be in UTC.
+    """
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+
+def parse_timestamps_datetime64(values: list):
+    """
+    Parses a list of timestamps (ISO 8601 strings or datetimes) into a NumPy
+    `datetime64[us]` array in UTC.
+
+    When all the values are UTC strings, they are parsed by NumPy in one go.
+    Otherwise, each value is parsed with :func:`parse_timestamp`. This
+    function requires `numpy` to be installed.
+
+    :param values: The timestamps to parse.
+    :return: A `datetime64[us]` array.
+    """
+    import numpy as np
+
+    naive = _strip_utc_suffixes(values)
+    if naive is not None:
+        try:
+            return np.array(naive, dtype='datetime64[us]')
+        except ValueError:
+            pass
+
+    epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    microsecond = timedelta(microseconds=1)
+    micros = np.empty(len(values), dtype=np.int64)
+    for i, ts in enumerate(values):
+        if isinstance(ts, np.datetime64):
+            micros[i] = ts.astype('datetime64[us]').astype(np.int64)
+            continue
+        if not isinstance(ts, datetime):
+            ts = parse_datetime(parse_timestamp(ts))
+        if ts.tzinfo is None:
+            ts = ts.replace(tzinfo=timezone.utc)
+        micros[i] = (ts - epoch) // microsecond
+    return micros.astype('datetime64[us]')
+
+
+def _strip_utc_suffixes(values: list):
+    """
+    Returns the given timestamps without their UTC suffix, or None if any of
+    them is not a full UTC timestamp string.
+    """
+    naive = []
+    for v in values:
+        if not isinstance(v, str) or len(v) < 17 or v[10] not in 'T ':
+            return None
+        for suffix in _UTC_SUFFIXES:
+            if v.endswith(suffix):
+                naive.append(v[:-len(suffix)])
+                break
+        else:
+            return None
+    return naive
@@ -1,11 +1,36 @@
+import random
+import threading
 import time
 from abc import ABC, abstractmethod
-from typing import List
+from enum import Enum
+from typing import List, Optional
 
 import requests
 from requests import Request
 
 from .models.exceptions import ResponseError
+from .token_store import TokenStore
+
+
+class TokenFetch(str, Enum):
+    """
+    When the access token of a security strategy with token exchange is
+    retrieved by the :class:`~iots.api.API` class.
+    """
+
+    EAGER = 'eager'
+    """ The token is retrieved when the security strategy is set (blocking). """
+
+    LAZY = 'lazy'
+    """ The token is retrieved by the first authenticated request. """
+
+    BACKGROUND = 'background'
+    """
+    The token is retrieved in a background thread when the security strategy
+    is set. Authenticated requests wait for it if it's still in progress. If
+    it fails, the error is kept in the `prefetch_error` attribute of the
+    strategy, and the first authenticated request retrieves the token again.
+    """
 
 
 class SecurityStrategy(ABC):
@@ -82,6 +107,12 @@ class SecurityStrategyWithTokenExchange(SecurityStrategy):
     other token-based authentication mechanisms.
     """
 
+    prefetch_error: Optional[Exception] = None
+    """
+    The error raised when the token was retrieved in the background (see
+    :attr:`TokenFetch.BACKGROUND`), or None if it succeeded.
+    """
+
     @abstractmethod
     def set_token_url_host(self, token_url_host: str):
         """
@@ -128,6 +159,26 @@ class SecurityStrategyWithTokenExchange(SecurityStrategy):
         """
         pass
 
+    def set_session(self, session: Optional[requests.Session]):
+        """
+        Set the session used to make the requests to the token server, so that
+        they reuse the connections of the API requests.
+
+        Subclasses that make requests to the token server should override this
+        method. The default implementation does nothing.
+
+        :param session: The session, or None to not use any session.
+        """
+        pass
+
+    def ensure_token(self):
+        """
+        Retrieve a token from the server, unless a valid one is already held.
+
+        The default implementation always calls :meth:`get_token`.
+        """
+        self.get_token()
+
 
 class AccessToken(SecurityStrategy):
     """
@@ -172,6 +223,76 @@ class AccessToken(SecurityStrategy):
         self._token = ''
 
 
+class _TokenRenewer(threading.Thread):
+    """
+    Daemon thread that renews the access token of an
+    :class:`OAuth2ClientCredentials` instance before it expires.
+
+    The token is renewed `renew_before` seconds (plus a random jitter of up to
+    `jitter` seconds) before the inline refresh would happen, but never before
+    half of its lifetime has elapsed, so that short-lived tokens aren't renewed
+    over and over as soon as they are issued. If the renewal
+    fails, it is retried with exponential backoff until the token enters the
+    inline refresh window, where the requests refresh it as usual.
+    """
+
+    min_retry_interval = 1
+    """ Seconds to wait before the first retry of a failed renewal. """
+
+    max_retry_interval = 60
+    """ Maximum number of seconds to wait between retries. """
+
+    def __init__(self, strategy: 'OAuth2ClientCredentials', renew_before: float, jitter: float):
+        super().__init__(name='iots-token-renewer', daemon=True)
+        self._strategy = strategy
+        self._renew_before = renew_before
+        self._jitter = jitter
+        self._stopped = threading.Event()
+
+    def stop(self):
+        self._stopped.set()
+
+    def run(self):
+        while not self._stopped.is_set():
+            expires_at = self._strategy.expires_at
+            renew_at = self._renew_at(expires_at)
+            if self._stopped.wait(max(0.0, renew_at - time.time())):
+                break
+            if not self._renew(expires_at):
+                # Wait for the requests to refresh the token by themselves
+                self._stopped.wait(self.min_retry_interval)
+
+    def _renew_at(self, expires_at: float) -> float:
+        renew_at = expires_at - self._strategy.refresh_threshold - self._renew_before
+        renew_at -= random.uniform(0, self._jitter)
+        return max(renew_at, expires_at - self._strategy.expires_in / 2)
+
+    def _renew(self, expires_at: float) -> bool:
+        """
+        Renews the token that expires at `expires_at`, retrying on failure.
+        Returns whether the token has been renewed, by this thread or any other.
+        """
+        strategy = self._strategy
+        retry_interval = self.min_retry_interval
+        while not self._stopped.is_set():
+            if strategy.expires_at != expires_at:
+                return True
+            # Stop trying once the requests would refresh the token by themselves
+            if strategy._needs_refresh():
+                return False
+            try:
+                with strategy._token_lock:
+                    if strategy.expires_at == expires_at and not self._stopped.is_set():
+                        strategy._exchange_token()
+                return True
+            except Exception:
+                pass
+
+            self._stopped.wait(retry_interval)
+            retry_interval = min(2 * retry_interval, self.max_retry_interval)
+        return False
+
+
 class OAuth2ClientCredentials(SecurityStrategyWithTokenExchange):
     """
     Security strategy for handling OAuth2 client credentials authentication.
@@ -201,6 +322,12 @@ class OAuth2ClientCredentials(SecurityStrategyWithTokenExchange):
     :type revoke_token_url: str
     :param refresh_threshold: The number of seconds before token expiration to trigger token refresh.
     :type refresh_threshold: int
+    :param background_refresh: Whether to renew the access token in a background thread.
+    :type background_refresh: bool
+    :param token_store: The store used to share the access token with other clients (optional).
+    :type token_store: TokenStore
+    :param timeout: How many seconds to wait for the token server.
+    :type timeout: float
     """
 
     def __init__(self, client_id: str, client_secret: str,
@@ -208,7 +335,12 @@ class OAuth2ClientCredentials(SecurityStrategyWithTokenExchange):
                  token_url: str = 'https://api.swx.altairone.com/oauth2/token',
                  revoke_token_url: str = '',
                  refresh_threshold: int = 10,
-                 verify: bool = True):
+                 verify: bool = True,
+                 background_refresh: bool = False,
+                 renew_before: float = 60,
+                 renew_jitter: float = 30,
+                 token_store: TokenStore = None,
+                 timeout: float = 10):
         """
         Initialize OAuth2ClientCredentials with the provided parameters.
 
@@ -219,6 +351,20 @@ class OAuth2ClientCredentials(SecurityStrategyWithTokenExchange):
         :param revoke_token_url: The URL for revoking access tokens (optional).
         :param refresh_threshold: The number of seconds before token expiration to trigger token refresh.
         :param verify: Whether to verify the server's TLS certificate.
+        :param background_refresh: Whether to renew the access token in a background thread before
+            it expires, so that the requests don't have to wait for the token exchange. If the
+            renewal fails, the token is refreshed by the requests as usual.
+        :param renew_before: The number of seconds before the refresh threshold to renew the token
+            in the background.
+        :param renew_jitter: The maximum number of seconds of random jitter added to
+            `renew_before`, to spread renewals of multiple clients.
+        :param token_store: The store used to share the access token with other clients using the
+            same token URL, client ID and scopes (e.g. other processes in the same host, with a
+            :class:`~iots.token_store.FileTokenStore`). A valid token found in the store is reused
+            instead of exchanging a new one, and renewals are coordinated so that only one client
+            exchanges a new token when it's about to expire.
+        :param timeout: How many seconds to wait for the token server to send data before giving
+            up, as a float, or a `(connect timeout, read timeout)` tuple.
         """
         super().__init__()
         self._token = ''
@@ -232,6 +378,14 @@ class OAuth2ClientCredentials(SecurityStrategyWithTokenExchange):
         self.expires_at = 0
         self.refresh_threshold = refresh_threshold
         self.verify = verify
+        self._token_lock = threading.RLock()
+        self.background_refresh = background_refresh
+        self.renew_before = renew_before
+        self.renew_jitter = renew_jitter
+        self._renewer = None
+        self.token_store = token_store
+        self.timeout = timeout
+        self.session = None
 
     def set_token_url_host(self, token_url_host: str):
         """
@@ -249,13 +403,99 @@ class OAuth2ClientCredentials(SecurityStrategyWithTokenExchange):
         """
         self.verify = verify
 
+    def set_session(self, session: Optional[requests.Session]):
+        """
+        Set the session used to make the requests to the token server, so that
+        they reuse the connections of the API requests.
+
+        :param session: The session, or None to not use any session.
+        """
+        self.session = session
+
     def get_token(self):
         """
         Exchange and retrieve an access token from the token server.
 
         This method exchanges client credentials for an access token with
-        the token server and stores the token for subsequent use.
+        the token server and stores the token for subsequent use. Only one
+        token exchange is in flight at a time.
+        """
+        with self._token_lock:
+            self._exchange_token()
+
+        if self.background_refresh:
+            self.start_background_refresh()
+
+    def ensure_token(self):
+        """
+        Exchange and retrieve an access token from the token server, unless a
+        valid one is already held or another thread is retrieving it.
+        """
+        if self._needs_refresh():
+            self._refresh_token()
+
+    def start_background_refresh(self):
+        """
+        Starts renewing the access token in a background thread, if it isn't
+        running yet. The thread is stopped when the token is revoked.
+        """
+        with self._token_lock:
+            if self._renewer is None or not self._renewer.is_alive():
+                self._renewer = _TokenRenewer(self, self.renew_before, self.renew_jitter)
+                self._renewer.start()
+
+    def stop_background_refresh(self):
+        """
+        Stops renewing the access token in the background.
+        """
+        with self._token_lock:
+            renewer, self._renewer = self._renewer, None
+        if renewer is not None:
+            renewer.stop()
+
+    def _exchange_token(self):
+        if self.token_store is None:
+            self._request_token()
+            return
+
+        key = self._token_store_key()
+        with self.token_store.lock(key):
+            token = self.token_store.load(key)
+            if self._can_reuse(token):
+                self._set_token(token['access_token'], token['expires_in'], token['expires_at'])
+            else:
+                self._request_token()
+                self.token_store.save(key, {
+                    'access_token': self._token,
+                    'expires_in': self.expires_in,
+                    'expires_at': self.expires_at,
+                })
+
+    def _token_store_key(self) -> str:
+        token_url = self.token_url
+        if token_url.startswith('/'):
+            token_url = self.token_url_host.rstrip('/') + token_url
+        return TokenStore.make_key(token_url, self.client_id, self.scopes)
+
+    def _can_reuse(self, token: dict) -> bool:
+        """
+        Returns whether a token found in the token store can be used instead of
+        exchanging a new one, which is the case when it has been renewed by
+        another client and doesn't need to be refreshed yet.
         """
+        if not token:
+            return False
+        expires_at = token.get('expires_at', 0)
+        return expires_at > self.expires_at and time.time() + self.refresh_threshold < expires_at
+
+    def _set_token(self, token: str, expires_in: float, expires_at: float):
+        # Set the expiration first, so that threads that read the new
+        # token without holding the lock never see it as expired
+        self.expires_in = expires_in
+        self.expires_at = expires_at
+        self._token = token
+
+    def _request_token(self):
         data = {
             'grant_type': 'client_credentials',
             'client_id': self.client_id,
@@ -268,13 +508,11 @@ class OAuth2ClientCredentials(SecurityStrategyWithTokenExchange):
         if token_url.startswith('/'):
             token_url = self.token_url_host.rstrip('/') + token_url
 
-        response = requests.request('POST', token_url, data=data,
-                                    verify=self.verify)
+        response = self._post(token_url, data)
         response_json = response.json()
         if 'access_token' in response_json:
-            self._token = response_json['access_token']
-            self.expires_in = response_json.get('expires_in', 3600)
-            self.expires_at = time.time() + self.expires_in
+            expires_in = response_json.get('expires_in', 3600)
+            self._set_token(response_json['access_token'], expires_in, time.time() + expires_in)
         else:
             raise ResponseError(response, f"Failed to refresh token: {response.content.decode('utf-8')}")
 
@@ -285,6 +523,11 @@ class OAuth2ClientCredentials(SecurityStrategyWithTokenExchange):
         This method revokes the currently held access token from the token server,
         if a token revocation URL is provided and the token is still valid.
         """
+        self.stop_background_refresh()
+        with self._token_lock:
+            self._revoke_token()
+
+    def _revoke_token(self):
         if self._token and self.revoke_token_url:
             data = {
                 'token': self._token,
@@ -296,9 +539,9 @@ class OAuth2ClientCredentials(SecurityStrategyWithTokenExchange):
             if revoke_token_url.startswith('/'):
                 revoke_token_url = self.token_url_host.rstrip('/') + revoke_token_url
 
-            response = requests.request('POST', revoke_token_url,
-                                        data=data, verify=self.verify)
+            response = self._post(revoke_token_url, data)
             if response.status_code == 200:
+                self._delete_stored_token()
                 self._token = ''
                 self.expires_in = 0
                 self.expires_at = 0
@@ -307,23 +550,74 @@ class OAuth2ClientCredentials(SecurityStrategyWithTokenExchange):
         else:
             self._token = ''
 
+    def _post(self, url: str, data: dict) -> requests.Response:
+        request = self.session.request if self.session is not None else requests.request
+        return request('POST', url, data=data, timeout=self.timeout, verify=self.verify)
+
+    def _delete_stored_token(self):
+        """
+        Removes the current token from the token store, if it's stored there.
+        """
+        if self.token_store is None:
+            return
+
+        key = self._token_store_key()
+        with self.token_store.lock(key):
+            token = self.token_store.load(key)
+            if token and token['access_token'] == self._token:
+                self.token_store.delete(key)
+
     def apply(self, request: Request):
         """
         Apply security measures by adding the OAuth2 access token to the request header.
 
         If the access token is not present or close to expiration, it is refreshed before applying.
+        The refresh is single-flight: while a thread refreshes the token, other threads keep using
+        the current token if it's still valid, or wait for the refresh to finish otherwise.
 
         :param request: The request object to which security measures will be applied.
         """
-        if not self._token or time.time() + self.refresh_threshold >= self.expires_at:
-            self.get_token()
+        if self._needs_refresh():
+            self._refresh_token()
         request.headers['Authorization'] = f'Bearer {self._token}'
 
+    def _needs_refresh(self) -> bool:
+        return not self._token or time.time() + self.refresh_threshold >= self.expires_at
+
+    def _refresh_token(self):
+        """
+        Refreshes the access token, unless another thread is already doing it
+        and the current token hasn't expired yet.
+        """
+        if self._token and time.time() < self.expires_at:
+            if not self._token_lock.acquire(blocking=False):
+                # Another thread is refreshing the token, keep using the current one
+                return
+        else:
+            self._token_lock.acquire()
+
+        try:
+            # The token may have been refreshed while waiting for the lock
+            if self._needs_refresh():
+                self._exchange_token()
+                if self.background_refresh:
+                    self.start_background_refresh()
+        finally:
+            self._token_lock.release()
+
     def clean(self):
         """
         Clean sensitive information from the security strategy.
 
         This method revokes the currently held access token, if supported,
-        ensuring sensitive information is removed from memory.
+        ensuring sensitive information is removed from memory. If the token is
+        shared through a token store, it is not revoked, as other clients may
+        still be using it.
         """
-        self.revoke_token()
+        if self.token_store is None:
+            self.revoke_token()
+            return
+
+        self.stop_background_refresh()
+        with self._token_lock:
+            self._set_token('', 0, 0)
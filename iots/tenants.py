@@ -0,0 +1,280 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .api import API
+from .apis.spaces import Spaces1
+from .models.basemodel import ResponseRetention
+from .models.exceptions import ResponseError
+from .security import TokenFetch
+
+
+@dataclass(frozen=True)
+class TenantCredentials:
+    """
+    OAuth2 client credentials of a tenant.
+    """
+    client_id: str
+    client_secret: str
+    scopes: List[str]
+    space: Optional[str] = None
+    host: Optional[str] = None
+    token_url: str = '/oauth2/token'
+    revoke_token_url: str = '/oauth2/revoke'
+
+
+@dataclass
+class _Tenant:
+    api: API
+    last_used: float
+
+
+class TenantManager:
+    """
+    Manages the API clients of multiple tenants, each with their own OAuth2
+    client credentials.
+
+    The clients of all the tenants that use the same host share one
+    :class:`requests.Session` (and so one connection pool). Clients are
+    created when a tenant is first used, and their tokens are retrieved by the
+    first request. Only the `max_tenants` most recently used clients are kept:
+    when that limit is reached, or when a client hasn't been used for
+    `idle_timeout` seconds, it is evicted and its token is revoked (in a
+    background thread, when the eviction is caused by :meth:`api`).
+
+    Example::
+
+        tenants = TenantManager()
+        tenants.register("customer-1", client_id, client_secret, ["thing"], space="space01")
+
+        things = tenants.space("customer-1").things().get()
+    """
+
+    def __init__(self, host: str = "https://api.swx.altairone.com",
+                 max_tenants: int = 128,
+                 idle_timeout: float = 900,
+                 verify: bool = True,
+                 response_retention: Union[ResponseRetention, str] = ResponseRetention.FULL,
+                 pool_maxsize: int = 10):
+        """
+        Creates a new tenant manager.
+
+        :param host: (optional) Default host name of the Altair IoT Studio API.
+        :param max_tenants: (optional) Maximum number of tenant clients kept
+            at the same time.
+        :param idle_timeout: (optional) Number of seconds after which the
+            client of an unused tenant is evicted. Set it to None to never evict
+            idle tenants.
+        :param verify: (optional) Whether to verify the server's TLS certificate.
+        :param response_retention: (optional) How much of the HTTP response is
+            kept in the returned models. See :class:`~iots.api.API`.
+        :param pool_maxsize: (optional) Maximum number of connections kept in
+            the connection pool of each host.
+        """
+        if max_tenants < 1:
+            raise ValueError("max_tenants must be greater than 0")
+
+        self.host = host
+        self.max_tenants = max_tenants
+        self.idle_timeout = idle_timeout
+        self.verify = verify
+        self.response_retention = ResponseRetention(response_retention)
+        self.pool_maxsize = pool_maxsize
+
+        self._credentials: Dict[str, TenantCredentials] = {}
+        self._tenants: 'OrderedDict[str, _Tenant]' = OrderedDict()
+        self._sessions: Dict[str, requests.Session] = {}
+        self._revoker: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def register(self, tenant: str, client_id: str, client_secret: str,
+                 scopes: List[str], space: str = None, host: str = None,
+                 token_url: str = '/oauth2/token',
+                 revoke_token_url: str = '/oauth2/revoke'):
+        """
+        Registers the credentials of a tenant. If the tenant was already
+        registered, its client is evicted.
+
+        :param tenant: The tenant key.
+        :param client_id: The client ID for OAuth2 client credentials authentication.
+        :param client_secret: The client secret for OAuth2 client credentials authentication.
+        :param scopes: The list of scopes to be requested during token exchange.
+        :param space: (optional) The name of the Space of the tenant.
+        :param host: (optional) Host name of the API, if it's not the default one.
+        :param token_url: (optional) The URL for token exchange.
+        :param revoke_token_url: (optional) The URL for revoking access tokens.
+        :return: The tenant manager.
+        """
+        credentials = TenantCredentials(client_id, client_secret, list(scopes),
+                                        space, host, token_url, revoke_token_url)
+        with self._lock:
+            self._credentials[tenant] = credentials
+        self.evict(tenant)
+        return self
+
+    def unregister(self, tenant: str):
+        """
+        Removes the credentials of a tenant and evicts its client.
+
+        :param tenant: The tenant key.
+        """
+        with self._lock:
+            self._credentials.pop(tenant, None)
+        self.evict(tenant)
+
+    def api(self, tenant: str) -> API:
+        """
+        Returns the API client of a tenant, creating it if needed.
+
+        The tokens of the clients evicted meanwhile (the idle ones, and the
+        least recently used one if there are too many) are revoked in a
+        background thread, so this doesn't wait for the token server.
+
+        :param tenant: The tenant key.
+        :raises KeyError: If the tenant is not registered.
+        """
+        return self._get(tenant)[0]
+
+    def space(self, tenant: str) -> Spaces1:
+        """
+        Returns the Space of a tenant.
+
+        :param tenant: The tenant key.
+        :raises KeyError: If the tenant is not registered.
+        :raises ValueError: If the tenant was registered without a Space.
+        """
+        api, credentials = self._get(tenant)
+        if not credentials.space:
+            raise ValueError(f"Tenant '{tenant}' has no Space")
+        return api.spaces(credentials.space)
+
+    def evict(self, tenant: str):
+        """
+        Evicts the client of a tenant, if any, and revokes its token. A new
+        client will be created the next time the tenant is used.
+
+        :param tenant: The tenant key.
+        """
+        with self._lock:
+            entry = self._tenants.pop(tenant, None)
+        self._revoke([entry] if entry else [])
+
+    def evict_idle(self):
+        """
+        Evicts the clients of the tenants that haven't been used for
+        `idle_timeout` seconds and revokes their tokens.
+        """
+        with self._lock:
+            evicted = self._pop_idle(time.monotonic())
+        self._revoke(evicted)
+
+    def close(self):
+        """
+        Evicts every tenant client, revoking their tokens, and closes the
+        connections. It waits for the revocations still running in the
+        background.
+        """
+        with self._lock:
+            evicted = list(self._tenants.values())
+            self._tenants.clear()
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+            revoker, self._revoker = self._revoker, None
+
+        if revoker is not None:
+            revoker.shutdown(wait=True)
+        self._revoke(evicted)
+        for session in sessions:
+            session.close()
+
+    def __len__(self):
+        """ Returns the number of tenant clients currently kept. """
+        return len(self._tenants)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _get(self, tenant: str) -> Tuple[API, TenantCredentials]:
+        """
+        Returns the API client and the credentials of a tenant, creating the
+        client if needed.
+        """
+        now = time.monotonic()
+        with self._lock:
+            # Unknown tenants fail before any client is evicted
+            credentials = self._credentials[tenant]
+            evicted = self._pop_idle(now)
+            try:
+                entry = self._tenants.get(tenant)
+                if entry is not None:
+                    self._tenants.move_to_end(tenant)
+                else:
+                    entry = _Tenant(self._new_api(credentials), now)
+                    self._tenants[tenant] = entry
+                    while len(self._tenants) > self.max_tenants:
+                        evicted.append(self._tenants.popitem(last=False)[1])
+                entry.last_used = now
+            finally:
+                if evicted:
+                    if self._revoker is None:
+                        self._revoker = ThreadPoolExecutor(max_workers=1, thread_name_prefix='iots-revoke')
+                    self._revoker.submit(self._revoke, evicted)
+
+        return entry.api, credentials
+
+    def _new_api(self, credentials: TenantCredentials) -> API:
+        host = credentials.host or self.host
+        if not host.startswith("http://") and not host.startswith("https://"):
+            host = "https://" + host
+
+        api = API(host=host, verify=self.verify,
+                  response_retention=self.response_retention,
+                  token_fetch=TokenFetch.LAZY,
+                  session=self._session(host))
+        return api.set_credentials(credentials.client_id, credentials.client_secret,
+                                   credentials.scopes, credentials.token_url,
+                                   credentials.revoke_token_url)
+
+    def _session(self, host: str) -> requests.Session:
+        session = self._sessions.get(host)
+        if session is None:
+            session = self._sessions[host] = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=self.pool_maxsize)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        return session
+
+    def _pop_idle(self, now: float) -> List[_Tenant]:
+        """
+        Removes and returns the idle tenants. The lock must be held.
+        """
+        evicted = []
+        if self.idle_timeout is None:
+            return evicted
+
+        # Tenants are sorted from the least to the most recently used
+        while self._tenants:
+            tenant, entry = next(iter(self._tenants.items()))
+            if now - entry.last_used < self.idle_timeout:
+                break
+            del self._tenants[tenant]
+            evicted.append(entry)
+        return evicted
+
+    @staticmethod
+    def _revoke(evicted: List[_Tenant]):
+        for entry in evicted:
+            try:
+                entry.api.revoke_token()
+            except (ResponseError, requests.RequestException):
+                # The token will expire by itself
+                pass
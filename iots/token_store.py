@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import stat
+import tempfile
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import List, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+
+class TokenStore(ABC):
+    """
+    Abstract base class for storing OAuth2 access tokens shared between
+    multiple clients or processes.
+
+    Tokens are stored by key (see :meth:`make_key`) as dictionaries with the
+    `access_token`, `expires_in` and `expires_at` attributes. The :meth:`lock`
+    method is used to coordinate token renewals, so that only one client
+    exchanges a new token when the shared one is about to expire.
+    """
+
+    @staticmethod
+    def make_key(token_url: str, client_id: str, scopes: List[str]) -> str:
+        """
+        Returns the key of the tokens exchanged with the given token URL,
+        client ID and scopes.
+        """
+        raw = '\n'.join([token_url, client_id, ' '.join(sorted(scopes or []))])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    @abstractmethod
+    def load(self, key: str) -> Optional[dict]:
+        """
+        Returns the token stored with the given key, or None if there is no
+        token.
+
+        :param key: The token key.
+        """
+        pass
+
+    @abstractmethod
+    def save(self, key: str, token: dict):
+        """
+        Stores a token with the given key.
+
+        :param key:   The token key.
+        :param token: The token, as a dictionary with the `access_token`,
+            `expires_in` and `expires_at` attributes.
+        """
+        pass
+
+    @abstractmethod
+    def delete(self, key: str):
+        """
+        Removes the token stored with the given key, if any.
+
+        :param key: The token key.
+        """
+        pass
+
+    @abstractmethod
+    def lock(self, key: str):
+        """
+        Returns a context manager that holds an exclusive lock on the given
+        key, shared by every client using this store.
+
+        :param key: The token key.
+        """
+        pass
+
+
+class FileTokenStore(TokenStore):
+    """
+    Token store that keeps the tokens in files, shared by every process in the
+    host that uses the same directory.
+
+    Each token is stored in its own file, readable only by the current user,
+    and renewals are coordinated with an advisory file lock. This class
+    requires a platform with `fcntl` support (e.g. Linux or macOS).
+    """
+
+    def __init__(self, directory: str = None):
+        """
+        Creates a new file token store.
+
+        :param directory: (optional) The directory where the tokens are
+            stored. By default, a directory of the current user in the system
+            temporary directory is used. It must be owned by the current user
+            and accessible only by them, or a `PermissionError` is raised.
+        """
+        if fcntl is None:  # pragma: no cover
+            raise OSError("FileTokenStore is not supported on this platform")
+
+        if directory is None:
+            user = os.getuid() if hasattr(os, 'getuid') else 'default'
+            directory = os.path.join(tempfile.gettempdir(), f'iots-tokens-{user}')
+
+        self.directory = directory
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        _check_private_directory(self.directory)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def load(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._path(key) + '.json', encoding='utf-8') as f:
+                token = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if not isinstance(token, dict) or 'access_token' not in token:
+            return None
+        return token
+
+    def save(self, key: str, token: dict):
+        path = self._path(key) + '.json'
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(token, f)
+        # Replace the file atomically, so that readers never see partial tokens
+        os.replace(tmp_path, path)
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key) + '.json')
+        except FileNotFoundError:
+            pass
+
+    @contextmanager
+    def lock(self, key: str):
+        fd = os.open(self._path(key) + '.lock', os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+
+def _check_private_directory(directory: str):
+    """
+    Raises a PermissionError unless the directory is a real directory (not a
+    symlink) owned by the current user, and other users have no access to
+    it. Otherwise, another user could create it first (e.g. in the shared
+    temporary directory) to read or plant tokens.
+    """
+    st = os.lstat(directory)
+    if stat.S_ISLNK(st.st_mode) or not stat.S_ISDIR(st.st_mode):
+        raise PermissionError(f"Token directory {directory} is not a directory")
+    if st.st_uid != os.getuid():
+        raise PermissionError(f"Token directory {directory} is not owned by the current user")
+    if st.st_mode & 0o077:
+        raise PermissionError(f"Token directory {directory} is accessible by other users "
+                              f"(mode {stat.S_IMODE(st.st_mode):o}, expected 700)")
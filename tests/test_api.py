@@ -1,14 +1,18 @@
 import json
+import threading
+import time
 from unittest import mock
 from unittest.mock import call
 
 import pytest
+import requests
 
 from iots.api import API
-from iots.models.exceptions import APIException
+from iots.models.basemodel import ResponseRetention
+from iots.models.exceptions import APIException, ResponseError
 from .common import make_response
 
-request_mock_pkg = 'iots.api.requests.request'
+request_mock_pkg = 'iots.api.requests.Session.request'
 
 
 def test_create_successfully():
@@ -70,6 +74,7 @@ def test_set_credentials(verify):
                                                'client_secret': 'test-client-secret',
                                                'scope': 'app function',
                                            },
+                                           timeout=10,
                                            verify=verify)
 
     mock_revoke_token.assert_called_once_with('POST',
@@ -79,6 +84,7 @@ def test_set_credentials(verify):
                                                   'client_id': 'test-client-id',
                                                   'client_secret': 'test-client-secret',
                                               },
+                                              timeout=10,
                                               verify=verify)
 
 
@@ -116,6 +122,7 @@ def test_get_token_with(verify):
                                      'client_secret': 'test-client-secret',
                                      'scope': 'app function',
                                  },
+                                 timeout=10,
                                  verify=verify)
 
     assert api._security_strategy._token == ''
@@ -127,6 +134,7 @@ def test_get_token_with(verify):
                              'client_id': 'test-client-id',
                              'client_secret': 'test-client-secret',
                          },
+                         timeout=10,
                          verify=verify)
 
     assert m.call_count == 2
@@ -205,6 +213,7 @@ def test_make_request_get_token(verify):
                  'client_secret': 'test-client-secret',
                  'scope': 'app function',
              },
+             timeout=10,
              verify=verify),
         call("POST",
              "https://test-api.swx.altairone.com/info",
@@ -257,3 +266,184 @@ def test_make_request_missing_token():
         API(host="test-api.swx.altairone.com").make_request("POST", "/info")
 
     assert str(e.value) == "No security strategy has been set"
+
+
+@pytest.mark.parametrize("retention", ["full", "headers", "none"])
+def test_response_retention(retention):
+    """
+    Keeps the HTTP response in the returned models according to the response
+    retention policy.
+    """
+    expected_resp_payload = {"temperature": 21.7}
+    expected_resp = make_response(200, expected_resp_payload,
+                                  request=requests.Request("GET", "https://test-api.swx.altairone.com"))
+    expected_resp.url = "https://test-api.swx.altairone.com/spaces/space01/things/thing01/properties"
+
+    with mock.patch(request_mock_pkg, return_value=expected_resp):
+        props = (API(host="test-api.swx.altairone.com", response_retention=retention).
+                 set_token("valid-token").
+                 spaces("space01").
+                 things("thing01").
+                 properties().
+                 get())
+
+    assert props == expected_resp_payload
+
+    if retention == ResponseRetention.FULL:
+        assert props.http_response() is expected_resp
+    elif retention == ResponseRetention.HEADERS:
+        resp = props.http_response()
+        assert resp is not expected_resp
+        assert resp.status_code == 200
+        assert resp.headers['Content-Type'] == 'application/json'
+        assert resp.url == expected_resp.url
+        assert resp.request is None
+        assert resp.content is None
+    else:
+        assert props.http_response() is None
+
+
+@pytest.mark.parametrize("retention", ["full", "headers", "none"])
+def test_response_retention_error(retention):
+    """
+    Raises errors with the full HTTP response, whatever the response retention
+    policy is.
+    """
+    expected_resp_payload = {"error": {"message": "not found", "status": 404}}
+    expected_resp = make_response(404, expected_resp_payload)
+
+    with mock.patch(request_mock_pkg, return_value=expected_resp):
+        with pytest.raises(ResponseError) as e:
+            (API(host="test-api.swx.altairone.com", response_retention=retention).
+             set_token("valid-token").
+             spaces("space01").
+             things("thing01").
+             get())
+
+    assert e.value.http_response() is expected_resp
+    assert e.value.error.error.status == 404
+
+
+@pytest.mark.parametrize("token_fetch", ["lazy", "background"])
+def test_token_fetch(token_fetch):
+    """
+    Retrieves the access token lazily or in the background instead of when
+    the credentials are set.
+    """
+    expected_token_resp = make_response(200, {'access_token': "valid-token", 'expires_in': 3600})
+    expected_resp = make_response(200, {"foo": "bar"})
+    token_fetched = threading.Event()
+
+    def mock_request(method, url, **kwargs):
+        if url.endswith('/oauth2/token'):
+            token_fetched.set()
+            return expected_token_resp
+        return expected_resp
+
+    with mock.patch(request_mock_pkg, side_effect=mock_request) as m:
+        api = API(host="test-api.swx.altairone.com", token_fetch=token_fetch).set_credentials(
+            client_id="test-client-id",
+            client_secret="test-client-secret",
+            scopes=["app", "function"])
+
+        if token_fetch == "lazy":
+            m.assert_not_called()
+        else:
+            assert token_fetched.wait(5)
+
+        resp = api.make_request("GET", "/info")
+
+    assert resp is expected_resp
+    assert m.call_count == 2
+    assert m.call_args_list[0][0] == ('POST', 'https://test-api.swx.altairone.com/oauth2/token')
+    assert m.call_args_list[1][1]['headers'] == {'Authorization': 'Bearer valid-token'}
+
+
+def test_session():
+    """
+    Makes the requests to the API and the token server with the given session.
+    """
+    session = mock.Mock(spec=requests.Session)
+    session.request.side_effect = [
+        make_response(200, {'access_token': "valid-token", 'expires_in': 3600}),
+        make_response(200, {"foo": "bar"}),
+    ]
+
+    with mock.patch(request_mock_pkg) as m:
+        api = API(host="test-api.swx.altairone.com", session=session).set_credentials(
+            client_id="test-client-id",
+            client_secret="test-client-secret",
+            scopes=["app", "function"],
+            token_timeout=5)
+        resp = api.make_request("GET", "/info")
+
+    m.assert_not_called()
+    assert resp.json() == {"foo": "bar"}
+    session.request.assert_has_calls([
+        call('POST',
+             'https://test-api.swx.altairone.com/oauth2/token',
+             data={
+                 'grant_type': 'client_credentials',
+                 'client_id': 'test-client-id',
+                 'client_secret': 'test-client-secret',
+                 'scope': 'app function',
+             },
+             timeout=5,
+             verify=True),
+        call("GET",
+             "https://test-api.swx.altairone.com/info",
+             params={},
+             headers={'Authorization': 'Bearer valid-token'},
+             data=[],
+             timeout=3,
+             verify=True),
+    ])
+
+
+def test_default_session():
+    """
+    Reuses the connections with a session of its own, closed when the context
+    manager exits, and doesn't close the given sessions.
+    """
+    with mock.patch('iots.api.requests.Session.close') as close:
+        with API(host="test-api.swx.altairone.com") as api:
+            assert isinstance(api._session, requests.Session)
+        close.assert_called_once()
+
+        session = requests.Session()
+        with API(host="test-api.swx.altairone.com", session=session) as api:
+            assert api._session is session
+        close.assert_called_once()
+
+
+def test_token_fetch_background_error():
+    """
+    Keeps the error of a failed background token retrieval, and retrieves the
+    token again with the first authenticated request.
+    """
+    token_requests = []
+
+    def mock_request(method, url, **kwargs):
+        if url.endswith('/oauth2/token'):
+            token_requests.append(url)
+            if len(token_requests) == 1:
+                raise requests.ConnectionError("connection refused")
+            return make_response(200, {'access_token': "valid-token", 'expires_in': 3600})
+        return make_response(200, {"foo": "bar"})
+
+    with mock.patch(request_mock_pkg, side_effect=mock_request):
+        api = API(host="test-api.swx.altairone.com", token_fetch="background").set_credentials(
+            client_id="test-client-id",
+            client_secret="test-client-secret",
+            scopes=["app", "function"])
+
+        strategy = api._security_strategy
+        deadline = time.time() + 5
+        while strategy.prefetch_error is None and time.time() < deadline:
+            time.sleep(0.01)
+        assert isinstance(strategy.prefetch_error, requests.ConnectionError)
+
+        resp = api.make_request("GET", "/info")
+
+    assert resp.json() == {"foo": "bar"}
+    assert len(token_requests) == 2
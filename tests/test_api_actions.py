@@ -8,7 +8,7 @@ from iots.models.models import (ActionCreateRequest, ActionListResponse,
 from .common import make_response, to_json
 from .test_api_pagination import assert_pagination
 
-request_mock_pkg = 'iots.api.requests.request'
+request_mock_pkg = 'iots.api.requests.Session.request'
 
 test_action01 = {
     "delay": {
@@ -0,0 +1,466 @@
+import gc
+import json
+import threading
+import time
+from unittest import mock
+
+import pytest
+import requests
+
+from iots.api import API
+from iots.models.models import ErrorResponse, Properties, Thing, ThingCreate
+from iots.models.things_patch import ThingsPatchMultiStatus
+from .common import make_response
+
+request_mock_pkg = 'iots.api.requests.Session.request'
+
+cursor_url = "https://test-api.swx.altairone.com/spaces/space01/query/cursor"
+
+test_things = {
+    f"thing{i:02}": {"uid": f"thing{i:02}", "title": f"Sensor {i}",
+                     "properties": {"temperature": 20 + i, "humidity": i}}
+    for i in range(25)
+}
+
+
+def make_query_server(queries: list, deleted: list = None, max_batch_size: int = None):
+    """
+    Returns a side effect for the request mock that runs the bulk queries on
+    `test_things`, returning the results in batches of up to `max_batch_size`
+    documents. The IDs of the deleted cursors are added to `deleted`.
+    """
+    lock = threading.Lock()
+    cursors = {}
+
+    def batch(cursor_id: str, status_code: int):
+        results, batch_size = cursors[cursor_id]
+        page, cursors[cursor_id] = results[:batch_size], (results[batch_size:], batch_size)
+        has_more = len(results) > batch_size
+        return make_response(status_code, {"result": page, "hasMore": has_more, "error": False,
+                                           "id": cursor_id if has_more else None})
+
+    def side_effect(method, url, params=None, headers=None, data=None, timeout=None, verify=None):
+        with lock:
+            if method == "DELETE":
+                deleted.append(url.rsplit('/', 1)[1])
+                cursors.pop(url.rsplit('/', 1)[1])
+                return make_response(202)
+            if url != cursor_url:
+                return batch(url.rsplit('/', 1)[1], 200)
+
+            req = json.loads(data)
+            queries.append(req)
+            bind_vars = req['bindVars']
+            results = []
+            for thing_id in bind_vars['ids']:
+                thing = test_things.get(thing_id)
+                if thing is None:
+                    continue
+                if 'names' in bind_vars:
+                    props = {k: v for k, v in thing['properties'].items() if k in bind_vars['names']}
+                    results.append({"uid": thing_id, "properties": props})
+                elif 'fields' in bind_vars:
+                    results.append({**{k: v for k, v in thing.items()
+                                       if k in bind_vars['fields'] and k != 'properties'},
+                                    "uid": thing_id})
+                elif 'properties:' in req['query']:
+                    results.append({"uid": thing_id, "properties": thing['properties']})
+                else:
+                    results.append({k: v for k, v in thing.items() if k != 'properties'})
+
+            cursor_id = str(len(queries))
+            cursors[cursor_id] = (results, min(req['batchSize'], max_batch_size or req['batchSize']))
+            return batch(cursor_id, 201)
+
+    return side_effect
+
+
+def make_space():
+    return API(host="test-api.swx.altairone.com").set_token("valid-token").spaces("space01")
+
+
+def test_bulk_properties():
+    """
+    Tests reading the Properties of many Things with a few query cursors.
+    """
+    queries = []
+    thing_ids = (f"thing{i:02}" for i in range(30))
+
+    with mock.patch(request_mock_pkg, side_effect=make_query_server(queries)) as m:
+        results = dict(make_space().bulk_properties(thing_ids, chunk_size=10, max_workers=2))
+
+    assert results == {thing_id: Properties.parse_obj(thing['properties'])
+                       for thing_id, thing in test_things.items()}
+    assert all(isinstance(p, Properties) for p in results.values())
+
+    # 3 queries with 10 IDs each, and 3 batches of up to 10 results
+    assert len(queries) == 3
+    assert [len(q['bindVars']['ids']) for q in queries] == [10, 10, 10]
+    assert m.call_count == 3
+
+
+def test_bulk_properties_many_batches():
+    """
+    Tests reading chunks whose results take several cursor batches, with a
+    slow consumer, so the last batch of each chunk is prefetched.
+    """
+    queries, deleted = [], []
+    results = {}
+
+    with mock.patch(request_mock_pkg,
+                    side_effect=make_query_server(queries, deleted, max_batch_size=3)) as m:
+        for thing_id, properties in make_space().bulk_properties(sorted(test_things), chunk_size=10,
+                                                                  max_workers=2):
+            time.sleep(0.002)
+            results[thing_id] = properties
+
+    assert results == {thing_id: Properties.parse_obj(thing['properties'])
+                       for thing_id, thing in test_things.items()}
+    # 3 queries (10, 10 and 5 IDs), with batches of up to 3 results
+    assert len(queries) == 3 and m.call_count == 4 + 4 + 2
+    assert deleted == []
+
+
+def test_bulk_properties_names():
+    """
+    Tests reading some Properties of many Things.
+    """
+    queries = []
+
+    with mock.patch(request_mock_pkg, side_effect=make_query_server(queries)) as m:
+        results = list(make_space().bulk_properties(["thing01", "thing02", "unknown"],
+                                                    names=["humidity"], chunk_size=2))
+
+    assert sorted(results) == [("thing01", Properties.parse_obj({"humidity": 1})),
+                               ("thing02", Properties.parse_obj({"humidity": 2}))]
+    # The chunks are queried at the same time, in any order
+    assert sorted(q['bindVars']['ids'] for q in queries) == [["thing01", "thing02"], ["unknown"]]
+    assert all(q['bindVars']['names'] == ["humidity"] for q in queries)
+    assert all("KEEP(t.properties, @names)" in q['query'] for q in queries)
+    assert m.call_count == 2
+
+
+@pytest.mark.parametrize("fields", [None, ["title"]])
+def test_bulk_things(fields):
+    """
+    Tests reading many Things with a few query cursors.
+    """
+    queries = []
+
+    with mock.patch(request_mock_pkg, side_effect=make_query_server(queries)) as m:
+        things = list(make_space().bulk_things(sorted(test_things), fields=fields,
+                                               chunk_size=20, max_workers=1))
+
+    assert sorted(t.uid for t in things) == sorted(test_things)
+    assert all(isinstance(t, Thing) for t in things)
+    assert all(t.title == test_things[t.uid]['title'] and t.properties is None for t in things)
+    assert all("UNSET" in q['query'] for q in queries)
+    assert all(('fields' in q['bindVars']) == (fields is not None) for q in queries)
+    # 2 queries with a single batch each
+    assert len(queries) == 2 and m.call_count == 2
+
+
+@pytest.mark.parametrize("stop", ["break", "close", "error"])
+def test_bulk_early_exit(stop):
+    """
+    Tests that the unfinished cursors are deleted when the iteration stops
+    early, without waiting for the garbage collector.
+    """
+    queries, deleted = [], []
+
+    def thing_ids():
+        yield from sorted(test_things)[:20]
+        if stop == "error":
+            raise RuntimeError("IDs not read")
+
+    gc.disable()
+    try:
+        with mock.patch(request_mock_pkg, side_effect=make_query_server(queries, deleted, max_batch_size=2)):
+            results = make_space().bulk_properties(thing_ids(), chunk_size=10, max_workers=2)
+            if stop == "error":
+                with pytest.raises(RuntimeError):
+                    for _ in results:
+                        pass
+            else:
+                for _ in results:
+                    break
+                if stop == "close":
+                    results.close()
+                del results
+
+            # The cursors are deleted by the worker threads
+            for _ in range(100):
+                if len(deleted) == len(queries):
+                    break
+                time.sleep(0.01)
+    finally:
+        gc.enable()
+
+    assert len(queries) == 2 and sorted(deleted) == ["1", "2"]
+
+
+def test_bulk_invalid_chunk_size():
+    with pytest.raises(ValueError):
+        list(make_space().bulk_things(["thing01"], chunk_size=0))
+
+
+things_url = "https://test-api.swx.altairone.com/spaces/space01/things"
+
+
+def make_things_server(existing: set, calls: list, failures: dict = None):
+    """
+    Returns a side effect for the request mock that creates and updates
+    Things. `existing` has the uids (or titles) of the Things that already
+    exist, and `failures` maps Thing titles to the status codes returned by
+    their first requests.
+    """
+    lock = threading.Lock()
+    failures = dict(failures or {})
+
+    def side_effect(method, url, params=None, headers=None, data=None, timeout=None, verify=None):
+        thing = json.loads(data)
+        with lock:
+            calls.append((method, url, thing['title']))
+            statuses = failures.get(thing['title'])
+            if statuses:
+                status_code = statuses.pop(0)
+                return make_response(status_code, {"error": {"status": status_code, "message": "failed"}})
+            # Things without uid conflict by title
+            if method == "POST" and (thing.get('uid') or thing['title']) in existing:
+                return make_response(409, {"error": {"status": 409, "message": "This item already exists"}})
+            existing.add(thing.get('uid') or thing['title'])
+
+        status_code = 201 if method == "POST" else 200
+        return make_response(status_code, {**thing, "uid": thing.get('uid') or thing['title']})
+
+    return side_effect
+
+
+def make_things(n: int):
+    for i in range(n):
+        yield {"uid": f"thing{i:02}", "title": f"Sensor {i}"}
+
+
+def test_create_many():
+    """
+    Tests creating many Things from a generator, with partial failures.
+    """
+    calls = []
+    progress = []
+    server = make_things_server({"thing03"}, calls, {"Sensor 5": [400]})
+
+    with mock.patch(request_mock_pkg, side_effect=server):
+        results = list(make_space().things().create_many(make_things(10), max_concurrency=3,
+                                                         progress=lambda p: progress.append(p.completed)))
+
+    results.sort(key=lambda r: r.index)
+    assert [r.index for r in results] == list(range(10))
+    assert [r.status for r in results] == ["created"] * 3 + ["failed", "created", "failed"] + ["created"] * 4
+    assert all(isinstance(r.result, Thing) for r in results if r.ok)
+    assert results[4].result.uid == "thing04" and results[4].request["title"] == "Sensor 4"
+
+    assert isinstance(results[3].error, ErrorResponse) and results[3].error.error.status == 409
+    assert isinstance(results[5].error, ErrorResponse) and results[5].error.error.status == 400
+    # Client errors aren't retried
+    assert len(calls) == 10 and results[5].attempts == 1
+    assert progress == list(range(1, 11))
+
+
+@pytest.mark.parametrize("on_conflict, status, method", [
+    ("skip", "skipped", None),
+    ("update", "updated", "PUT"),
+])
+def test_create_many_conflicts(on_conflict, status, method):
+    """
+    Tests skipping and updating the Things that already exist.
+    """
+    calls = []
+
+    with mock.patch(request_mock_pkg, side_effect=make_things_server({"thing01"}, calls)):
+        results = sorted(make_space().things().create_many(make_things(3), on_conflict=on_conflict),
+                         key=lambda r: r.index)
+
+    assert [r.status for r in results] == ["created", status, "created"]
+    assert all(r.ok for r in results)
+    updates = [call for call in calls if call[0] != "POST"]
+    if method is None:
+        assert updates == [] and results[1].result is None
+    else:
+        assert updates == [(method, things_url + "/thing01", "Sensor 1")]
+        assert results[1].result.uid == "thing01"
+
+
+def test_create_many_update_models():
+    """
+    Tests updating the Things given as models without `uid`, whose `uid` is
+    returned by the key function, and failing them without it.
+    """
+    calls = []
+    things = [ThingCreate(title=f"Sensor {i}") for i in range(3)]
+    uids = {"Sensor 0": "thing00", "Sensor 1": "thing01", "Sensor 2": "thing02"}
+
+    with mock.patch(request_mock_pkg, side_effect=make_things_server({"Sensor 1"}, calls)):
+        results = sorted(make_space().things().create_many(things, on_conflict="update",
+                                                           key=lambda thing: uids[thing.title]),
+                         key=lambda r: r.index)
+
+    assert [r.status for r in results] == ["created", "updated", "created"]
+    assert [call for call in calls if call[0] != "POST"] == [("PUT", things_url + "/thing01", "Sensor 1")]
+
+    calls.clear()
+    with mock.patch(request_mock_pkg, side_effect=make_things_server(set(), calls)):
+        results = list(make_space().things().create_many(things[:1], on_conflict="update"))
+
+    assert results[0].status == "failed" and isinstance(results[0].error, ValueError)
+    assert calls == []
+
+
+def test_create_many_retries():
+    """
+    Tests that only the Things that fail with retryable errors are retried.
+    """
+    calls = []
+    failures = {"Sensor 0": [503, 429], "Sensor 1": [500, 500, 500]}
+    progress = []
+
+    with mock.patch(request_mock_pkg, side_effect=make_things_server(set(), calls, failures)):
+        results = sorted(make_space().things().create_many(make_things(3), max_retries=2, retry_backoff=0,
+                                                           progress=progress.append),
+                         key=lambda r: r.index)
+
+    assert [(r.status, r.attempts) for r in results] == [("created", 3), ("failed", 3), ("created", 1)]
+    assert results[1].error.error.status == 500
+    assert [title for _, _, title in calls].count("Sensor 2") == 1
+    assert progress[-1].completed == 3 and progress[-1].failed == 1 and progress[-1].retries == 4
+    assert progress[-1].throughput > 0
+
+
+def test_create_many_bounded():
+    """
+    Tests that the Things are read lazily from the generator.
+    """
+    taken = 0
+
+    def things():
+        nonlocal taken
+        for thing in make_things(50):
+            taken += 1
+            yield thing
+
+    with mock.patch(request_mock_pkg, side_effect=make_things_server(set(), [])):
+        results = make_space().things().create_many(things(), max_concurrency=2)
+        next(results)
+        assert taken <= 5
+        results.close()
+
+    with pytest.raises(ValueError):
+        list(make_space().things().create_many([], on_conflict="overwrite"))
+
+
+def make_patch_server(chunks: list, failures: dict = None, chunk_failures: list = None):
+    """
+    Returns a side effect for the request mock that patches Things and
+    returns a multi-status response. `failures` maps Thing IDs to the status
+    codes of their first patches, and `chunk_failures` has the errors raised
+    or the status codes returned for the first requests.
+    """
+    lock = threading.Lock()
+    failures = {k: list(v) for k, v in (failures or {}).items()}
+    chunk_failures = list(chunk_failures or [])
+
+    def side_effect(method, url, params=None, headers=None, data=None, timeout=None, verify=None):
+        assert (method, url) == ("PATCH", things_url)
+        assert headers['Content-Type'] == 'application/json-patch+json'
+        items = json.loads(data)
+        with lock:
+            chunks.append([item['id'] for item in items])
+            if chunk_failures:
+                failure = chunk_failures.pop(0)
+                if isinstance(failure, Exception):
+                    raise failure
+                return make_response(failure, {"error": {"status": failure, "message": "failed"}})
+
+            results = []
+            for item in items:
+                statuses = failures.get(item['id'])
+                status = statuses.pop(0) if statuses else (404 if item['id'] == "unknown" else 200)
+                if status < 400:
+                    results.append({"status": status, "response": {"uid": item['id']}})
+                else:
+                    results.append({"status": status, "response": {"error": {"status": status, "message": "failed"}}})
+
+        has_errors = [i for i, result in enumerate(results) if result["status"] >= 400]
+        return make_response(207, {"has_errors": has_errors, "results": results})
+
+    return side_effect
+
+
+def make_patches(n: int):
+    for i in range(n):
+        yield {"id": f"thing{i:02}", "patch": [{"op": "replace", "path": "/title", "value": f"Sensor {i}"}]}
+
+
+def test_patch_many():
+    """
+    Tests patching many Things in chunks, retrying only the items that failed
+    with a server error.
+    """
+    chunks = []
+    server = make_patch_server(chunks, {"thing03": [503], "thing07": [500, 500]})
+    items = [*make_patches(10), {"id": "unknown", "patch": []}]
+
+    with mock.patch(request_mock_pkg, side_effect=server):
+        report = make_space().things().patch_many(items, max_items=4, retry_backoff=0)
+
+    assert isinstance(report, ThingsPatchMultiStatus)
+    assert report.has_errors == [10]
+    assert [r.status for r in report.results] == [200] * 10 + [404]
+    assert report.results[3].response == {"uid": "thing03"}
+    assert report.results[10].response["error"]["status"] == 404
+
+    assert sorted(chunks[:3]) == [[f"thing{i:02}" for i in range(j, j + 4)] for j in (0, 4)] + \
+           [["thing08", "thing09", "unknown"]]
+    assert chunks[3:] == [["thing03", "thing07"], ["thing07"]]
+
+
+def test_patch_many_max_bytes():
+    """
+    Tests that the chunks don't exceed the given size.
+    """
+    chunks = []
+    items = list(make_patches(6))
+    item_size = len(json.dumps(items[0])) + 1
+
+    with mock.patch(request_mock_pkg, side_effect=make_patch_server(chunks)):
+        report = make_space().things().patch_many(items, max_bytes=2 * item_size + 1, max_concurrency=1)
+        assert report.has_errors == [] and len(report.results) == 6
+        assert chunks == [["thing00", "thing01"], ["thing02", "thing03"], ["thing04", "thing05"]]
+
+        chunks.clear()
+        make_space().things().patch_many(items[:2], max_bytes=10)
+        assert sorted(chunks) == [["thing00"], ["thing01"]]
+
+
+def test_patch_many_chunk_errors():
+    """
+    Tests that chunks failing as a whole are retried, unless the error is a
+    client error.
+    """
+    chunks = []
+    server = make_patch_server(chunks, chunk_failures=[requests.ConnectionError("reset"), 502])
+
+    with mock.patch(request_mock_pkg, side_effect=server):
+        report = make_space().things().patch_many(make_patches(3), retry_backoff=0)
+
+    assert report.has_errors == [] and len(chunks) == 3
+
+    chunks.clear()
+    server = make_patch_server(chunks, chunk_failures=[400, 503, 503])
+    with mock.patch(request_mock_pkg, side_effect=server):
+        report = make_space().things().patch_many(make_patches(4), max_items=2, max_concurrency=1,
+                                                  max_retries=1, retry_backoff=0)
+
+    assert report.has_errors == [0, 1, 2, 3]
+    assert [r.status for r in report.results] == [400, 400, 503, 503]
+    assert report.results[0].response == {"error": {"status": 400, "message": "failed"}}
+    assert len(chunks) == 3
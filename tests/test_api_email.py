@@ -7,7 +7,7 @@ from iots.api import API
 from iots.models.models import Email
 from .common import make_response, to_json
 
-request_mock_pkg = 'iots.api.requests.request'
+request_mock_pkg = 'iots.api.requests.Session.request'
 
 test_email_req_1 = {
     "to": [
@@ -1,3 +1,4 @@
+import threading
 from unittest import mock
 
 import pytest
@@ -8,7 +9,7 @@ from iots.models.models import (EventCreateRequest, EventListResponse,
 from .common import make_response, to_json
 from .test_api_pagination import assert_pagination
 
-request_mock_pkg = 'iots.api.requests.request'
+request_mock_pkg = 'iots.api.requests.Session.request'
 
 test_event01 = {
     "highCPU": {
@@ -69,6 +70,41 @@ def test_create(event_req):
     assert isinstance(event, EventResponse)
 
 
+
+@pytest.mark.parametrize("event_req", [
+    EventCreateRequest.parse_obj({"highCPU": {"data": 75}}),
+    {"highCPU": {"data": 75}},
+])
+def test_prepare_create(event_req):
+    """
+    Tests a successful request to create an Event value with a prepared
+    operation.
+    """
+    expected_resp = make_response(201, test_event01)
+
+    with mock.patch(request_mock_pkg, return_value=expected_resp) as m:
+        create = (API(host="test-api.swx.altairone.com").
+                  set_token("valid-token").
+                  spaces("space01").
+                  things("thing01").
+                  events("delay").
+                  prepare_create(params={'foo': 'bar'}))
+        event = create(event_req)
+
+    m.assert_called_once_with("POST",
+                              "https://test-api.swx.altairone.com/spaces/space01/things/thing01/events/delay",
+                              params={'foo': 'bar'},
+                              headers={
+                                  'Authorization': 'Bearer valid-token',
+                                  'Content-Type': 'application/json',
+                              },
+                              data=to_json(event_req),
+                              timeout=3,
+                              verify=True)
+
+    assert event == EventResponse.parse_obj(test_event01)
+    assert isinstance(event, EventResponse)
+
 def test_list_event():
     """
     Tests a successful request to list the history values of an Event.
@@ -203,3 +239,107 @@ def test_get_event():
 
     assert event == EventResponse.parse_obj(test_event02)
     assert isinstance(event, EventResponse)
+
+
+def make_event(thing_id: str, event_id: str) -> dict:
+    return {"highCPU": {"data": 75, "timestamp": "2020-04-02 15:22:37+0000",
+                        "href": f"/spaces/space01/things/{thing_id}/events/highCPU/{event_id}"}}
+
+
+def make_events_server(events: dict, calls: list, new_events: dict = None, failures: dict = None):
+    """
+    Returns a side effect for the request mock that lists the Events of the
+    Things in `events`, newest first. `new_events` maps each Thing ID to the
+    Events added after its first poll, and `failures` to the status codes of
+    its first polls.
+    """
+    lock = threading.Lock()
+    failures = {k: list(v) for k, v in (failures or {}).items()}
+
+    def side_effect(method, url, params=None, headers=None, data=None, timeout=None, verify=None):
+        thing_id = url.split('/things/')[1].split('/')[0]
+        with lock:
+            calls.append(thing_id)
+            if failures.get(thing_id):
+                status = failures[thing_id].pop(0)
+                return make_response(status, {"error": {"status": status, "message": "failed"}})
+            if calls.count(thing_id) > 1 and new_events and thing_id in new_events:
+                events[thing_id].extend(new_events.pop(thing_id))
+            listed = list(reversed(events[thing_id]))
+        assert params == {'limit': 100}
+        return make_response(200, {"data": listed, "paging": {"next_cursor": ""}})
+
+    return side_effect
+
+
+def take(tail, n: int) -> list:
+    items = []
+    for item in tail:
+        items.append(item)
+        if len(items) == n:
+            tail.close()
+    return items
+
+
+@pytest.mark.parametrize("since_cursor, expected", [
+    (None, ["E03", "E04"]),
+    ("E01", ["E02", "E03", "E04"]),
+])
+def test_tail(since_cursor, expected):
+    """
+    Tests that a tail yields only the new Events, oldest first.
+    """
+    calls = []
+    events = {"thing01": [make_event("thing01", "E01"), make_event("thing01", "E02")]}
+    new_events = {"thing01": [make_event("thing01", "E03"), make_event("thing01", "E04")]}
+
+    with mock.patch(request_mock_pkg, side_effect=make_events_server(events, calls, new_events)):
+        tail = (API(host="test-api.swx.altairone.com").
+                set_token("valid-token").
+                spaces("space01").
+                things("thing01").
+                events().
+                tail(since_cursor=since_cursor, poll_interval=0.01))
+        with tail:
+            received = take(tail, len(expected))
+
+    assert all(isinstance(event, EventResponse) for event in received)
+    assert [event.highCPU.href.rsplit('/', 1)[1] for event in received] == expected
+    assert tail.cursor == "E04"
+
+
+def test_tail_events():
+    """
+    Tests tailing the Events of many Things, backing off the Things without
+    new Events and the ones that fail.
+    """
+    calls = []
+    thing_ids = [f"thing{i:02}" for i in range(5)]
+    events = {thing_id: [make_event(thing_id, "E01")] for thing_id in thing_ids}
+    new_events = {"thing01": [make_event("thing01", "E02")],
+                  "thing03": [make_event("thing03", "E02"), make_event("thing03", "E03")]}
+    server = make_events_server(events, calls, new_events, failures={"thing04": [503]})
+    threads = set()
+
+    def poll(*args, **kwargs):
+        threads.add(threading.get_ident())
+        return server(*args, **kwargs)
+
+    with mock.patch(request_mock_pkg, side_effect=poll):
+        space = API(host="test-api.swx.altairone.com").set_token("valid-token").spaces("space01")
+        tail = space.tail_events(thing_ids, cursors={"thing04": "E00"}, poll_interval=0.01,
+                                 max_poll_interval=0.05, max_workers=2)
+        received = take(tail, 4)
+
+    assert sorted((thing_id, event.highCPU.href) for thing_id, event in received) == \
+           [(thing_id, f"/spaces/space01/things/{thing_id}/events/highCPU/{event_id}")
+            for thing_id, event_id in [("thing01", "E02"), ("thing03", "E02"), ("thing03", "E03"),
+                                       ("thing04", "E01")]]
+    assert tail.cursors == {"thing00": "E01", "thing01": "E02", "thing02": "E01", "thing03": "E03",
+                            "thing04": "E01"}
+    assert tail.errors == {}
+    # The Things without new Events are polled less often
+    assert tail._intervals["thing00"] > tail.poll_interval
+    # All the rounds are polled by the same threads, which stop with the tail
+    assert len(threads) <= 2
+    assert tail._executor._shutdown
@@ -0,0 +1,121 @@
+import json
+import threading
+from unittest import mock
+
+import pytest
+
+from iots.api import API
+from iots.models.models import ActionValue, ErrorResponse
+from .common import make_response
+
+request_mock_pkg = 'iots.api.requests.Session.request'
+
+space_url = "https://test-api.swx.altairone.com/spaces/space01"
+
+
+def make_fleet_server(calls: list, polls_to_complete: dict, missing: set = frozenset()):
+    """
+    Returns a side effect for the request mock that creates `updateFirmware`
+    Actions and reads them. The Action of each Thing is completed after the
+    number of polls in `polls_to_complete` (or never, if it's not there), and
+    the Things in `missing` don't exist.
+    """
+    lock = threading.Lock()
+    actions = {}
+
+    def action_value(thing_id: str):
+        action = actions[thing_id]
+        completed = action['polls'] >= polls_to_complete.get(thing_id, float('inf'))
+        return {"updateFirmware": {"href": action['href'], "input": action['input'],
+                                   "status": "completed" if completed else "pending",
+                                   "timeRequested": "2023-07-01T16:34:52Z"}}
+
+    def side_effect(method, url, params=None, headers=None, data=None, timeout=None, verify=None):
+        path = url[len(space_url):].split('/')[1:]
+        with lock:
+            calls.append((method, '/'.join(path)))
+
+            if path[0] == "categories":
+                things = [{"uid": f"thing{i:02}"} for i in range(4)]
+                return make_response(200, {"data": things, "paging": {"next_cursor": ""}})
+
+            thing_id = path[1]
+            if thing_id in missing:
+                return make_response(404, {"error": {"status": 404, "message": "Thing not found"}})
+
+            if method == "POST":
+                href = f"/spaces/space01/things/{thing_id}/actions/updateFirmware/action-{thing_id}"
+                actions[thing_id] = {"href": href, "input": json.loads(data)["updateFirmware"]["input"],
+                                     "polls": 0}
+                return make_response(201, action_value(thing_id))
+
+            assert path[2:] == ["actions", "updateFirmware", f"action-{thing_id}"]
+            actions[thing_id]['polls'] += 1
+            return make_response(200, action_value(thing_id))
+
+    return side_effect
+
+
+def make_space():
+    return API(host="test-api.swx.altairone.com").set_token("valid-token").spaces("space01")
+
+
+def test_dispatch_action():
+    """
+    Tests creating an Action in many Things and polling their status until
+    they finish.
+    """
+    calls = []
+    server = make_fleet_server(calls, {"thing00": 1, "thing01": 1, "thing02": 3}, missing={"thing03"})
+    thing_ids = (f"thing{i:02}" for i in range(4))
+
+    with mock.patch(request_mock_pkg, side_effect=server):
+        summaries = []
+        for summary in make_space().dispatch_action("updateFirmware", {"version": "2.0.1"},
+                                                    thing_ids=thing_ids, poll_interval=0.01):
+            summaries.append((summary.dispatching, summary.statuses))
+
+    assert summaries == [
+        (False, {"pending": 3}),
+        (False, {"completed": 2, "pending": 1}),
+        (False, {"completed": 3}),
+    ]
+    assert summary.done and not summary.timed_out and summary.polls == 3
+    assert summary.dispatched == 3 and summary.pending == 0
+    assert isinstance(summary.actions["thing02"], ActionValue)
+    assert summary.actions["thing02"].input == {"version": "2.0.1"}
+    assert isinstance(summary.errors["thing03"], ErrorResponse)
+
+    # The completed Actions aren't polled again
+    assert calls.count(("GET", "things/thing00/actions/updateFirmware/action-thing00")) == 1
+    assert calls.count(("GET", "things/thing02/actions/updateFirmware/action-thing02")) == 3
+    assert calls.count(("POST", "things/thing03/actions/updateFirmware")) == 1
+
+
+def test_dispatch_action_category_timeout():
+    """
+    Tests creating an Action in the Things of a Category, and stopping the
+    polling when the timeout expires.
+    """
+    calls = []
+    server = make_fleet_server(calls, {"thing00": 1})
+
+    with mock.patch(request_mock_pkg, side_effect=server):
+        summaries = list(make_space().dispatch_action("updateFirmware", "v2", category="Sensors",
+                                                      poll_interval=0.01, max_poll_interval=0.02,
+                                                      timeout=0.2))
+
+    summary = summaries[-1]
+    assert summary.timed_out and not summary.done
+    assert summary.statuses == {"completed": 1, "pending": 3}
+    assert calls[0] == ("GET", "categories/Sensors/things")
+    assert sorted(summary.actions) == [f"thing{i:02}" for i in range(4)]
+    # The interval grows while the Actions don't progress
+    assert 3 <= summary.polls < 20
+
+
+def test_dispatch_action_targets():
+    with pytest.raises(ValueError):
+        make_space().dispatch_action("updateFirmware")
+    with pytest.raises(ValueError):
+        make_space().dispatch_action("updateFirmware", thing_ids=["thing01"], category="Sensors")
@@ -6,7 +6,7 @@ from unittest import mock
 import httpretty
 import requests
 
-request_mock_pkg = 'iots.api.requests.request'
+request_mock_pkg = 'iots.api.requests.Session.request'
 
 
 @httpretty.activate
@@ -69,11 +69,12 @@ def assert_pagination(pagination_function: callable, expected_url: str,
     query_params = copy.deepcopy(extra_query_params)
     query_params['limit'] = limit
 
-    original_request_func = requests.request
+    original_request_func = requests.Session.request
 
     def side_effect(*args, **kwargs):
         # Makes a real call to the request function
-        response = original_request_func(*args, **kwargs)
+        with requests.Session() as session:
+            response = original_request_func(session, *args, **kwargs)
         assert 'verify' in kwargs and kwargs['verify'] == expected_verify
         return response
 
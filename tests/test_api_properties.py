@@ -1,13 +1,15 @@
+import io
 import json
 from unittest import mock
 
 import pytest
 
 from iots.api import API
+from iots.body import RawBody
 from iots.models.models import Property, Properties
 from .common import make_response
 
-request_mock_pkg = 'iots.api.requests.request'
+request_mock_pkg = 'iots.api.requests.Session.request'
 
 
 def test_get():
@@ -138,3 +140,161 @@ def test_update_multiple():
 
     assert prop == expected_resp_payload
     assert isinstance(prop, Properties)
+
+
+def test_prepare_update_one():
+    """
+    Tests successful requests to update one property value with a prepared
+    operation.
+    """
+    with mock.patch(request_mock_pkg, return_value=make_response(200, {"temperature": 17.5})) as m:
+        update = (API(host="test-api.swx.altairone.com").
+                  set_token("valid-token").
+                  spaces("space01").
+                  things("thing01").
+                  properties("temperature").
+                  prepare_update(params={'foo': 'bar'}))
+
+        m.assert_not_called()
+
+        for value in [17.5, 18, None]:
+            prop = update(value)
+
+            m.assert_called_with("PUT",
+                                 "https://test-api.swx.altairone.com/spaces/space01/things/thing01/properties/temperature",
+                                 params={'foo': 'bar'},
+                                 headers={
+                                     'Content-Type': 'application/json',
+                                     'Authorization': 'Bearer valid-token',
+                                 },
+                                 data=json.dumps({"temperature": value}),
+                                 timeout=3,
+                                 verify=True)
+
+            assert prop == {"temperature": 17.5}
+            assert isinstance(prop, Properties)
+
+    assert m.call_count == 3
+
+
+def test_update_escaped_name():
+    """
+    Tests that the Property names are escaped in the request bodies.
+    """
+    name = 'say "hi" \\ bye'
+
+    with mock.patch(request_mock_pkg, return_value=make_response(200, {name: 1})) as m:
+        properties = (API(host="test-api.swx.altairone.com").
+                      set_token("valid-token").
+                      spaces("space01").
+                      things("thing01").
+                      properties(name))
+        properties.update(1)
+        assert json.loads(m.call_args.kwargs['data']) == {name: 1}
+
+        properties.prepare_update()(2)
+        assert json.loads(m.call_args.kwargs['data']) == {name: 2}
+
+
+def test_prepare_update_multiple():
+    """
+    Tests a successful request to update multiple property values with a
+    prepared operation.
+    """
+    new_values = {
+        "temperature": 17.5,
+        "humidity": 78
+    }
+
+    with mock.patch(request_mock_pkg, return_value=make_response(200, new_values)) as m:
+        update = (API(host="test-api.swx.altairone.com").
+                  set_token("valid-token").
+                  spaces("space01").
+                  things("thing01").
+                  properties().
+                  prepare_update(headers={'X-Foo': 'bar'}))
+        prop = update(new_values)
+
+    m.assert_called_once_with("PUT",
+                              "https://test-api.swx.altairone.com/spaces/space01/things/thing01/properties",
+                              params={},
+                              headers={
+                                  'X-Foo': 'bar',
+                                  'Content-Type': 'application/json',
+                                  'Authorization': 'Bearer valid-token',
+                              },
+                              data=json.dumps(new_values),
+                              timeout=3,
+                              verify=True)
+
+    assert prop == new_values
+    assert isinstance(prop, Properties)
+
+
+@pytest.mark.parametrize("data", [
+    b'{"temperature": 17.5, "humidity": 78}',
+    memoryview(b'{"temperature": 17.5, "humidity": 78}'),
+    '{"temperature": 17.5, "humidity": 78}',
+])
+def test_update_raw_body(data):
+    """
+    Tests a successful request to update property values with a pre-serialised
+    body, which is sent as is.
+    """
+    expected_resp_payload = {"temperature": 17.5, "humidity": 78}
+    body = RawBody(data)
+
+    with mock.patch(request_mock_pkg, return_value=make_response(200, expected_resp_payload)) as m, \
+            mock.patch('iots.internal.resource.request_converters') as request_converters:
+        prop = (API(host="test-api.swx.altairone.com").
+                set_token("valid-token").
+                spaces("space01").
+                things("thing01").
+                properties().
+                update(body))
+
+    request_converters.assert_not_called()
+    m.assert_called_once_with("PUT",
+                              "https://test-api.swx.altairone.com/spaces/space01/things/thing01/properties",
+                              params={},
+                              headers={
+                                  'Content-Type': 'application/json',
+                                  'Authorization': 'Bearer valid-token',
+                              },
+                              data=mock.ANY,
+                              timeout=3,
+                              verify=True)
+    assert m.call_args[1]['data'] is body.data
+
+    assert prop == expected_resp_payload
+    assert isinstance(prop, Properties)
+
+
+def test_update_file():
+    """
+    Tests a successful request to update property values with a payload read
+    from a file, which is streamed as is.
+    """
+    expected_resp_payload = {"temperature": 17.5, "humidity": 78}
+    body = io.BytesIO(b'{"temperature": 17.5, "humidity": 78}')
+
+    with mock.patch(request_mock_pkg, return_value=make_response(200, expected_resp_payload)) as m:
+        prop = (API(host="test-api.swx.altairone.com").
+                set_token("valid-token").
+                spaces("space01").
+                things("thing01").
+                properties().
+                update(body))
+
+    m.assert_called_once_with("PUT",
+                              "https://test-api.swx.altairone.com/spaces/space01/things/thing01/properties",
+                              params={},
+                              headers={
+                                  'Content-Type': 'application/json',
+                                  'Authorization': 'Bearer valid-token',
+                              },
+                              data=body,
+                              timeout=3,
+                              verify=True)
+
+    assert prop == expected_resp_payload
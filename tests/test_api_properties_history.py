@@ -1,222 +1,387 @@
-# import json
-# from datetime import datetime
-# from unittest import mock
-#
-# import pytest
-# from pydantic import BaseModel
-#
-# from iots.api import API
-# from iots.models.models import PropertyHistoryValueList, Properties, PropertyHistoryValue, \
-#     CreatePropertyHistoryValuesRequest, PropertyHistoryValues
-# from .common import make_response, to_json
-# from .test_api_pagination import assert_pagination
-#
-# request_mock_pkg = 'iots.api.requests.request'
-#
-# test_properties_history_value_payload = {
-#     "at": "2024-04-02T11:17:09.122Z",
-#     "properties": {
-#         "humidity": 10
-#     }
-# }
-#
-# test_properties_history_values = [
-#     {
-#         "at": "2024-04-02T11:17:09.122Z",
-#         "properties": {
-#             "humidity": 10
-#         }
-#     },
-#     {
-#         "at": "2024-04-02T11:17:09.122Z",
-#         "properties": {
-#             "is_raining": True
-#         }
-#     },
-#     {
-#         "at": "2024-04-02T11:17:04.703Z",
-#         "properties": {
-#             "is_raining": False
-#         }
-#     },
-#     {
-#         "at": "2024-04-02T11:17:02.518Z",
-#         "properties": {
-#             "temperature": 21
-#         }
-#     },
-#     {
-#         "at": "2024-04-02T11:16:58.157Z",
-#         "properties": {
-#             "humidity": 7
-#         }
-#     },
-#     {
-#         "at": "2024-04-02T11:16:56.417Z",
-#         "properties": {
-#             "humidity": 1
-#         }
-#     },
-#     {
-#         "at": "2024-04-02T11:16:52.499Z",
-#         "properties": {
-#             "humidity": 0
-#         }
-#     }
-# ]
-#
-#
-# def compare_properties_history_value(a, b):
-#     class DateTimeModel(BaseModel):
-#         dt: datetime
-#
-#     dt_a = a['at']
-#     if not isinstance(dt_a, datetime):
-#         dt_a = DateTimeModel(dt=dt_a).dt
-#
-#     dt_b = b['at']
-#     if not isinstance(dt_b, datetime):
-#         dt_b = DateTimeModel(dt=dt_b).dt
-#
-#     assert dt_a == dt_b
-#     assert a['properties'] == b['properties']
-#
-#
-# @pytest.mark.parametrize("req_payload", [
-#     CreatePropertyHistoryValuesRequest.parse_obj(test_properties_history_value_payload),
-#     test_properties_history_value_payload,
-# ])
-# def test_create(req_payload):
-#     """
-#     Tests a successful request to create a Properties-history value.
-#     """
-#     expected_resp_payload = test_properties_history_value_payload
-#
-#     expected_resp = make_response(201, expected_resp_payload)
-#
-#     with mock.patch(request_mock_pkg, return_value=expected_resp) as m:
-#         action = (API(host="test-api.swx.altairone.com").
-#                   set_token("valid-token").
-#                   spaces("space01").
-#                   things("thing01").
-#                   properties_history().
-#                   create(req_payload, params={'foo': 'bar'}))
-#
-#     m.assert_called_once_with("POST",
-#                               "https://test-api.swx.altairone.com/spaces/space01/things",
-#                               params={'foo': 'bar'},
-#                               headers={
-#                                   'Authorization': 'Bearer valid-token',
-#                                   'Content-Type': 'application/json',
-#                               },
-#                               data=to_json(req_payload),
-#                               timeout=3)
-#
-#     assert action == PropertyHistoryValues.parse_obj(expected_resp_payload)
-#     assert isinstance(action, PropertyHistoryValues)
-#
-#
-# def test_list():
-#     """
-#     Tests a successful request to get the properties-history values of all the
-#     Properties of a Thing.
-#     """
-#     expected_resp_payload = {
-#         "data": test_properties_history_values,
-#         "paging": {
-#             "next_cursor": "",
-#             "previous_cursor": ""
-#         }
-#     }
-#
-#     expected_resp = make_response(200, expected_resp_payload)
-#
-#     with mock.patch(request_mock_pkg, return_value=expected_resp) as m:
-#         values = (API(host="test-api.swx.altairone.com").
-#                   set_token("valid-token").
-#                   spaces("space01").
-#                   things("thing01").
-#                   properties_history().
-#                   get(params={'foo': 'bar'}))
-#
-#     m.assert_called_once_with("GET",
-#                               "https://test-api.swx.altairone.com/spaces/space01/things/thing01/properties-history",
-#                               params={'foo': 'bar'},
-#                               headers={'Authorization': 'Bearer valid-token'},
-#                               data=[],
-#                               timeout=3)
-#
-#     for i, v in enumerate(values):
-#         compare_properties_history_value(v, expected_resp_payload['data'][i])
-#
-#     assert values == PropertyHistoryValueList.parse_obj(expected_resp_payload)
-#     assert isinstance(values, PropertyHistoryValueList)
-#
-#     # Test pagination
-#     pagination_function = (API(host="test-api.swx.altairone.com").
-#                            set_token("valid-token").
-#                            spaces("space01").
-#                            things("thing01").
-#                            properties_history().
-#                            get)
-#
-#     for limit in range(1, 10):
-#         assert_pagination(pagination_function,
-#                           "https://test-api.swx.altairone.com/spaces/space01/things/thing01/properties-history",
-#                           test_properties_history_values, limit, {'foo': 'bar'},
-#                           lambda x: str(test_properties_history_values.index(x)), PropertyHistoryValue)
-#
-#
-# def test_list_by_property_name():
-#     """
-#     Tests a successful request to get the properties-history values of a
-#     specific Property.
-#     """
-#     test_properties_history_humidity_values = [v for v in test_properties_history_values if
-#                                                'humidity' in v['properties']]
-#
-#     expected_resp_payload = {
-#         "data": test_properties_history_humidity_values,
-#         "paging": {
-#             "next_cursor": "",
-#             "previous_cursor": ""
-#         }
-#     }
-#
-#     expected_resp = make_response(200, expected_resp_payload)
-#
-#     with mock.patch(request_mock_pkg, return_value=expected_resp) as m:
-#         values = (API(host="test-api.swx.altairone.com").
-#                   set_token("valid-token").
-#                   spaces("space01").
-#                   things("thing01").
-#                   properties_history("humidity").
-#                   get(params={'foo': 'bar'}))
-#
-#     m.assert_called_once_with("GET",
-#                               "https://test-api.swx.altairone.com/spaces/space01/things/thing01/properties-history/humidity",
-#                               params={'foo': 'bar'},
-#                               headers={'Authorization': 'Bearer valid-token'},
-#                               data=[],
-#                               timeout=3)
-#
-#     for i, v in enumerate(values):
-#         compare_properties_history_value(v, expected_resp_payload['data'][i])
-#
-#     assert values == PropertyHistoryValueList.parse_obj(expected_resp_payload)
-#     assert isinstance(values, PropertyHistoryValueList)
-#
-#     # Test pagination
-#     pagination_function = (API(host="test-api.swx.altairone.com").
-#                            set_token("valid-token").
-#                            spaces("space01").
-#                            things("thing01").
-#                            properties_history("humidity").
-#                            get)
-#
-#     for limit in range(1, 10):
-#         assert_pagination(pagination_function,
-#                           "https://test-api.swx.altairone.com/spaces/space01/things/thing01/properties-history/humidity",
-#                           test_properties_history_humidity_values, limit, {'foo': 'bar'},
-#                           lambda x: str(test_properties_history_humidity_values.index(x)), PropertyHistoryValue,
-#                           lambda x: len(x.properties) == 1 and 'humidity' in x.properties)
+import json
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from pydantic import BaseModel
+from requests import Request
+
+from iots.api import API
+from iots.models.exceptions import ResponseError
+from iots.models.models import PropertyHistoryValueList, PropertyHistoryValue, \
+    CreatePropertyHistoryValuesRequest, PropertyHistoryValues
+from iots.models.primitives import NoResponse
+from iots.models.timestamps import parse_timestamp
+from .common import make_response, to_json
+from .test_api_pagination import assert_pagination
+
+request_mock_pkg = 'iots.api.requests.Session.request'
+
+test_properties_history_value_payload = {
+    "at": "2024-04-02T11:17:09.122Z",
+    "properties": {
+        "humidity": 10
+    }
+}
+
+test_properties_history_values = [
+    {
+        "at": "2024-04-02T11:17:09.122Z",
+        "properties": {
+            "humidity": 10
+        }
+    },
+    {
+        "at": "2024-04-02T11:17:09.122Z",
+        "properties": {
+            "is_raining": True
+        }
+    },
+    {
+        "at": "2024-04-02T11:17:04.703Z",
+        "properties": {
+            "is_raining": False
+        }
+    },
+    {
+        "at": "2024-04-02T11:17:02.518Z",
+        "properties": {
+            "temperature": 21
+        }
+    },
+    {
+        "at": "2024-04-02T11:16:58.157Z",
+        "properties": {
+            "humidity": 7
+        }
+    },
+    {
+        "at": "2024-04-02T11:16:56.417Z",
+        "properties": {
+            "humidity": 1
+        }
+    },
+    {
+        "at": "2024-04-02T11:16:52.499Z",
+        "properties": {
+            "humidity": 0
+        }
+    }
+]
+
+
+def compare_properties_history_value(a, b):
+    class DateTimeModel(BaseModel):
+        dt: datetime
+
+    dt_a = a['at']
+    if not isinstance(dt_a, datetime):
+        dt_a = DateTimeModel(dt=dt_a).dt
+
+    dt_b = b['at']
+    if not isinstance(dt_b, datetime):
+        dt_b = DateTimeModel(dt=dt_b).dt
+
+    assert dt_a == dt_b
+    assert a['properties'] == b['properties']
+
+
+@pytest.mark.parametrize("req_payload", [
+    CreatePropertyHistoryValuesRequest.parse_obj(test_properties_history_value_payload),
+    test_properties_history_value_payload,
+])
+def test_create(req_payload):
+    """
+    Tests a successful request to create a Properties-history value.
+    """
+    expected_resp_payload = [test_properties_history_value_payload]
+
+    expected_resp = make_response(201, json.dumps(expected_resp_payload))
+    expected_resp.headers['Content-Type'] = 'application/json'
+
+    with mock.patch(request_mock_pkg, return_value=expected_resp) as m:
+        values = (API(host="test-api.swx.altairone.com").
+                  set_token("valid-token").
+                  spaces("space01").
+                  things("thing01").
+                  properties_history().
+                  create(req_payload, params={'foo': 'bar'}))
+
+    m.assert_called_once_with("POST",
+                              "https://test-api.swx.altairone.com/spaces/space01/things/thing01/properties-history",
+                              params={'foo': 'bar'},
+                              headers={
+                                  'Authorization': 'Bearer valid-token',
+                                  'Content-Type': 'application/json',
+                              },
+                              data=to_json(req_payload),
+                              timeout=3,
+                              verify=True)
+
+    assert values == PropertyHistoryValues.parse_obj(expected_resp_payload)
+    assert isinstance(values, PropertyHistoryValues)
+
+
+def test_list():
+    """
+    Tests a successful request to get the properties-history values of all the
+    Properties of a Thing.
+    """
+    expected_resp_payload = {
+        "data": test_properties_history_values,
+        "paging": {
+            "next_cursor": "",
+            "previous_cursor": ""
+        }
+    }
+
+    expected_resp = make_response(200, expected_resp_payload)
+
+    with mock.patch(request_mock_pkg, return_value=expected_resp) as m:
+        values = (API(host="test-api.swx.altairone.com").
+                  set_token("valid-token").
+                  spaces("space01").
+                  things("thing01").
+                  properties_history().
+                  get(params={'foo': 'bar'}))
+
+    m.assert_called_once_with("GET",
+                              "https://test-api.swx.altairone.com/spaces/space01/things/thing01/properties-history",
+                              params={'foo': 'bar'},
+                              headers={'Authorization': 'Bearer valid-token'},
+                              data=[],
+                              timeout=3,
+                              verify=True)
+
+    for i, v in enumerate(values):
+        compare_properties_history_value(v, expected_resp_payload['data'][i])
+
+    assert values == PropertyHistoryValueList.parse_obj(expected_resp_payload)
+    assert isinstance(values, PropertyHistoryValueList)
+
+    # Test pagination
+    pagination_function = (API(host="test-api.swx.altairone.com").
+                           set_token("valid-token").
+                           spaces("space01").
+                           things("thing01").
+                           properties_history().
+                           get)
+
+    for limit in range(1, 10):
+        assert_pagination(pagination_function,
+                          "https://test-api.swx.altairone.com/spaces/space01/things/thing01/properties-history",
+                          test_properties_history_values, limit, {'foo': 'bar'},
+                          lambda x: str(test_properties_history_values.index(x)), PropertyHistoryValue)
+
+
+def test_list_by_property_name():
+    """
+    Tests a successful request to get the properties-history values of a
+    specific Property.
+    """
+    test_properties_history_humidity_values = [v for v in test_properties_history_values if
+                                               'humidity' in v['properties']]
+
+    expected_resp_payload = {
+        "data": test_properties_history_humidity_values,
+        "paging": {
+            "next_cursor": "",
+            "previous_cursor": ""
+        }
+    }
+
+    expected_resp = make_response(200, expected_resp_payload)
+
+    with mock.patch(request_mock_pkg, return_value=expected_resp) as m:
+        values = (API(host="test-api.swx.altairone.com").
+                  set_token("valid-token").
+                  spaces("space01").
+                  things("thing01").
+                  properties_history("humidity").
+                  get(params={'foo': 'bar'}))
+
+    m.assert_called_once_with("GET",
+                              "https://test-api.swx.altairone.com/spaces/space01/things/thing01/properties-history/humidity",
+                              params={'foo': 'bar'},
+                              headers={'Authorization': 'Bearer valid-token'},
+                              data=[],
+                              timeout=3,
+                              verify=True)
+
+    for i, v in enumerate(values):
+        compare_properties_history_value(v, expected_resp_payload['data'][i])
+
+    assert values == PropertyHistoryValueList.parse_obj(expected_resp_payload)
+    assert isinstance(values, PropertyHistoryValueList)
+
+    # Test pagination
+    pagination_function = (API(host="test-api.swx.altairone.com").
+                           set_token("valid-token").
+                           spaces("space01").
+                           things("thing01").
+                           properties_history("humidity").
+                           get)
+
+    for limit in range(1, 10):
+        assert_pagination(pagination_function,
+                          "https://test-api.swx.altairone.com/spaces/space01/things/thing01/properties-history/humidity",
+                          test_properties_history_humidity_values, limit, {'foo': 'bar'},
+                          lambda x: str(test_properties_history_humidity_values.index(x)), PropertyHistoryValue,
+                          lambda x: len(x.properties) == 1 and 'humidity' in x.properties)
+
+
+def test_delete():
+    """
+    Tests a successful request to delete the properties-history values of some
+    Properties of a Thing in a Category.
+    """
+    expected_resp = make_response(204)
+    params = {'at': '2024-04-01|2024-04-02', 'property_name[]': ['humidity', 'is_raining']}
+
+    with mock.patch(request_mock_pkg, return_value=expected_resp) as m:
+        resp = (API(host="test-api.swx.altairone.com").
+                set_token("valid-token").
+                spaces("space01").
+                categories("weather").
+                things("thing01").
+                properties_history().
+                delete(params=params))
+
+    m.assert_called_once_with("DELETE",
+                              "https://test-api.swx.altairone.com/spaces/space01/categories/weather/things/thing01/properties-history",
+                              params=params,
+                              headers={'Authorization': 'Bearer valid-token'},
+                              data=[],
+                              timeout=3,
+                              verify=True)
+
+    assert isinstance(resp, NoResponse)
+
+
+def make_history_server(values: list, requests_made: list = None):
+    """
+    Returns a side effect for the request mock that serves the given
+    properties-history values (sorted from the most recent to the oldest),
+    filtered by the `at` range (both ends included) and paginated.
+    """
+
+    def side_effect(method, url, params=None, headers=None, data=None, timeout=None, verify=None):
+        # The next pages are requested with the query parameters in the URL
+        req = Request(method, url, params=params, headers=headers).prepare()
+        params = {k: v[0] for k, v in parse_qs(urlparse(req.url).query).items()}
+        if requests_made is not None:
+            requests_made.append(params)
+
+        start, end = (parse_timestamp(t) for t in params['at'].split('|'))
+        matching = [v for v in values if start <= parse_timestamp(v['at']) <= end]
+
+        offset = int(params.get('next_cursor') or 0)
+        limit = int(params['limit'])
+        next_offset = offset + limit
+
+        return make_response(200, {
+            "data": matching[offset:next_offset],
+            "paging": {
+                "next_cursor": str(next_offset) if next_offset < len(matching) else "",
+                "previous_cursor": "",
+            },
+        }, req)
+
+    return side_effect
+
+
+def history_values(count: int, start: datetime, step: timedelta) -> list:
+    """ Returns values sorted from the most recent to the oldest. """
+    values = [{"at": (start + step * i).isoformat().replace('+00:00', 'Z'),
+               "properties": {"counter": i}} for i in range(count)]
+    values.reverse()
+    return values
+
+
+@pytest.mark.parametrize("shards", [1, 3, 8])
+def test_download(shards):
+    """
+    Tests downloading the properties-history values of a time range split into
+    shards.
+    """
+    start = datetime(2024, 4, 1, tzinfo=timezone.utc)
+    values = history_values(100, start, timedelta(minutes=1))
+    requests_made = []
+
+    with mock.patch(request_mock_pkg, side_effect=make_history_server(values, requests_made)):
+        downloaded = list(API(host="test-api.swx.altairone.com").
+                          set_token("valid-token").
+                          spaces("space01").
+                          things("thing01").
+                          properties_history().
+                          download(start, start + timedelta(minutes=99), shards=shards, limit=7,
+                                   params={'group': True}))
+
+    # Values at the shard boundaries aren't duplicated, and the end is included
+    assert [v.properties['counter'] for v in downloaded] == list(range(99, -1, -1))
+    assert all(isinstance(v, PropertyHistoryValue) for v in downloaded)
+
+    assert len({r['at'] for r in requests_made}) == shards
+    assert all(r['group'] == 'True' and r['limit'] == '7' for r in requests_made)
+
+
+def test_download_property():
+    """
+    Tests downloading the properties-history values of a Property with string
+    timestamps.
+    """
+    start = datetime(2024, 4, 1, tzinfo=timezone.utc)
+    values = history_values(10, start, timedelta(seconds=1))
+
+    with mock.patch(request_mock_pkg, side_effect=make_history_server(values)) as m:
+        downloaded = list(API(host="test-api.swx.altairone.com").
+                          set_token("valid-token").
+                          spaces("space01").
+                          things("thing01").
+                          properties_history("counter").
+                          download("2024-04-01T00:00:00Z", "2024-04-01T00:00:05.500Z", shards=2))
+
+    assert [v.properties['counter'] for v in downloaded] == [5, 4, 3, 2, 1, 0]
+    assert m.call_args.args[1] == \
+           "https://test-api.swx.altairone.com/spaces/space01/things/thing01/properties-history/counter"
+    assert sorted(c.kwargs['params']['at'] for c in m.call_args_list) == [
+        "2024-04-01T00:00:00.000Z|2024-04-01T00:00:02.750Z",
+        "2024-04-01T00:00:02.750Z|2024-04-01T00:00:05.500Z",
+    ]
+
+
+def test_download_error():
+    """
+    Tests that the errors of a shard are raised while downloading.
+    """
+    start = datetime(2024, 4, 1, tzinfo=timezone.utc)
+    serve = make_history_server(history_values(10, start, timedelta(minutes=1)))
+
+    def side_effect(method, url, params=None, **kwargs):
+        if params.get('at', '').startswith("2024-04-01T00:00:00.000Z"):
+            return make_response(500, {"error": {"status": 500, "message": "Internal error"}})
+        return serve(method, url, params=params, **kwargs)
+
+    history = (API(host="test-api.swx.altairone.com").
+               set_token("valid-token").
+               spaces("space01").
+               things("thing01").
+               properties_history())
+
+    with mock.patch(request_mock_pkg, side_effect=side_effect):
+        values = history.download(start, start + timedelta(minutes=9), shards=2)
+        # The most recent shard is returned before the error
+        assert [next(values).properties['counter'] for _ in range(5)] == [9, 8, 7, 6, 5]
+        with pytest.raises(ResponseError):
+            next(values)
+
+
+def test_download_invalid_range():
+    history = API(host="test-api.swx.altairone.com").spaces("space01").things("thing01").properties_history()
+
+    with pytest.raises(ValueError):
+        history.download("2024-04-02T00:00:00Z", "2024-04-01T00:00:00Z")
+
+    with pytest.raises(ValueError):
+        history.download("2024-04-01T00:00:00Z", "2024-04-02T00:00:00Z", shards=0)
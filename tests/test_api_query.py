@@ -0,0 +1,241 @@
+import json
+import threading
+from unittest import mock
+
+import pytest
+
+from iots.api import API
+from iots.models.exceptions import ResponseError
+from iots.models.models import PostAPICursor, PostAPICursorResponse
+from .common import make_response, to_json
+
+request_mock_pkg = 'iots.api.requests.Session.request'
+
+cursor_url = "https://test-api.swx.altairone.com/spaces/space01/query/cursor"
+
+test_query = {
+    "query": "FOR i IN RANGE(@min,@max) RETURN i",
+    "count": True,
+    "batchSize": 3,
+    "bindVars": {"min": 0, "max": 7},
+}
+
+
+def cursor_batch(result: list, has_more: bool, code: int = 201) -> dict:
+    batch = {"result": result, "hasMore": has_more, "count": 8, "error": False, "code": code,
+             "extra": {"stats": {"executionTime": 0.00015875999815762043}}}
+    if has_more:
+        batch["id"] = "3298550880725"
+    return batch
+
+
+def make_cursor_server(documents: list, batch_size: int, calls: list, delete_status: int = 202):
+    """
+    Returns a side effect for the request mock that serves the documents with
+    a query cursor.
+    """
+    lock = threading.Lock()
+    offset = 0
+
+    def side_effect(method, url, params=None, headers=None, data=None, timeout=None, verify=None):
+        nonlocal offset
+        with lock:
+            calls.append((method, url))
+            if method == "DELETE":
+                return make_response(delete_status)
+
+            status_code = 201 if url == cursor_url else 200
+            batch = documents[offset:offset + batch_size]
+            offset += batch_size
+            return make_response(status_code, cursor_batch(batch, offset < len(documents), status_code))
+
+    return side_effect
+
+
+def make_cursor():
+    return (API(host="test-api.swx.altairone.com").
+            set_token("valid-token").
+            spaces("space01").
+            query().
+            cursor())
+
+
+@pytest.mark.parametrize("req", [
+    PostAPICursor.parse_obj(test_query),
+    test_query,
+])
+def test_create(req):
+    """
+    Tests a successful request to create a query cursor.
+    """
+    expected_resp_payload = cursor_batch([0, 1, 2], True)
+    expected_resp = make_response(201, expected_resp_payload)
+
+    with mock.patch(request_mock_pkg, return_value=expected_resp) as m:
+        resp = make_cursor().create(req)
+
+    m.assert_called_once_with("POST",
+                              cursor_url,
+                              params={},
+                              headers={
+                                  'Authorization': 'Bearer valid-token',
+                                  'Content-Type': 'application/json',
+                              },
+                              data=to_json(req),
+                              timeout=3,
+                              verify=True)
+
+    assert resp == PostAPICursorResponse.parse_obj(expected_resp_payload)
+    assert isinstance(resp, PostAPICursorResponse)
+    assert PostAPICursor.parse_obj(test_query).bindVars == {"min": 0, "max": 7}
+
+
+def test_next():
+    """
+    Tests a successful request to read the next batch of a query cursor.
+    """
+    expected_resp_payload = cursor_batch([3, 4, 5], True, 200)
+    expected_resp = make_response(200, expected_resp_payload)
+
+    with mock.patch(request_mock_pkg, return_value=expected_resp) as m:
+        resp = (API(host="test-api.swx.altairone.com").
+                set_token("valid-token").
+                spaces("space01").
+                query().
+                cursor("3298550880725").
+                next())
+
+    m.assert_called_once_with("POST",
+                              cursor_url + "/3298550880725",
+                              params={},
+                              headers={
+                                  'Authorization': 'Bearer valid-token',
+                                  'Content-Type': 'application/json',
+                              },
+                              data='{}',
+                              timeout=3,
+                              verify=True)
+
+    assert resp == PostAPICursorResponse.parse_obj(expected_resp_payload)
+
+
+@pytest.mark.parametrize("prefetch", [True, False])
+def test_stream(prefetch):
+    """
+    Tests streaming the results of a query through all the cursor batches.
+    """
+    calls = []
+
+    with mock.patch(request_mock_pkg, side_effect=make_cursor_server(list(range(8)), 3, calls)) as m:
+        stream = make_cursor().stream(test_query["query"], test_query["bindVars"],
+                                      batch_size=3, ttl=30, count=True, prefetch=prefetch)
+        assert m.call_count == 0
+        assert list(stream) == list(range(8))
+
+    assert calls == [("POST", cursor_url),
+                     ("POST", cursor_url + "/3298550880725"),
+                     ("POST", cursor_url + "/3298550880725")]
+    assert json.loads(m.call_args_list[0].kwargs['data']) == {**test_query, "ttl": 30}
+    assert stream.count == 8 and stream.batches == 3
+    assert stream.extra == {"stats": {"executionTime": 0.00015875999815762043}}
+
+
+def test_stream_prefetch():
+    """
+    Tests that the next batch is requested while the current one is consumed.
+    """
+    calls = []
+
+    with mock.patch(request_mock_pkg, side_effect=make_cursor_server(list(range(8)), 3, calls)):
+        with make_cursor().stream(test_query["query"], batch_size=3) as stream:
+            results = iter(stream)
+            assert next(results) == 0
+            stream._next_batch.result(timeout=5)
+            assert len(calls) == 2
+            assert list(results) == list(range(1, 8))
+
+
+@pytest.mark.parametrize("n_results", [4, 7])
+def test_stream_prefetch_slow_consumer(n_results):
+    """
+    Tests that the last batch isn't dropped when it's prefetched while the
+    consumer is still reading the previous one.
+    """
+    results = []
+
+    with mock.patch(request_mock_pkg, side_effect=make_cursor_server(list(range(n_results)), 2, [])):
+        with make_cursor().stream(test_query["query"], batch_size=2) as stream:
+            for i in stream:
+                if stream._next_batch is not None:
+                    stream._next_batch.result(timeout=5)
+                results.append(i)
+
+    assert results == list(range(n_results))
+
+
+def test_stream_close_after_last_prefetch():
+    """
+    Tests that an exhausted cursor isn't deleted when the stream is closed
+    after its last batch was prefetched.
+    """
+    calls = []
+
+    with mock.patch(request_mock_pkg, side_effect=make_cursor_server(list(range(4)), 2, calls)):
+        with make_cursor().stream(test_query["query"], batch_size=2) as stream:
+            for i in stream:
+                stream._next_batch.result(timeout=5)
+                break
+
+    assert [method for method, _ in calls] == ["POST", "POST"]
+
+
+@pytest.mark.parametrize("delete_status", [202, 405])
+def test_stream_early_exit(delete_status):
+    """
+    Tests that an unfinished cursor is deleted when the stream is closed, even
+    if the server doesn't support deleting cursors.
+    """
+    calls = []
+    side_effect = make_cursor_server(list(range(10)), 3, calls, delete_status)
+
+    with mock.patch(request_mock_pkg, side_effect=side_effect):
+        with make_cursor().stream(test_query["query"], batch_size=3) as stream:
+            for i in stream:
+                if i == 4:
+                    break
+
+    # The third batch had been prefetched, but the cursor has more results
+    assert calls.count(("POST", cursor_url + "/3298550880725")) == 2
+    assert calls[-1] == ("DELETE", cursor_url + "/3298550880725")
+    assert calls.count(("DELETE", cursor_url + "/3298550880725")) == 1
+
+
+def test_stream_exhausted():
+    """
+    Tests that exhausted cursors and single-batch results aren't deleted.
+    """
+    calls = []
+
+    with mock.patch(request_mock_pkg, side_effect=make_cursor_server(list(range(3)), 3, calls)):
+        with make_cursor().stream(test_query["query"], batch_size=3) as stream:
+            assert list(stream) == [0, 1, 2]
+
+    assert calls == [("POST", cursor_url)]
+    assert stream.id is None
+
+
+def test_stream_error():
+    """
+    Tests that errors fetching a batch are raised, and the cursor is deleted.
+    """
+    error = {"error": {"status": 404, "message": "Cursor not found"}}
+    responses = [make_response(201, cursor_batch([0, 1, 2], True)),
+                 make_response(404, error),
+                 make_response(202)]
+
+    with mock.patch(request_mock_pkg, side_effect=responses) as m:
+        stream = make_cursor().stream(test_query["query"], batch_size=3)
+        with pytest.raises(ResponseError):
+            list(stream)
+
+    assert m.call_args.args == ("DELETE", cursor_url + "/3298550880725")
@@ -1,4 +1,13 @@
+from unittest import mock
+
+import requests
+
 from iots.api import API
+from iots.internal.resource import APIResource
+from iots.internal.response import compile_responses, response_json
+from iots.models.models import ErrorResponse, Property
+from iots.models.primitives import NoResponse
+from .common import make_response
 
 
 def test_build_url():
@@ -34,3 +43,135 @@ def test_build_path():
     assert api.spaces("space01").things()._build_path() == "/spaces/space01/things"
     assert api.spaces("space01")._build_path() == "/spaces/space01"
     assert thing1.properties()._build_path() == "/spaces/space01/categories/cat01/things/thing01/properties"
+
+
+def test_resource_chain():
+    """
+    Shares the call chain between resources instead of copying it.
+    """
+    api = API(host="test-api.swx.altairone.com")
+    space = api.spaces("space01")
+    thing = space.things("thing01")
+    prop = thing.properties("temperature")
+
+    assert prop._parent is thing
+    assert thing._parent is space
+    assert space._parent is api
+    assert prop._api() is api
+    assert prop._stack == [api, space, thing]
+    assert not hasattr(prop, '__dict__')
+
+    assert prop._path_value('space') == "space01"
+    assert prop._path_value('thing_id') == "thing01"
+    assert prop._path_value('unknown') is None
+    assert prop._path_values() == {'space': "space01", 'thing_id': "thing01", 'property': "temperature"}
+
+
+def test_response_table_lookup():
+    """
+    Dispatches responses by status code and Content-Type using a compiled
+    response table.
+    """
+    table = compile_responses([
+        (0, "application/json", ErrorResponse),
+        (200, "application/json", Property),
+        (200, "text/plain", str),
+        (400, "application/json", ErrorResponse),
+    ])
+
+    assert table.accepts_status(200)
+    assert table.accepts_status(418)
+
+    resp_class, decode = table.lookup(200, "application/json; charset=utf-8")
+    assert resp_class is Property
+    assert decode(make_response(200, {"temperature": 21.7})) == {"temperature": 21.7}
+
+    resp_class, decode = table.lookup(200, "text/plain")
+    assert resp_class is str
+    assert decode(make_response(200, "hello")) == "hello"
+
+    # The default response is only used when no other response matches
+    assert table.lookup(400, "application/json")[0] is ErrorResponse
+    assert table.lookup(418, "application/json")[0] is ErrorResponse
+    assert table.lookup(200, "application/xml") is None
+    assert table.lookup(200, None) is None
+
+
+def test_response_table_no_content():
+    """
+    Dispatches responses without body using a compiled response table.
+    """
+    table = compile_responses([
+        (204, "", NoResponse),
+        (404, "application/json", ErrorResponse),
+    ])
+
+    assert table.accepts_status(204)
+    assert not table.accepts_status(200)
+    assert table.lookup(204, None) == (NoResponse, None)
+
+
+def test_response_table_cache():
+    """
+    Compiles identical expected responses only once.
+    """
+    expected_responses = [
+        (200, "application/json", Property),
+        (404, "application/json", ErrorResponse),
+    ]
+
+    table = compile_responses(expected_responses)
+    assert compile_responses(list(expected_responses)) is table
+    assert compile_responses(table) is table
+
+    table.lookup(200, "application/json")
+    assert (200, "application/json") in table._dispatch
+
+
+def test_path_values_only_computed_for_pagination():
+    """
+    Doesn't compute the path values of responses without pagination.
+    """
+    resp = make_response(200, {"temperature": 21.7})
+    prop = API(host="test-api.swx.altairone.com").set_token("valid-token") \
+        .spaces("space01").things("thing01").properties("temperature")
+
+    with mock.patch('iots.api.requests.Session.request', return_value=resp), \
+            mock.patch.object(APIResource, '_path_values') as path_values:
+        assert prop.get() == {"temperature": 21.7}
+
+    path_values.assert_not_called()
+
+
+def test_response_body_decoded_once_per_page():
+    """
+    Decodes the body of a paginated response only once, for both the model
+    and the pagination expressions.
+    """
+    page = {"paging": {"next_cursor": "thing02", "previous_cursor": ""},
+            "data": [{"uid": "thing01"}]}
+    last_page = {"paging": {"next_cursor": "", "previous_cursor": "thing01"},
+                 "data": [{"uid": "thing02"}]}
+
+    req = requests.Request("GET", "https://test-api.swx.altairone.com/spaces/space01/things")
+    responses = [make_response(200, page, req), make_response(200, last_page, req)]
+    things = API(host="test-api.swx.altairone.com").set_token("valid-token") \
+        .spaces("space01").things()
+
+    original_json = requests.Response.json
+    with mock.patch('iots.api.requests.Session.request', side_effect=responses), \
+            mock.patch.object(requests.Response, 'json', autospec=True,
+                              side_effect=original_json) as decode:
+        resp = things.get()
+        assert decode.call_count == 1
+
+        assert [thing.uid for thing in resp] == ["thing01", "thing02"]
+        assert decode.call_count == 2
+
+    # The decoded body isn't kept once the response has been handled
+    assert not any(k.startswith('_iots') for k in vars(responses[0]))
+    with mock.patch.object(requests.Response, 'json', autospec=True,
+                           side_effect=original_json) as decode:
+        assert response_json(responses[0]) == page
+        assert response_json(responses[0]) == page
+        assert decode.call_count == 2
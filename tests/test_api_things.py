@@ -1,13 +1,17 @@
+import json
+import threading
 from unittest import mock
+from urllib.parse import parse_qs, urlparse
 
 import pytest
+import requests
 
 from iots.api import API
-from iots.models.models import Thing, ThingList, ThingCreate, ThingUpdate, ThingPatch
+from iots.models.models import Thing, ThingList, ThingCreate, ThingUpdate, ThingPatch, ThingsDeleted
 from .common import make_response, to_json
 from .test_api_pagination import assert_pagination
 
-request_mock_pkg = 'iots.api.requests.request'
+request_mock_pkg = 'iots.api.requests.Session.request'
 
 test_thing01 = {
     "uid": "THING000000000000000000001",
@@ -336,6 +340,43 @@ def test_patch(thing_req):
     assert isinstance(action, Thing)
 
 
+
+def test_patch_stream():
+    """
+    Tests a successful request to partially update a Thing with a payload
+    streamed from a generator.
+    """
+    expected_resp = make_response(200, test_thing01)
+    sent = []
+
+    def mock_request(*args, **kwargs):
+        # Read the streamed body as the transport would do
+        sent.extend(kwargs['data'])
+        return expected_resp
+
+    operations = (op for op in test_patch_request)
+
+    with mock.patch(request_mock_pkg, side_effect=mock_request) as m:
+        action = (API(host="test-api.swx.altairone.com").
+                  set_token("valid-token").
+                  spaces("space01").
+                  things("THING000000000000000000001").
+                  patch(operations))
+
+    m.assert_called_once_with("PATCH",
+                              "https://test-api.swx.altairone.com/spaces/space01/things/THING000000000000000000001",
+                              params={},
+                              headers={
+                                  'Authorization': 'Bearer valid-token',
+                                  'Content-Type': 'application/json-patch+json',
+                              },
+                              data=mock.ANY,
+                              timeout=3,
+                              verify=True)
+
+    assert json.loads(b''.join(sent)) == test_patch_request
+    assert action == Thing.parse_obj(test_thing01)
+
 def test_delete():
     """
     Tests a successful request to delete a Thing.
@@ -356,3 +397,146 @@ def test_delete():
                               data=[],
                               timeout=3,
                               verify=True)
+
+
+def make_filter_server(calls: list, page_size: int = None, categories: dict = None):
+    """
+    Returns a side effect for the request mock that lists or deletes the
+    Things in the `thingID[]` filter, or in the `category[]` filter (with the
+    Thing IDs of each Category in `categories`), returning pages of
+    `page_size` Things.
+    """
+    lock = threading.Lock()
+
+    def side_effect(method, url, params=None, headers=None, data=None, timeout=None, verify=None):
+        req = requests.Request(method, url, params=params)
+        full_url = req.prepare().url
+        query = parse_qs(urlparse(full_url).query)
+        if 'category[]' in query:
+            thing_ids = sorted({uid for name in query['category[]'] for uid in categories[name]})
+        else:
+            thing_ids = query['thingID[]']
+        offset = int(query.get('next_cursor', ['0'])[0])
+        with lock:
+            calls.append((method, len(full_url), thing_ids, offset))
+
+        if method == "DELETE":
+            return make_response(200, ThingsDeleted.parse_obj(thing_ids))
+
+        size = page_size or len(thing_ids)
+        next_cursor = str(offset + size) if offset + size < len(thing_ids) else ""
+        return make_response(200, {"data": [{"uid": uid} for uid in thing_ids[offset:offset + size]],
+                                   "paging": {"next_cursor": next_cursor}}, request=req)
+
+    return side_effect
+
+
+@pytest.mark.parametrize("page_size", [None, 20])
+def test_list_split_filters(page_size):
+    """
+    Tests that a `thingID[]` filter that makes the URL too long is split into
+    concurrent requests, whose results are merged.
+    """
+    calls = []
+    thing_ids = [f"01H{i:023}" for i in range(1000)]
+
+    with mock.patch(request_mock_pkg, side_effect=make_filter_server(calls, page_size)):
+        things = (API(host="test-api.swx.altairone.com", max_url_length=2000).
+                  set_token("valid-token").
+                  spaces("space01").
+                  things().
+                  get(params={'thingID[]': thing_ids, 'limit': 1000}))
+
+        assert isinstance(things, ThingList)
+        assert len(things.data) == 1000
+        # The first page of every request comes first
+        assert sorted(t.uid for t in things) == thing_ids
+
+    chunks = sorted(ids for _, _, ids, offset in calls if offset == 0)
+    assert len(chunks) > 1
+    assert [uid for ids in chunks for uid in ids] == thing_ids
+    # Each URL is as long as possible without exceeding the maximum length
+    assert all(1950 < length <= 2000 for _, length, ids, offset in calls
+               if offset == 0 and ids != chunks[-1])
+    if page_size is not None:
+        assert len(calls) == sum(-(-len(ids) // page_size) for ids in chunks)
+
+
+def test_delete_split_filters():
+    """
+    Tests that a delete with a `thingID[]` filter that makes the URL too long
+    is split into concurrent requests, and the deleted Things are merged.
+    """
+    calls = []
+    thing_ids = [f"01H{i:023}" for i in range(1000)]
+
+    with mock.patch(request_mock_pkg, side_effect=make_filter_server(calls)):
+        deleted = (API(host="test-api.swx.altairone.com").
+                   set_token("valid-token").
+                   spaces("space01").
+                   things().
+                   delete(params={'thingID[]': thing_ids}))
+
+    assert isinstance(deleted, ThingsDeleted)
+    assert list(deleted) == thing_ids
+    assert len(calls) > 1 and all(length <= 4096 for _, length, _, _ in calls)
+
+
+def test_list_split_categories():
+    """
+    Tests that the Things of a split `category[]` filter are listed once,
+    even if they are in several Categories, in pages of up to `limit` Things.
+    """
+    calls = []
+    categories = {f"Category{i:03}": [f"thing{j:03}" for j in range(i, i + 5)] for i in range(200)}
+
+    with mock.patch(request_mock_pkg, side_effect=make_filter_server(calls, 10, categories)):
+        things = (API(host="test-api.swx.altairone.com", max_url_length=1000).
+                  set_token("valid-token").
+                  spaces("space01").
+                  things().
+                  get(params={'category[]': sorted(categories), 'limit': 10}))
+
+        assert len(things.data) == 10
+        uids = [t.uid for t in things]
+
+    assert len({ids[0] for _, _, ids, offset in calls if offset == 0}) > 1
+    assert sorted(uids) == [f"thing{j:03}" for j in range(204)]
+
+
+def test_list_sorted_not_split():
+    """
+    Tests that sorted listings aren't split, since the merged results wouldn't
+    be sorted.
+    """
+    calls = []
+    thing_ids = [f"01H{i:023}" for i in range(1000)]
+
+    with mock.patch(request_mock_pkg, side_effect=make_filter_server(calls)):
+        things = (API(host="test-api.swx.altairone.com", max_url_length=2000).
+                  set_token("valid-token").
+                  spaces("space01").
+                  things().
+                  get(params={'thingID[]': thing_ids, 'sort': ['-uid']}))
+
+    assert [t.uid for t in things] == thing_ids
+    assert len(calls) == 1 and calls[0][1] > 2000
+
+
+def test_delete_split_categories():
+    """
+    Tests that the Things deleted by a split `category[]` filter are listed
+    once, even if they are in several Categories.
+    """
+    calls = []
+    categories = {f"Category{i:03}": [f"thing{j:03}" for j in range(i, i + 5)] for i in range(200)}
+
+    with mock.patch(request_mock_pkg, side_effect=make_filter_server(calls, categories=categories)):
+        deleted = (API(host="test-api.swx.altairone.com", max_url_length=1000).
+                   set_token("valid-token").
+                   spaces("space01").
+                   things().
+                   delete(params={'category[]': sorted(categories)}))
+
+    assert len(calls) > 1
+    assert sorted(deleted) == [f"thing{j:03}" for j in range(204)]
@@ -0,0 +1,71 @@
+import io
+import json
+
+import pytest
+
+from iots.body import JSONArrayStream, RawBody, is_stream
+from iots.models.models import ThingCreate
+
+
+def test_raw_body():
+    """
+    Keeps the data of pre-serialised bodies without copying it.
+    """
+    data = b'{"foo": "bar"}'
+    assert RawBody(data).data is data
+    assert RawBody(data).content_type == 'application/json'
+    assert RawBody('foo', content_type='text/plain').content_type == 'text/plain'
+
+    # Memory views of other formats are cast to bytes, without copying them
+    view = memoryview(bytearray(8)).cast('I')
+    body = RawBody(view)
+    assert len(body.data) == 8
+    assert body.data.obj is view.obj
+
+    stream = io.BytesIO(data)
+    assert RawBody(stream).data is stream
+
+    with pytest.raises(TypeError):
+        RawBody({"foo": "bar"})
+
+
+@pytest.mark.parametrize("num_items", [0, 1, 1000])
+def test_json_array_stream(num_items):
+    """
+    Encodes the items of an iterable as a JSON array, in chunks of bounded
+    size.
+    """
+    items = ({"id": i, "title": f"Thing {i}"} for i in range(num_items))
+    chunks = list(JSONArrayStream(items, chunk_size=1024))
+
+    assert json.loads(b''.join(chunks)) == [{"id": i, "title": f"Thing {i}"} for i in range(num_items)]
+    assert all(len(chunk) < 1024 + 64 for chunk in chunks)
+    assert len(chunks) >= num_items * 30 // 1024
+
+
+def test_json_array_stream_models():
+    """
+    Encodes API models in a JSON array stream.
+    """
+    items = [ThingCreate(title="Thing 1"), {"title": "Thing 2"}, 3, None]
+    chunks = list(JSONArrayStream(items))
+
+    assert len(chunks) == 1
+    assert json.loads(chunks[0]) == [json.loads(items[0].json()), {"title": "Thing 2"}, 3, None]
+
+
+@pytest.mark.parametrize("obj, expected", [
+    (io.BytesIO(b"foo"), True),
+    (iter([b"foo"]), True),
+    ((x for x in [1, 2]), True),
+    (b"foo", False),
+    ("foo", False),
+    ([1, 2], False),
+    ({"foo": "bar"}, False),
+    (ThingCreate(title="Thing 1"), False),
+])
+def test_is_stream(obj, expected):
+    """
+    Checks whether a request body is a stream.
+    """
+    assert is_stream(obj) == expected
@@ -0,0 +1,99 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from iots.models.models import PropertyHistoryValueList, PropertyHistoryValues
+
+np = pytest.importorskip("numpy")
+
+from iots.models.columnar import PropertyHistoryColumns  # noqa: E402
+
+test_properties_history_values = [
+    {"at": "2024-04-02T11:17:09.122Z", "properties": {"humidity": 10, "is_raining": True}},
+    {"at": "2024-04-02T11:17:04.703Z", "properties": {"is_raining": False}},
+    {"at": "2024-04-02T11:17:02.518Z", "properties": {"temperature": 21.5, "status": "ok"}},
+    {"at": "2024-04-02T11:16:58.157Z", "properties": {"humidity": 7, "temperature": 20}},
+    {"at": "2024-04-02T11:16:56.417+01:00", "properties": {"humidity": 1}},
+]
+
+
+def test_from_records():
+    """
+    Builds typed columns with validity masks from decoded JSON values.
+    """
+    columns = PropertyHistoryColumns.from_records(test_properties_history_values)
+
+    assert len(columns) == 5
+    assert columns.names == ["humidity", "is_raining", "temperature", "status"]
+    assert columns.at.dtype == np.dtype('datetime64[us]')
+    assert columns.at[0] == np.datetime64('2024-04-02T11:17:09.122')
+    assert columns.at[4] == np.datetime64('2024-04-02T10:16:56.417')
+
+    assert columns.values["humidity"].dtype == np.int64
+    assert columns.values["is_raining"].dtype == bool
+    assert columns.values["temperature"].dtype == np.float64
+    assert columns.values["status"].dtype == object
+
+    assert columns.valid["humidity"].tolist() == [True, False, False, True, True]
+    assert columns["humidity"].compressed().tolist() == [10, 7, 1]
+    assert columns["temperature"].sum() == 41.5
+
+
+def test_models_roundtrip():
+    """
+    Converts Properties history models to columns and back.
+    """
+    models = PropertyHistoryValues.parse_obj(test_properties_history_values)
+    columns = PropertyHistoryColumns.from_models(models)
+
+    assert columns.to_models() == models
+    assert columns.to_models()[0].at == datetime(2024, 4, 2, 11, 17, 9, 122000, tzinfo=timezone.utc)
+
+    value_list = PropertyHistoryValueList.parse_obj({"data": test_properties_history_values})
+    assert PropertyHistoryColumns.from_models(value_list.data).to_records() == \
+           PropertyHistoryColumns.from_records(test_properties_history_values).to_records()
+
+
+def test_slicing():
+    """
+    Selects samples by time range, index and mask.
+    """
+    columns = PropertyHistoryColumns.from_records(test_properties_history_values)
+
+    selected = columns.between("2024-04-02T11:16:58Z", datetime(2024, 4, 2, 11, 17, 9, tzinfo=timezone.utc))
+    assert len(selected) == 3
+    assert selected["humidity"].compressed().tolist() == [7]
+    assert selected.valid["is_raining"].tolist() == [True, False, False]
+
+    assert len(columns.between(start="2024-04-02T11:17:00Z")) == 3
+    assert len(columns.between(end=np.datetime64("2024-04-02T11:00:00"))) == 1
+
+    assert columns[1].to_records()[0]["properties"] == {"is_raining": False}
+    assert columns[np.int64(1)].to_records() == columns[1].to_records()
+    assert len(columns[1:3]) == 2
+    assert len(columns[columns.valid["humidity"]]) == 3
+
+    ascending = columns.sorted()
+    assert ascending.at.tolist() == sorted(columns.at.tolist())
+    assert columns.sorted(descending=True).at.tolist() == sorted(columns.at.tolist(), reverse=True)
+
+
+def test_length_mismatch():
+    """
+    Fails when the columns have a different length than the timestamps.
+    """
+    with pytest.raises(ValueError):
+        PropertyHistoryColumns(np.array(['2024-01-01'], dtype='datetime64[us]'),
+                               {"a": np.array([1, 2])}, {"a": np.array([True, True])})
+
+
+def test_missing_timestamps():
+    """
+    Returns missing timestamps (NaT) as None.
+    """
+    columns = PropertyHistoryColumns(np.array(['2024-01-01T00:00:00', 'NaT'], dtype='datetime64[us]'),
+                                     {"a": np.array([1, 2])}, {"a": np.array([True, True])})
+
+    records = columns.to_records()
+    assert records[0]["at"] == datetime(2024, 1, 1, tzinfo=timezone.utc)
+    assert records[1] == {"at": None, "properties": {"a": 2}}
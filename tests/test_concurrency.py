@@ -0,0 +1,142 @@
+import threading
+import time
+
+import pytest
+
+from iots.internal.concurrency import concurrent_chain, map_unordered, new_executor
+
+
+def test_concurrent_chain_order():
+    """
+    Yields the items of the iterables in order, even if the later ones finish
+    first.
+    """
+
+    def items(i):
+        time.sleep(0.01 * (5 - i))
+        yield from range(i * 10, i * 10 + 10)
+
+    assert list(concurrent_chain([items(i) for i in range(5)], max_workers=3, buffer_size=2)) == \
+           list(range(50))
+    assert list(concurrent_chain([])) == []
+
+
+def test_concurrent_chain_concurrency():
+    """
+    Consumes up to max_workers iterables at the same time.
+    """
+    lock = threading.Lock()
+    running, max_running = 0, 0
+
+    def items(i):
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        yield i
+
+    assert list(concurrent_chain((items(i) for i in range(8)), max_workers=4)) == list(range(8))
+    assert max_running == 4
+
+
+def test_concurrent_chain_error():
+    """
+    Raises the errors of the iterables when they are reached.
+    """
+
+    def failing():
+        yield 1
+        raise ValueError("Failed")
+
+    chain = concurrent_chain([iter([0]), failing(), iter([2])])
+    assert next(chain) == 0
+    assert next(chain) == 1
+    with pytest.raises(ValueError):
+        next(chain)
+
+
+def test_concurrent_chain_close():
+    """
+    Stops consuming the iterables when the chain is closed.
+    """
+    produced = []
+
+    def endless():
+        i = 0
+        while True:
+            produced.append(i)
+            yield i
+            i += 1
+
+    chain = concurrent_chain([endless(), endless()], buffer_size=5)
+    assert next(chain) == 0
+    chain.close()
+
+    time.sleep(0.3)
+    count = len(produced)
+    time.sleep(0.2)
+    assert len(produced) == count
+    # Only the buffered items (and the ones being put) are read ahead
+    assert count <= 2 * (5 + 2)
+
+
+def test_map_unordered():
+    """
+    Yields the results as they complete, taking the items lazily.
+    """
+    taken = 0
+
+    def items():
+        nonlocal taken
+        for i in range(20):
+            taken += 1
+            yield i
+
+    def slow_square(i):
+        time.sleep(0.05 if i == 0 else 0.001)
+        return i * i
+
+    results = map_unordered(slow_square, items(), max_workers=2, max_pending=4)
+    first = next(results)
+    assert first != 0
+    assert taken <= 5
+    assert sorted([first, *results]) == [i * i for i in range(20)]
+
+
+def test_map_unordered_error():
+    """
+    Raises the errors of the calls when their results are reached.
+    """
+
+    def fail(i):
+        raise ValueError(i)
+
+    with pytest.raises(ValueError):
+        list(map_unordered(fail, range(3)))
+    assert list(map_unordered(fail, [])) == []
+
+
+
+def test_map_unordered_executor():
+    """
+    Makes the calls in the given thread pool, which is reused and not shut
+    down.
+    """
+    threads = set()
+
+    def square(i):
+        threads.add(threading.get_ident())
+        time.sleep(0.001)
+        return i * i
+
+    executor = new_executor(max_workers=2)
+    try:
+        for _ in range(5):
+            assert sorted(map_unordered(square, range(10), executor=executor)) == [i * i for i in range(10)]
+        assert len(threads) <= 2
+        assert executor.submit(square, 3).result() == 9
+    finally:
+        executor.shutdown()
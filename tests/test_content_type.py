@@ -0,0 +1,103 @@
+from unittest import mock
+
+import pytest
+
+from iots.internal.content_type import (
+    content_types_compatible,
+    content_types_match,
+    get_content_type,
+    parse_content_type,
+    request_converters,
+    to_json,
+    to_text,
+    to_xml,
+)
+
+
+def test_parse_content_type():
+    """
+    Parses a Content-Type into its components.
+    """
+    components = parse_content_type("application/json-patch+json; charset=utf-8")
+    assert components == {
+        "media_type": "application/json-patch+json",
+        "type": "application",
+        "subtype": "json-patch",
+        "suffix": "json",
+        "parameters": {"charset": "utf-8"},
+    }
+
+    # The returned dictionaries are not shared between calls
+    components["parameters"]["charset"] = "latin-1"
+    assert parse_content_type("application/json-patch+json; charset=utf-8")["parameters"] == {"charset": "utf-8"}
+
+
+def test_get_content_type():
+    """
+    Returns interned Content-Type instances.
+    """
+    ct = get_content_type("application/json; charset=utf-8")
+    assert ct is get_content_type("application/json; charset=utf-8")
+    assert ct.media_type == "application/json"
+    assert ct.parameters == {"charset": "utf-8"}
+    assert ct == get_content_type("APPLICATION/JSON")
+    assert ct != get_content_type("application/xml")
+    assert ct == get_content_type("*/*")
+    assert ct.is_compatible(get_content_type("application/json-patch+json"))
+    assert not ct.is_compatible(get_content_type("application/xml"))
+    # Wildcards make the equality non-transitive, so instances aren't hashable
+    with pytest.raises(TypeError):
+        hash(ct)
+
+
+@pytest.mark.parametrize("type1, type2, compatible, match", [
+    ("application/json", "application/json", True, True),
+    ("application/json; charset=utf-8", "application/json", True, True),
+    ("application/json-patch+json", "application/json", True, False),
+    ("application/xml", "application/json", False, False),
+    ("text/plain", "text/*", True, False),
+    ("*/*", "application/json", False, True),
+])
+def test_content_types_compatible_and_match(type1, type2, compatible, match):
+    """
+    Checks whether two Content-Types are compatible and whether they match.
+    """
+    assert content_types_compatible(type1, type2) == compatible
+    assert content_types_match(type1, type2) == match
+
+
+def test_request_converters():
+    """
+    Returns the converters that can serialize a payload to a Content-Type.
+    """
+    assert request_converters("application/json") == (to_json,)
+    assert request_converters("application/json-patch+json") == (to_json,)
+    assert request_converters("application/xml") == (to_xml,)
+    assert request_converters("text/plain") == (to_text,)
+    assert request_converters("image/png") == ()
+
+
+@pytest.mark.parametrize("converter, payload", [
+    (to_json, '{"foo": "bar"}'),
+    (to_json, b'{"foo": "bar"}'),
+    (to_xml, '<root><foo>bar</foo></root>'),
+    (to_xml, b'<root><foo>bar</foo></root>'),
+    (to_text, 'foo'),
+    (to_text, b'foo'),
+])
+def test_converters_serialized_payload(converter, payload):
+    """
+    Returns already serialized payloads as is.
+    """
+    assert converter(payload) is payload
+
+
+def test_converters_large_payload():
+    """
+    Doesn't validate serialized payloads larger than the maximum size.
+    """
+    with pytest.raises(ValueError):
+        to_json(b'{"foo": ')
+
+    with mock.patch('iots.internal.content_type.MAX_VALIDATED_BODY_SIZE', 4):
+        assert to_json(b'{"foo": ') == b'{"foo": '
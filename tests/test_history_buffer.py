@@ -0,0 +1,217 @@
+import json
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from unittest import mock
+
+import pytest
+
+from iots.api import API
+from iots.models.exceptions import APIException
+from iots.models.models import PropertyHistoryValue
+from .common import make_response
+
+request_mock_pkg = 'iots.api.requests.Session.request'
+
+history_url = "https://test-api.swx.altairone.com/spaces/space01/things/thing01/properties-history"
+
+
+def created_response(status_code: int = 201, data=None):
+    resp = make_response(status_code, json.dumps(data if data is not None else []))
+    resp.headers['Content-Type'] = 'application/json'
+    return resp
+
+
+def echo(method, url, params=None, headers=None, data=None, timeout=None, verify=None):
+    return created_response(201, json.loads(data))
+
+
+def sent_batches(m) -> list:
+    return [json.loads(c.kwargs['data']) for c in m.call_args_list]
+
+
+def make_history(api: API = None):
+    api = api or API(host="test-api.swx.altairone.com").set_token("valid-token")
+    return api.spaces("space01").things("thing01").properties_history()
+
+
+def test_max_samples():
+    """
+    Sends the values in batches of up to max_samples values.
+    """
+    at = datetime(2024, 4, 2, 11, 17, 9, 122000, tzinfo=timezone.utc)
+
+    with mock.patch(request_mock_pkg, side_effect=echo) as m:
+        buffer = make_history().buffer(max_samples=4, flush_interval=60)
+        for i in range(10):
+            buffer.add({"counter": i}, at=at)
+        assert buffer.flush(timeout=5)
+
+    batches = sent_batches(m)
+    assert [len(b) for b in batches] == [4, 4, 2]
+    assert [v['properties']['counter'] for b in batches for v in b] == list(range(10))
+    assert batches[0][0] == {"at": "2024-04-02T11:17:09.122Z", "properties": {"counter": 0}}
+    assert buffer.sent == 10 and not buffer.failed and len(buffer) == 0
+
+    method, url = m.call_args.args
+    assert (method, url) == ("POST", history_url)
+    assert m.call_args.kwargs['headers'] == {
+        'Authorization': 'Bearer valid-token',
+        'Content-Type': 'application/json',
+    }
+
+
+def test_max_bytes():
+    """
+    Sends the values in batches of up to max_bytes bytes.
+    """
+    value = PropertyHistoryValue.parse_obj({"at": "2024-04-02T11:17:09.122Z", "properties": {"temperature": 21}})
+    size = len(value.json())
+
+    with mock.patch(request_mock_pkg, side_effect=echo) as m:
+        buffer = make_history().buffer(max_bytes=3 * (size + 1) + 1, flush_interval=60)
+        for _ in range(7):
+            buffer.add(value)
+        assert buffer.flush(timeout=5)
+
+    assert [len(b) for b in sent_batches(m)] == [3, 3, 1]
+    assert all(len(c.kwargs['data']) <= buffer.max_bytes for c in m.call_args_list)
+
+
+def test_flush_interval():
+    """
+    Sends the pending values after flush_interval seconds.
+    """
+    with mock.patch(request_mock_pkg, side_effect=echo) as m:
+        buffer = make_history().buffer(flush_interval=0.05)
+        buffer.add({"temperature": 21})
+        buffer.add({"temperature": 22})
+
+        deadline = time.monotonic() + 5
+        while buffer.sent < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    assert sent_batches(m) == [[
+        {"at": mock.ANY, "properties": {"temperature": 21}},
+        {"at": mock.ANY, "properties": {"temperature": 22}},
+    ]]
+
+
+def test_flush_interval_leftover():
+    """
+    Waits flush_interval seconds for the values left after a batch limited by
+    size, counted from when they were added.
+    """
+    with mock.patch(request_mock_pkg, side_effect=echo) as m:
+        buffer = make_history().buffer(max_samples=3, flush_interval=0.5)
+        buffer.add({"counter": 0})
+        time.sleep(0.4)
+        for i in range(1, 4):
+            buffer.add({"counter": i})
+
+        # The first 3 values are sent because of max_samples
+        deadline = time.monotonic() + 5
+        while buffer.sent < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.25)
+        assert len(buffer) == 1 and m.call_count == 1
+
+        while buffer.sent < 4 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    assert [[v['properties']['counter'] for v in b] for b in sent_batches(m)] == [[0, 1, 2], [3]]
+
+
+def test_retry():
+    """
+    Retries the batches that fail with a server error, and doesn't retry
+    client errors.
+    """
+    error = {"error": {"status": 503, "message": "Service unavailable"}}
+    conflict = {"error": {"status": 409, "message": "Property value already exists"}}
+    responses = [make_response(503, error), make_response(503, error),
+                 created_response(), make_response(409, conflict)]
+
+    with mock.patch(request_mock_pkg, side_effect=responses) as m:
+        buffer = make_history().buffer(max_samples=1, retry_backoff=0.01)
+        buffer.add({"temperature": 21})
+        assert buffer.flush(timeout=5)
+        assert m.call_count == 3 and buffer.sent == 1
+
+        buffer.add({"temperature": 22})
+        assert buffer.flush(timeout=5)
+        assert m.call_count == 4 and buffer.sent == 1
+
+    (values, error), = buffer.failed
+    assert values[0].properties['temperature'] == 22
+    assert error.http_response().status_code == 409
+
+
+def test_on_error():
+    """
+    Passes the batches that can't be sent to the on_error callback.
+    """
+    errors = []
+    error = {"error": {"status": 500, "message": "Internal error"}}
+
+    with mock.patch(request_mock_pkg, return_value=make_response(500, error)) as m:
+        buffer = make_history().buffer(max_retries=2, retry_backoff=0.01,
+                                       on_error=lambda values, e: errors.append(values))
+        buffer.add({"temperature": 21})
+        buffer.add({"temperature": 22})
+        assert buffer.flush(timeout=5)
+
+    assert m.call_count == 3
+    assert [v.properties['temperature'] for v in errors[0]] == [21, 22]
+    assert not buffer.failed
+
+
+def test_backpressure():
+    """
+    Blocks when max_pending values are waiting to be sent.
+    """
+    release = threading.Event()
+
+    def slow_echo(*args, **kwargs):
+        release.wait(5)
+        return echo(*args, **kwargs)
+
+    with mock.patch(request_mock_pkg, side_effect=slow_echo):
+        buffer = make_history().buffer(max_samples=2, max_pending=2, flush_interval=60)
+        # The first batch is being sent, and the second one is full
+        for i in range(4):
+            buffer.add({"counter": i}, timeout=1)
+        with pytest.raises(queue.Full):
+            buffer.add({"counter": 4}, timeout=0.05)
+
+        release.set()
+        buffer.add({"counter": 4}, timeout=5)
+        buffer.close()
+
+    assert buffer.sent == 5
+    with pytest.raises(APIException):
+        buffer.add({"counter": 5})
+
+
+def test_flush_on_api_exit():
+    """
+    Sends the pending values when the API context manager exits.
+    """
+    with mock.patch(request_mock_pkg, side_effect=echo) as m:
+        with API(host="test-api.swx.altairone.com").set_token("valid-token") as api:
+            buffer = make_history(api).buffer(flush_interval=60)
+            for i in range(3):
+                buffer.add({"counter": i})
+            assert m.call_count == 0
+
+    assert [len(b) for b in sent_batches(m)] == [3]
+    assert buffer.sent == 3
+
+
+def test_invalid_options():
+    with pytest.raises(ValueError):
+        make_history().buffer(max_samples=0)
+
+    with pytest.raises(ValueError):
+        make_history().buffer(max_samples=10, max_pending=5)
@@ -0,0 +1,120 @@
+import json
+
+import pytest
+from requests import PreparedRequest, Request
+
+from iots.internal.runtime_expr import (
+    RuntimeExpressionError,
+    compile_expression,
+    compile_setter,
+    evaluate,
+    prepare_request,
+)
+from .common import make_response
+
+body = {
+    "data": [{"id": "thing01"}, {"id": "thing02"}],
+    "paging": {"next_cursor": "abc", "limit": 2},
+}
+
+
+def make_paged_response():
+    req = Request("POST", "https://test-api.swx.altairone.com/spaces/space01/things",
+                  params={"limit": "2", "ids": ["a", "b"]},
+                  headers={"X-Page-Size": "2"},
+                  json={"filter": {"title": "foo"}}).prepare()
+    resp = make_response(200, body, request=req)
+    resp.headers["X-Total"] = "10"
+    return resp
+
+
+@pytest.mark.parametrize("expression, expected", [
+    ("$url", "https://test-api.swx.altairone.com/spaces/space01/things?limit=2&ids=a&ids=b"),
+    ("$method", "POST"),
+    ("$statusCode", 200),
+    ("$request.query.limit", 2),
+    ("$request.query.ids", ["a", "b"]),
+    ("$request.path.space", "space01"),
+    ("$request.header.X-Page-Size", "2"),
+    ("$request.header.x-page-size", 2),
+    ("$request.body", '{"filter": {"title": "foo"}}'),
+    ("$request.body#/filter/title", "foo"),
+    ("$response.header.X-Total", "10"),
+    ("$response.body#/paging/next_cursor", "abc"),
+    ("$response.body#/data/1/id", "thing02"),
+    ("  paging.limit ", 2),
+    ("data.0.id", "thing01"),
+    ("/spaces/{$request.path.space}/things?cursor={$response.body#/paging/next_cursor}",
+     "/spaces/space01/things?cursor=abc"),
+    ("{no expression}", "{no expression}"),
+])
+def test_evaluate(expression, expected):
+    """
+    Evaluates runtime expressions and dot-separated expressions.
+    """
+    resp = make_paged_response()
+    value = evaluate(resp, expression, path_values={"space": "space01"},
+                     query_param_types={"limit": int},
+                     header_param_types={"X-Page-Size": int})
+    assert value == expected
+
+
+@pytest.mark.parametrize("expression", [
+    "$unknown",
+    "$request.path.thing_id",
+    "$request.query.cursor",
+    "$response.body#/paging/previous_cursor",
+    "$response.body#/data/5/id",
+    "paging.previous_cursor",
+])
+def test_evaluate_error(expression):
+    """
+    Raises a RuntimeExpressionError when an expression cannot be evaluated.
+    """
+    with pytest.raises(RuntimeExpressionError):
+        evaluate(make_paged_response(), expression, path_values={"space": "space01"})
+
+
+def test_compiled_expressions_are_cached():
+    """
+    Compiles each expression once.
+    """
+    getter = compile_expression("$response.body#/paging/next_cursor")
+    assert compile_expression("$response.body#/paging/next_cursor") is getter
+    assert getter(make_paged_response(), None, None, None) == "abc"
+
+    setter = compile_setter("$request.query.next_cursor")
+    assert compile_setter("$request.query.next_cursor") is setter
+
+
+@pytest.mark.parametrize("expression, value, check", [
+    ("$url", "https://other.swx.mock/things", lambda r: r.url == "https://other.swx.mock/things"),
+    ("$method", "get", lambda r: r.method == "GET"),
+    ("$request.query.cursor", "abc", lambda r: r.url.endswith("?limit=2&cursor=abc")),
+    ("$request.header.X-Cursor", "abc", lambda r: r.headers["X-Cursor"] == "abc"),
+    ("$request.body", {"foo": 1}, lambda r: json.loads(r.body) == {"foo": 1}),
+    ("$request.body#/paging/cursor", "abc",
+     lambda r: json.loads(r.body) == {"filter": "foo", "paging": {"cursor": "abc"}}),
+    ("paging.cursor", "abc", lambda r: json.loads(r.body) == {"filter": "foo", "paging": {"cursor": "abc"}}),
+    ("", {"foo": 1}, lambda r: json.loads(r.body) == {"foo": 1}),
+])
+def test_prepare_request(expression, value, check):
+    """
+    Sets values in a request from runtime expressions and dot-separated
+    expressions.
+    """
+    req = Request("POST", "https://test-api.swx.altairone.com/things", params={"limit": "2"},
+                  json={"filter": "foo"})
+    prepared = prepare_request(req, expression, value)
+
+    assert isinstance(prepared, PreparedRequest)
+    assert check(prepared)
+
+
+def test_prepare_request_error():
+    """
+    Raises a RuntimeExpressionError when an expression cannot be applied to a
+    request.
+    """
+    with pytest.raises(RuntimeExpressionError):
+        prepare_request(Request("GET", "https://test-api.swx.altairone.com"), "$statusCode", 200)
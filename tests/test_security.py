@@ -1,3 +1,4 @@
+import threading
 import time
 from unittest import mock
 
@@ -7,7 +8,8 @@ from requests import Request
 from iots.models.exceptions import ResponseError
 from .common import make_response
 
-from iots.security import AccessToken, OAuth2ClientCredentials
+from iots.security import AccessToken, OAuth2ClientCredentials, _TokenRenewer
+from iots.token_store import FileTokenStore
 from iots.models.exceptions import ResponseError
 
 request_mock_pkg = 'iots.security.requests.request'
@@ -72,6 +74,7 @@ def test_oauth2_security(verify):
                                   'client_secret': 'test-client-secret',
                                   'scope': 'foo bar',
                               },
+                              timeout=10,
                               verify=verify)
 
     # Revoke token
@@ -86,6 +89,7 @@ def test_oauth2_security(verify):
                                   'client_id': 'test-client-id',
                                   'client_secret': 'test-client-secret',
                               },
+                              timeout=10,
                               verify=verify)
 
     # Get token
@@ -101,6 +105,7 @@ def test_oauth2_security(verify):
                                   'client_secret': 'test-client-secret',
                                   'scope': 'foo bar',
                               },
+                              timeout=10,
                               verify=verify)
 
     # Reuse token before it expires
@@ -125,6 +130,7 @@ def test_oauth2_security(verify):
                                   'client_secret': 'test-client-secret',
                                   'scope': 'foo bar',
                               },
+                              timeout=10,
                               verify=verify)
 
 
@@ -199,3 +205,205 @@ def test_oauth2_security_revoke_token_error():
     assert "Failed to revoke token: {" in str(e.value)
     assert e.value.http_response().status_code == 400
     assert e.value.http_response().json() == expected_error_payload
+
+
+@pytest.mark.parametrize("current_token", ["", "old-token"])
+def test_oauth2_security_single_flight_refresh(current_token):
+    """
+    Tests that only one token exchange happens when many threads apply the
+    OAuth2ClientCredentials security strategy while the token is missing or
+    close to expire.
+    """
+    expected_token = {
+        'access_token': "valid-token",
+        'expires_in': 3600,
+        'scope': "foo bar",
+        'token_type': "bearer",
+    }
+
+    oauth2_strategy = OAuth2ClientCredentials(
+        client_id="test-client-id",
+        client_secret="test-client-secret",
+        scopes=["foo", "bar"],
+        token_url='https://test-api.com/auth/token')
+
+    # The current token (if any) is still valid, but within the refresh threshold
+    oauth2_strategy._token = current_token
+    oauth2_strategy.expires_at = time.time() + 5
+
+    def slow_token_exchange(*args, **kwargs):
+        time.sleep(0.2)
+        return make_response(200, expected_token)
+
+    num_threads = 64
+    barrier = threading.Barrier(num_threads)
+    tokens = []
+
+    def worker():
+        barrier.wait()
+        req = Request()
+        oauth2_strategy.apply(req)
+        tokens.append(req.headers["Authorization"])
+
+    with mock.patch(request_mock_pkg, side_effect=slow_token_exchange) as m:
+        threads = [threading.Thread(target=worker) for _ in range(num_threads)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    assert m.call_count == 1
+    assert len(tokens) == num_threads
+    assert oauth2_strategy._token == "valid-token"
+    if current_token:
+        # Threads that didn't wait for the refresh used the still valid token
+        assert set(tokens) <= {"Bearer old-token", "Bearer valid-token"}
+    else:
+        assert set(tokens) == {"Bearer valid-token"}
+
+
+def test_oauth2_security_background_refresh():
+    """
+    Tests that the OAuth2ClientCredentials security strategy renews the token
+    in the background before it expires, retrying failed renewals, and that
+    revoking the token stops the renewal.
+    """
+    token_responses = [
+        make_response(200, {'access_token': "token-1", 'expires_in': 2}),
+        make_response(500, {'error': "server_error"}),
+        make_response(200, {'access_token': "token-2", 'expires_in': 3600}),
+    ]
+
+    oauth2_strategy = OAuth2ClientCredentials(
+        client_id="test-client-id",
+        client_secret="test-client-secret",
+        scopes=["foo", "bar"],
+        token_url='https://test-api.com/auth/token',
+        revoke_token_url='https://test-api.com/auth/revoke',
+        refresh_threshold=0,
+        background_refresh=True,
+        renew_before=1.5,
+        renew_jitter=0)
+
+    with mock.patch.object(_TokenRenewer, 'min_retry_interval', 0.1):
+        with mock.patch(request_mock_pkg, side_effect=token_responses) as m:
+            oauth2_strategy.get_token()
+            assert oauth2_strategy._token == "token-1"
+
+            # The token is renewed after ~1 second, at the second attempt
+            deadline = time.time() + 5
+            while oauth2_strategy._token != "token-2" and time.time() < deadline:
+                time.sleep(0.05)
+
+            assert oauth2_strategy._token == "token-2"
+            assert m.call_count == 3
+
+            # Requests use the renewed token without any exchange
+            req = Request()
+            oauth2_strategy.apply(req)
+            assert req.headers["Authorization"] == "Bearer token-2"
+            assert m.call_count == 3
+
+    renewer = oauth2_strategy._renewer
+    assert renewer.is_alive()
+
+    with mock.patch(request_mock_pkg, return_value=make_response(200)):
+        oauth2_strategy.clean()
+
+    renewer.join(1)
+    assert not renewer.is_alive()
+    assert oauth2_strategy._renewer is None
+
+
+def test_oauth2_security_background_refresh_short_lived_token():
+    """
+    Tests that the OAuth2ClientCredentials security strategy doesn't renew
+    tokens that live less than `renew_before` seconds as soon as they are
+    issued, but halfway through their lifetime.
+    """
+    oauth2_strategy = OAuth2ClientCredentials(
+        client_id="test-client-id",
+        client_secret="test-client-secret",
+        scopes=["foo", "bar"],
+        token_url='https://test-api.com/auth/token',
+        refresh_threshold=0,
+        background_refresh=True,
+        renew_before=60,
+        renew_jitter=10)
+
+    def side_effect(*args, **kwargs):
+        return make_response(200, {'access_token': "valid-token", 'expires_in': 2})
+
+    with mock.patch(request_mock_pkg, side_effect=side_effect) as m:
+        oauth2_strategy.get_token()
+        time.sleep(1.5)
+        # The token is renewed once, after ~1 second
+        assert m.call_count == 2
+
+        oauth2_strategy._renewer.stop()
+        oauth2_strategy._renewer.join(1)
+
+
+def test_oauth2_security_token_store(tmp_path):
+    """
+    Tests that OAuth2ClientCredentials instances sharing a token store only
+    exchange one token, and that cleaning them doesn't revoke the shared token.
+    """
+    expected_token_resp = make_response(200, {'access_token': "valid-token", 'expires_in': 3600})
+
+    def slow_token_exchange(*args, **kwargs):
+        time.sleep(0.1)
+        return expected_token_resp
+
+    store = FileTokenStore(str(tmp_path))
+    strategies = [OAuth2ClientCredentials(client_id="test-client-id",
+                                          client_secret="test-client-secret",
+                                          scopes=["foo", "bar"],
+                                          token_url='https://test-api.com/auth/token',
+                                          revoke_token_url='https://test-api.com/auth/revoke',
+                                          token_store=store)
+                  for _ in range(16)]
+
+    with mock.patch(request_mock_pkg, side_effect=slow_token_exchange) as m:
+        threads = [threading.Thread(target=s.get_token) for s in strategies]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    assert m.call_count == 1
+    assert {s._token for s in strategies} == {"valid-token"}
+    assert len({s.expires_at for s in strategies}) == 1
+
+    # A new token is exchanged by only one client when the token is about to expire
+    for s in strategies:
+        s.refresh_threshold = 4000
+
+    with mock.patch(request_mock_pkg, return_value=make_response(
+            200, {'access_token': "new-token", 'expires_in': 7200})) as m:
+        for s in strategies:
+            req = Request()
+            s.apply(req)
+            assert req.headers["Authorization"] == "Bearer new-token"
+
+    assert m.call_count == 1
+
+    # Cleaning the strategies doesn't revoke the shared token
+    with mock.patch(request_mock_pkg) as m:
+        for s in strategies:
+            s.clean()
+            assert s._token == ''
+
+    m.assert_not_called()
+    key = strategies[0]._token_store_key()
+    assert store.load(key)['access_token'] == "new-token"
+
+    # Revoking the token removes it from the store
+    with mock.patch(request_mock_pkg, side_effect=[expected_token_resp, make_response(200)]) as m:
+        strategies[0].refresh_threshold = 10
+        strategies[0].get_token()
+        assert strategies[0]._token == "new-token"
+        strategies[0].revoke_token()
+
+    assert m.call_count == 1
+    assert store.load(key) is None
@@ -0,0 +1,168 @@
+import threading
+from unittest import mock
+
+import pytest
+import requests
+
+from iots.tenants import TenantManager
+from .common import make_response
+
+
+class FakeServer:
+    """ Fake API and token server that records the requests. """
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs.get('data')))
+        if url.endswith('/oauth2/token'):
+            return make_response(200, {'access_token': f"token-{kwargs['data']['client_id']}",
+                                       'expires_in': 3600})
+        if url.endswith('/oauth2/revoke'):
+            return make_response(200)
+        return make_response(200, {"headers": kwargs['headers']})
+
+    def urls(self, suffix):
+        return [(url, data) for _, url, data in self.calls if url.endswith(suffix)]
+
+
+def wait_revocations(tenants: TenantManager):
+    """ Waits for the tokens revoked in the background. """
+    if tenants._revoker is not None:
+        tenants._revoker.submit(lambda: None).result()
+
+
+@pytest.fixture
+def server():
+    server = FakeServer()
+    with mock.patch.object(requests.Session, 'request', side_effect=server):
+        yield server
+
+
+def test_tenant_manager(server):
+    """
+    Creates the tenant clients lazily, retrieves their tokens with the first
+    request and shares the connection pool of each host.
+    """
+    tenants = TenantManager(host="api.swx.mock")
+    tenants.register("t1", "client-1", "secret-1", ["thing"], space="space01")
+    tenants.register("t2", "client-2", "secret-2", ["thing"], space="space02")
+    tenants.register("t3", "client-3", "secret-3", ["thing"], host="other.swx.mock")
+
+    assert len(tenants) == 0
+    assert server.calls == []
+
+    api1 = tenants.api("t1")
+    assert tenants.api("t1") is api1
+    assert server.calls == []
+
+    resp = api1.make_request("GET", "/info")
+    assert resp.json()["headers"]["Authorization"] == "Bearer token-client-1"
+    assert server.urls('/oauth2/token')[0][0] == "https://api.swx.mock/oauth2/token"
+
+    assert tenants.space("t2").space == "space02"
+    with pytest.raises(ValueError):
+        tenants.space("t3")
+    with pytest.raises(KeyError):
+        tenants.api("unknown")
+
+    assert len(tenants) == 3
+    assert tenants.api("t1")._session is tenants.api("t2")._session
+    assert tenants.api("t1")._session is not tenants.api("t3")._session
+    assert tenants.api("t3").host == "https://other.swx.mock"
+
+
+def test_tenant_manager_lru(server):
+    """
+    Evicts the least recently used tenant clients and revokes their tokens.
+    """
+    tenants = TenantManager(host="api.swx.mock", max_tenants=2)
+    for i in range(3):
+        tenants.register(f"t{i}", f"client-{i}", "secret", ["thing"])
+
+    tenants.api("t0").make_request("GET", "/info")
+    tenants.api("t1").make_request("GET", "/info")
+    tenants.api("t0")
+    tenants.api("t2")
+    wait_revocations(tenants)
+
+    # t1 was the least recently used tenant
+    assert len(tenants) == 2
+    assert [data['token'] for _, data in server.urls('/oauth2/revoke')] == ["token-client-1"]
+
+    # A new client is created when an evicted tenant is used again
+    tenants.api("t1").make_request("GET", "/info")
+    wait_revocations(tenants)
+    assert len(server.urls('/oauth2/token')) == 3
+    assert [data['token'] for _, data in server.urls('/oauth2/revoke')] == ["token-client-1", "token-client-0"]
+
+    with tenants:
+        pass
+
+    assert len(tenants) == 0
+    assert len(server.urls('/oauth2/revoke')) == 3
+
+
+def test_tenant_manager_idle(server):
+    """
+    Evicts the tenant clients that haven't been used for a while.
+    """
+    tenants = TenantManager(host="api.swx.mock", idle_timeout=60)
+    tenants.register("t0", "client-0", "secret", ["thing"])
+    tenants.register("t1", "client-1", "secret", ["thing"])
+
+    with mock.patch('iots.tenants.time.monotonic', return_value=1000):
+        tenants.api("t0").make_request("GET", "/info")
+    with mock.patch('iots.tenants.time.monotonic', return_value=1030):
+        tenants.api("t1").make_request("GET", "/info")
+
+    with mock.patch('iots.tenants.time.monotonic', return_value=1070):
+        tenants.evict_idle()
+
+    assert len(tenants) == 1
+    assert [data['token'] for _, data in server.urls('/oauth2/revoke')] == ["token-client-0"]
+
+    # Unregistering a tenant evicts its client
+    tenants.unregister("t1")
+    assert len(tenants) == 0
+    with pytest.raises(KeyError):
+        tenants.api("t1")
+
+
+def test_tenant_manager_unknown_tenant(server):
+    """
+    Revokes the tokens of the idle clients evicted by a request for an
+    unknown tenant, without waiting for the revocations.
+    """
+    tenants = TenantManager(host="api.swx.mock", idle_timeout=60)
+    tenants.register("t0", "client-0", "secret", ["thing"])
+
+    with mock.patch('iots.tenants.time.monotonic', return_value=1000):
+        tenants.api("t0").make_request("GET", "/info")
+
+    with mock.patch('iots.tenants.time.monotonic', return_value=1070):
+        with pytest.raises(KeyError):
+            tenants.api("unknown")
+        # The unknown tenant doesn't evict anything
+        assert len(tenants) == 1
+        tenants.register("t1", "client-1", "secret", ["thing"])
+
+        revoking = threading.Event()
+        release = threading.Event()
+
+        def slow_server(method, url, **kwargs):
+            if url.endswith('/oauth2/revoke'):
+                revoking.set()
+                release.wait(5)
+            return server(method, url, **kwargs)
+
+        with mock.patch.object(requests.Session, 'request', side_effect=slow_server):
+            # The idle client is revoked in the background
+            tenants.api("t1")
+            assert revoking.wait(5)
+            assert len(tenants) == 1
+            release.set()
+            tenants.close()
+
+    assert [data['token'] for _, data in server.urls('/oauth2/revoke')] == ["token-client-0"]
@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta
+from unittest import mock
+
+import pytest
+from pydantic import ValidationError
+from pydantic.datetime_parse import parse_datetime
+
+from iots.models.models import ActionValue, EventValue, PropertyHistoryValue
+from iots.models import timestamps
+from iots.models.timestamps import parse_timestamp, parse_timestamps_datetime64
+
+test_timestamps = [
+    "2024-04-02T11:17:09.122Z",
+    "2022-08-22T13:10:00Z",
+    "2022-08-22T13:10Z",
+    "2022-06-02 15:37:46+0000",
+    "2022-02-08T14:41:49.270946386+01:00",
+    "2022-08-22T13:10:00-0530",
+    "2022-08-22T13:10:00+05",
+    "2022-08-22T13:10:00",
+    "2022-8-2T1:1:1Z",
+]
+
+
+@pytest.mark.parametrize("value", test_timestamps)
+def test_parse_timestamp(value):
+    """
+    Parses timestamps exactly as the pydantic datetime parser.
+    """
+    expected = parse_datetime(value)
+    actual = parse_timestamp(value)
+
+    assert isinstance(actual, datetime)
+    assert actual == expected
+    assert actual.tzinfo == expected.tzinfo
+    assert actual.utcoffset() == expected.utcoffset()
+    assert parse_timestamp(value) is actual
+
+
+@pytest.mark.parametrize("value", [
+    "2022-13-22T13:10:00Z",
+    "2022-08-22T13:10:00+25:00",
+    "2022-08-22",
+    "not a date",
+])
+def test_parse_invalid_timestamp(value):
+    """
+    Leaves unsupported values to pydantic, which raises the same errors.
+    """
+    assert parse_timestamp(value) == value
+
+    with pytest.raises(ValidationError):
+        PropertyHistoryValue.parse_obj({"at": value, "properties": {}})
+
+
+def test_parse_non_string():
+    """
+    Returns values that aren't strings as they are.
+    """
+    now = datetime.now()
+    assert parse_timestamp(now) is now
+    assert parse_timestamp(1700000000) == 1700000000
+    assert PropertyHistoryValue.parse_obj({"at": 1700000000, "properties": {}}).at == parse_datetime(1700000000)
+
+
+def test_models():
+    """
+    Parses the timestamps of the history, Event and Action models with the
+    fast path.
+    """
+    value = "2022-06-02 15:37:46+0000"
+    expected = parse_datetime(value)
+
+    with mock.patch.object(timestamps, 'parse_timestamp', wraps=parse_timestamp) as m:
+        assert PropertyHistoryValue.parse_obj({"at": value, "properties": {"a": 1}}).at == expected
+        assert EventValue.parse_obj({"timestamp": value}).timestamp == expected
+        action = ActionValue.parse_obj({"timeRequested": value, "timeCompleted": value})
+        assert action.timeRequested == expected
+        assert action.timeCompleted == expected
+
+    assert m.call_count == 4
+
+
+def test_parse_timestamps_datetime64():
+    """
+    Parses timestamps into a datetime64 array, with and without the
+    vectorised fast path.
+    """
+    np = pytest.importorskip("numpy")
+
+    utc = ["2024-04-02T11:17:09.122Z", "2022-06-02 15:37:46+0000", "2022-02-08T14:41:49.270946386Z"]
+    assert parse_timestamps_datetime64(utc).tolist() == [
+        parse_datetime(v).replace(tzinfo=None) for v in utc
+    ]
+
+    assert parse_timestamps_datetime64(test_timestamps).tolist() == [
+        (parse_datetime(v) - (parse_datetime(v).utcoffset() or timedelta(0))).replace(tzinfo=None)
+        for v in test_timestamps
+    ]
+
+    assert parse_timestamps_datetime64([np.datetime64("2024-01-01T00:00:00")])[0] == \
+           np.datetime64("2024-01-01T00:00:00")
@@ -0,0 +1,80 @@
+import os
+import stat
+from unittest import mock
+
+import pytest
+
+from iots.token_store import FileTokenStore, TokenStore
+
+
+def test_make_key():
+    """
+    Tests that token keys depend on the token URL, client ID and scopes, but
+    not on the order of the scopes.
+    """
+    key = TokenStore.make_key('https://test-api.com/auth/token', 'client', ['foo', 'bar'])
+    assert key == TokenStore.make_key('https://test-api.com/auth/token', 'client', ['bar', 'foo'])
+    assert key != TokenStore.make_key('https://test-api.com/auth/token', 'client', ['foo'])
+    assert key != TokenStore.make_key('https://test-api.com/auth/token', 'other-client', ['foo', 'bar'])
+    assert key != TokenStore.make_key('https://other-api.com/auth/token', 'client', ['foo', 'bar'])
+
+
+def test_file_token_store(tmp_path):
+    """
+    Tests storing, loading and deleting tokens with a FileTokenStore.
+    """
+    store = FileTokenStore(str(tmp_path))
+    key = TokenStore.make_key('https://test-api.com/auth/token', 'client', ['foo'])
+    token = {'access_token': 'valid-token', 'expires_in': 3600, 'expires_at': 1700000000.5}
+
+    assert store.load(key) is None
+
+    with store.lock(key):
+        store.save(key, token)
+
+    assert store.load(key) == token
+    assert FileTokenStore(str(tmp_path)).load(key) == token
+
+    # Tokens are only readable by the current user
+    mode = stat.S_IMODE(os.stat(os.path.join(str(tmp_path), key + '.json')).st_mode)
+    assert mode == 0o600
+
+    store.delete(key)
+    assert store.load(key) is None
+    store.delete(key)
+
+
+def test_file_token_store_invalid_file(tmp_path):
+    """
+    Tests that invalid token files are ignored.
+    """
+    store = FileTokenStore(str(tmp_path))
+    with open(os.path.join(str(tmp_path), 'key.json'), 'w') as f:
+        f.write('{"access_')
+
+    assert store.load('key') is None
+
+
+def test_file_token_store_unsafe_directory(tmp_path):
+    """
+    Tests that directories that other users can access, or that are symlinks
+    or owned by another user, are rejected.
+    """
+    shared = tmp_path / 'shared'
+    shared.mkdir(mode=0o700)
+    shared.chmod(0o777)
+    with pytest.raises(PermissionError):
+        FileTokenStore(str(shared))
+
+    private = tmp_path / 'private'
+    private.mkdir(mode=0o700)
+    link = tmp_path / 'link'
+    link.symlink_to(private)
+    with pytest.raises(PermissionError):
+        FileTokenStore(str(link))
+
+    with mock.patch('iots.token_store.os.getuid', return_value=os.getuid() + 1):
+        with pytest.raises(PermissionError):
+            FileTokenStore(str(private))
+
+    assert FileTokenStore(str(private)).directory == str(private)
@@ -0,0 +1,54 @@
+from iots.internal.url import split_list_params, url_length
+
+url = "https://test-api.swx.altairone.com/spaces/space01/things"
+
+
+def test_url_length():
+    assert url_length(url, {}) == len(url)
+    assert url_length(url, {'thingID[]': ['a', 'b'], 'limit': 10}) == \
+           len(url + "?thingID%5B%5D=a&thingID%5B%5D=b&limit=10")
+
+
+def test_split_list_params_fits():
+    """
+    Returns None if the URL isn't too long.
+    """
+    assert split_list_params(url, None, ['thingID[]']) is None
+    assert split_list_params(url, {'thingID[]': ['a', 'b']}, ['thingID[]']) is None
+
+
+def test_split_list_params():
+    """
+    Splits the list in chunks that fill the URL, keeping the other parameters.
+    """
+    params = {'thingID[]': [f"thing{i:03}" for i in range(100)], 'limit': 10}
+    chunks = split_list_params(url, params, ['thingID[]'], max_length=200)
+
+    assert len(chunks) > 1
+    assert [uid for chunk in chunks for uid in chunk['thingID[]']] == params['thingID[]']
+    assert all(chunk['limit'] == 10 for chunk in chunks)
+    assert all(url_length(url, chunk) <= 200 for chunk in chunks)
+    assert all(url_length(url, chunk) > 200 - 25 for chunk in chunks[:-1])
+
+
+def test_split_list_params_many_lists():
+    """
+    Splits the longest list first, and the others only if it's not enough.
+    """
+    params = {'thingID[]': [f"thing{i:03}" for i in range(10)], 'category[]': ["Sensors", "Meters"]}
+
+    chunks = split_list_params(url, params, ['thingID[]', 'category[]'], max_length=250)
+    assert all(chunk['category[]'] == ["Sensors", "Meters"] for chunk in chunks)
+    assert all(url_length(url, chunk) <= 250 for chunk in chunks)
+
+    chunks = split_list_params(url, params, ['thingID[]', 'category[]'], max_length=100)
+    assert {tuple(chunk['category[]']) for chunk in chunks} == {("Sensors",), ("Meters",)}
+    assert len(chunks) == 20
+
+
+def test_split_list_params_too_long():
+    """
+    Returns None if a single value doesn't fit.
+    """
+    assert split_list_params(url, {'thingID[]': ["x" * 100]}, ['thingID[]'], max_length=100) is None
+    assert split_list_params(url, {'limit': 10}, ['thingID[]'], max_length=10) is None